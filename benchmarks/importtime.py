@@ -0,0 +1,77 @@
+"""
+Measures CLI start-up cost with `python -X importtime`.
+
+    uv run python benchmarks/importtime.py               # finace_tracker.main
+    uv run python benchmarks/importtime.py --top 30 finace_tracker.database
+
+Each run imports the module in a fresh interpreter; the fastest of
+`--repeat` runs is reported along with the modules that cost the most.
+"""
+import argparse
+import subprocess
+import sys
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+DEFAULT_MODULE = "finace_tracker.main"
+
+
+def parse_importtime(output):
+    """Parses `-X importtime` output into [(module, self microseconds, cumulative microseconds)]."""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        imports.append((module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def measure_import(module=DEFAULT_MODULE, repeat=5):
+    """
+    Imports `module` in `repeat` fresh interpreters and returns the imports
+    of the fastest run, as parse_importtime() does.
+    """
+    fastest = None
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imports = parse_importtime(completed.stderr)
+        if fastest is None or total_seconds(imports, module) < total_seconds(fastest, module):
+            fastest = imports
+    return fastest
+
+
+def total_seconds(imports, module=DEFAULT_MODULE):
+    """Returns the cumulative import time of `module` in seconds."""
+    return next(cumulative for name, _, cumulative in imports if name == module) / 1_000_000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time with python -X importtime.")
+    parser.add_argument("module", nargs="?", default=DEFAULT_MODULE, help="module to import")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to try; the fastest counts")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    args = parser.parse_args(argv)
+
+    imports = measure_import(args.module, args.repeat)
+
+    table = Table(title=f"Slowest imports under {args.module}")
+    table.add_column("Module", style="green")
+    table.add_column("Self (ms)", justify="right", style="yellow")
+    table.add_column("Cumulative (ms)", justify="right")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda item: item[1], reverse=True)[:args.top]:
+        table.add_row(name, f"{self_us / 1000:,.1f}", f"{cumulative_us / 1000:,.1f}")
+    console.print(table)
+    console.print(f"[bold]import {args.module}: {total_seconds(imports, args.module) * 1000:,.1f} ms[/bold]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
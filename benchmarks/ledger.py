@@ -0,0 +1,66 @@
+"""
+Deterministic synthetic ledgers for benchmarks.
+
+The same arguments always produce the same transactions, so timings from
+different runs and machines compare like for like.
+"""
+import datetime
+import random
+from itertools import accumulate, islice
+from finace_tracker.database import append_transactions
+from finace_tracker.categories import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+
+# Merchants used to build descriptions; each also gets a reference number
+MERCHANTS = [
+    "Uber", "Swiggy", "Zomato", "Amazon", "Flipkart", "BigBasket", "Reliance Fresh", "DMart",
+    "Indian Oil", "HP Petrol", "Airtel", "Jio", "BESCOM", "Netflix", "Spotify", "PVR Cinemas",
+    "Apollo Pharmacy", "Practo", "Udemy", "Coursera", "IRCTC", "IndiGo", "MakeMyTrip", "Myntra",
+]
+
+# Rows written to the ledger per append while generating
+BATCH_SIZE = 100_000
+
+
+def _skewed_weights(count, skew):
+    """Returns Zipf-like weights: category n is picked in proportion to 1 / n**skew."""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def generate_transactions(rows, days=5 * 365, skew=1.0, income_share=0.05, seed=42, end=None):
+    """
+    Yields `rows` transactions spread evenly over the `days` days ending at
+    `end` (default today), oldest first.
+
+    Expense categories are drawn with a Zipf-like skew, so a few categories
+    hold most rows; `skew=0` draws them uniformly.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.date.today()
+    first_ordinal = end.toordinal() - days + 1
+    expense_weights = list(accumulate(_skewed_weights(len(EXPENSE_CATEGORIES), skew)))
+    income_weights = list(accumulate(_skewed_weights(len(INCOME_CATEGORIES), skew)))
+
+    for index in range(rows):
+        date = datetime.date.fromordinal(first_ordinal + index * days // rows)
+        if rng.random() < income_share:
+            transaction_type = "Income"
+            category = rng.choices(INCOME_CATEGORIES, cum_weights=income_weights)[0]
+            amount = rng.randint(500_000, 15_000_000)
+        else:
+            transaction_type = "Expense"
+            category = rng.choices(EXPENSE_CATEGORIES, cum_weights=expense_weights)[0]
+            amount = int(rng.lognormvariate(10, 1.2))
+        yield {
+            "date": date.isoformat(),
+            "type": transaction_type,
+            "category": category,
+            "amount": amount,
+            "description": f"{rng.choice(MERCHANTS)} #{rng.randint(1, 999)}",
+        }
+
+
+def write_ledger(rows, **options):
+    """Appends a synthetic ledger of `rows` transactions to the active storage backend."""
+    transactions = generate_transactions(rows, **options)
+    while batch := list(islice(transactions, BATCH_SIZE)):
+        append_transactions(batch)
@@ -0,0 +1,303 @@
+"""
+Times the main ledger paths on synthetic ledgers and compares them with a
+stored baseline.
+
+    uv run python benchmarks/run.py                      # 10k and 1M rows
+    uv run python benchmarks/run.py --rows 10000 --update
+
+Each path is timed `--repeat` times (the fastest run counts) and then run
+once more under tracemalloc for its peak memory. CLI start-up is measured
+with `-X importtime` (see importtime.py) and stored under "startup". The run fails when a path
+is slower or uses more memory than the baseline by more than `--threshold`,
+and when a path has no baseline yet; `--update` records one.
+The storage backend is chosen by FINANCE_TRACKER_BACKEND as usual.
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from rich.console import Console
+from rich.table import Table
+import finace_tracker.database
+from finace_tracker.database import (
+    append_transaction,
+    clear_cache,
+    get_backend,
+    load_budgets,
+    load_transaction_store,
+    load_transactions,
+    save_budgets,
+    save_transactions,
+    set_backend,
+    sidecar_path,
+)
+from finace_tracker.features.analytics import analytics, forecast
+from finace_tracker.features.analytics.engine import LedgerSummary
+from finace_tracker.features.analytics.forecast import forecast_alerts, recurring_detector
+from finace_tracker.features.analytics.parallel import period_report
+from finace_tracker.features.analytics.trends import monthly_trend
+from importtime import DEFAULT_MODULE, measure_import, total_seconds
+from ledger import write_ledger
+
+console = Console()
+
+# Sizes with a committed baseline; a size without one fails until it is recorded
+DEFAULT_ROWS = [10_000, 1_000_000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Differences below these are noise, whatever the threshold says
+MIN_SECONDS = 0.005
+MIN_MEMORY_MIB = 1.0
+
+BUDGETS = {"Food": 2_500_000, "Transport": 1_000_000, "Bills": 1_500_000, "Shopping": 2_000_000}
+
+SIDECARS = [".snap", ".monthly.json", ".search", ".ids", ".recurring"]
+
+
+def _fresh_process():
+    """Forgets everything cached in memory, as if the CLI had just started."""
+    clear_cache()
+    forecast._detector = None
+    gc.collect()
+
+
+def _cold_start():
+    """Also removes the on-disk snapshot and indexes, as on the first run after an upgrade."""
+    _fresh_process()
+    for extension in SIDECARS:
+        try:
+            os.remove(sidecar_path(extension))
+        except FileNotFoundError:
+            pass
+
+
+def _load_dashboard(summary=None):
+    """Loads the data shown by web/dashboard.py, refreshing `summary` if given."""
+    summary = (summary or LedgerSummary(recent_count=10)).refresh(load_transaction_store())
+    summary.report(load_budgets())
+    summary.recent()
+
+
+def _multi_year_report():
+    """Reports on every transaction up to today, aggregated per month."""
+    period_report(datetime.date(1970, 1, 1), datetime.date.today() + datetime.timedelta(days=1))
+
+
+def _add_transaction():
+    """Adds one transaction to a ledger the CLI already has loaded."""
+    transaction = {
+        "date": datetime.date.today().isoformat(),
+        "type": "Expense",
+        "category": "Food",
+        "amount": 25000,
+        "description": "Benchmark lunch",
+    }
+    append_transaction(transaction)
+    return transaction
+
+
+def _prepare_forecast():
+    """A fresh CLI process; an earlier run left the recurring transactions it found on disk."""
+    recurring_detector()
+    _fresh_process()
+
+
+def _add_and_forecast():
+    """Adds one transaction and checks it against the month-end forecast, as the menu does."""
+    forecast_alerts(_add_transaction())
+
+
+def benchmarks():
+    """Returns [(name, prepare, run)]; `prepare` sets up state and is not timed."""
+    ledger = []
+    summary = LedgerSummary(recent_count=10)
+
+    def prepare_save():
+        _fresh_process()
+        ledger[:] = [load_transactions()]
+
+    def prepare_dashboard_refresh():
+        # A running dashboard, after another process added a transaction
+        _load_dashboard(summary)
+        if get_backend().name == "csv":
+            with open(finace_tracker.database.TRANSACTIONS_FILE, "a") as file:
+                file.write(f"{datetime.date.today().isoformat()},Expense,Food,25000,Benchmark lunch\r\n")
+        else:
+            _add_transaction()
+
+    return [
+        ("load_transactions (cold)", _cold_start, load_transactions),
+        ("load_transactions", _fresh_process, load_transactions),
+        ("save_transactions", prepare_save, lambda: save_transactions(ledger[0])),
+        ("add transaction", load_transaction_store, _add_transaction),
+        ("add + forecast", _prepare_forecast, _add_and_forecast),
+        ("spending analysis", _fresh_process, analytics.spending_analysis),
+        ("income analysis", _fresh_process, analytics.income_analysis),
+        ("savings analysis", _fresh_process, analytics.savings_analysis),
+        ("financial health score", _fresh_process, analytics.financial_health_score),
+        ("multi-year report", _fresh_process, _multi_year_report),
+        ("5-year trend", _fresh_process, lambda: monthly_trend(60)),
+        ("dashboard load", _fresh_process, _load_dashboard),
+        ("dashboard refresh", prepare_dashboard_refresh, lambda: _load_dashboard(summary)),
+    ]
+
+
+def measure(prepare, run, repeat):
+    """Returns {"seconds": fastest wall time, "peak_mib": peak traced memory} for one path."""
+    times = []
+    for _ in range(repeat):
+        prepare()
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+
+    prepare()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_mib": peak / 2**20}
+
+
+def run_benchmarks(rows, repeat, ledger_options):
+    """Builds a synthetic ledger of `rows` transactions in a temp dir and measures every path."""
+    database = finace_tracker.database
+    saved_paths = database.TRANSACTIONS_FILE, database.BUDGETS_FILE, database.SQLITE_FILE
+    backend_name = get_backend().name
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.TRANSACTIONS_FILE = os.path.join(tmp_dir, "transactions.txt")
+        database.BUDGETS_FILE = os.path.join(tmp_dir, "budgets.txt")
+        database.SQLITE_FILE = os.path.join(tmp_dir, "finance.db")
+        set_backend(backend_name)
+        try:
+            console.print(f"[bold]Generating {rows:,} transactions...[/bold]")
+            write_ledger(rows, **ledger_options)
+            save_budgets(BUDGETS)
+            results = {}
+            for name, prepare, run in benchmarks():
+                results[name] = measure(prepare, run, repeat)
+                console.print(f"  {name}: {results[name]['seconds'] * 1000:,.1f} ms, {results[name]['peak_mib']:,.1f} MiB")
+            return results
+        finally:
+            backend = get_backend()
+            if hasattr(backend, "close"):
+                backend.close()
+            database.TRANSACTIONS_FILE, database.BUDGETS_FILE, database.SQLITE_FILE = saved_paths
+            set_backend(None)
+            clear_cache()
+
+
+def compare(results, baseline, threshold):
+    """Returns [(rows, name, metric, baseline, current)] for every regression beyond `threshold`."""
+    regressions = []
+    for rows, paths in results.items():
+        for name, metrics in paths.items():
+            expected = baseline.get(rows, {}).get(name)
+            if expected is None:
+                continue
+            for metric, floor in (("seconds", MIN_SECONDS), ("peak_mib", MIN_MEMORY_MIB)):
+                if metric not in metrics or metric not in expected:
+                    continue
+                current, before = metrics[metric], expected[metric]
+                if current > before * (1 + threshold) and current - before > floor:
+                    regressions.append((rows, name, metric, before, current))
+    return regressions
+
+
+def unbaselined(results, baseline):
+    """Returns [(rows, name)] for every measured path the baseline has no entry for."""
+    return [
+        (rows, name)
+        for rows, paths in results.items()
+        for name in paths
+        if name not in baseline.get(rows, {})
+    ]
+
+
+def _label(rows):
+    """Labels a results section: a ledger size or "startup"."""
+    return f"{int(rows):,} rows" if rows.isdigit() else rows
+
+
+def _print_results(results, baseline):
+    """Prints a table of every measurement next to its baseline."""
+    table = Table(title="Benchmarks")
+    table.add_column("Ledger", justify="right", style="cyan")
+    table.add_column("Path", style="green")
+    table.add_column("Time (ms)", justify="right", style="yellow")
+    table.add_column("Baseline (ms)", justify="right")
+    table.add_column("Peak (MiB)", justify="right", style="yellow")
+    table.add_column("Baseline (MiB)", justify="right")
+    for rows, paths in results.items():
+        for name, metrics in paths.items():
+            expected = baseline.get(rows, {}).get(name, {})
+            table.add_row(
+                _label(rows),
+                name,
+                f"{metrics['seconds'] * 1000:,.1f}",
+                f"{expected['seconds'] * 1000:,.1f}" if "seconds" in expected else "-",
+                f"{metrics['peak_mib']:,.1f}" if "peak_mib" in metrics else "-",
+                f"{expected['peak_mib']:,.1f}" if "peak_mib" in expected else "-",
+            )
+    console.print(table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ledger's main paths on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="ledger sizes to benchmark")
+    parser.add_argument("--days", type=int, default=5 * 365, help="days spanned by the synthetic ledger")
+    parser.add_argument("--skew", type=float, default=1.0, help="category skew; 0 spreads rows evenly")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the synthetic ledger")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per path; the fastest counts")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, e.g. 0.25 for 25%%")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--update", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--skip-startup", action="store_true", help="do not measure CLI import time")
+    args = parser.parse_args(argv)
+
+    # The analytics reports print; keep their output out of the benchmark log.
+    analytics.console = Console(file=io.StringIO())
+
+    ledger_options = {"days": args.days, "skew": args.skew, "seed": args.seed}
+    results = {str(rows): run_benchmarks(rows, args.repeat, ledger_options) for rows in args.rows}
+    if not args.skip_startup:
+        imports = measure_import(DEFAULT_MODULE, max(args.repeat, 5))
+        results["startup"] = {f"import {DEFAULT_MODULE}": {"seconds": total_seconds(imports)}}
+
+    try:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        baseline = {}
+    _print_results(results, baseline)
+
+    if args.update:
+        baseline.update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        console.print(f"[bold green]Baseline updated: {args.baseline}[/bold green]")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for rows, name, metric, before, current in regressions:
+        console.print(f"[bold red]Regression at {_label(rows)}: {name} {metric} {before:,.3f} -> {current:,.3f}[/bold red]")
+    missing = unbaselined(results, baseline)
+    for rows, name in missing:
+        console.print(f"[bold red]No baseline at {_label(rows)}: {name} (run with --update)[/bold red]")
+    if regressions or missing:
+        return 1
+    console.print("[bold green]No regressions.[/bold green]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+# Transaction categories from gemini.md
+EXPENSE_CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Other"]
+INCOME_CATEGORIES = ["Salary", "Freelance", "Business", "Investment", "Gift", "Other"]
@@ -0,0 +1,334 @@
+"""
+Non-interactive subcommands for scripts and cron jobs.
+
+Each command prints its result as JSON on stdout; `export` streams the
+exported rows instead. Commands are sent to a running daemon (see
+daemon.py) when one is listening, and run in this process otherwise.
+Feature modules are imported inside the commands, keeping start-up fast.
+"""
+import datetime
+import json
+import os
+import sys
+from decimal import Decimal, InvalidOperation
+from finace_tracker.categories import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+
+REPORTS = ["spending", "income", "savings"]
+
+# Mirrors database.BACKENDS, which is not imported at start-up
+BACKEND_NAMES = ["csv", "sqlite", "partitioned"]
+
+
+def add_subcommands(parser):
+    """Adds the batch subcommands to the main argument parser."""
+    parser.add_argument("--ledger", metavar="PROFILE[/ACCOUNT]", help="profile and account to use (default: FINANCE_TRACKER_PROFILE or default/main)")
+    parser.add_argument("--socket", help="daemon socket (default: FINANCE_TRACKER_SOCKET or finance.sock next to the ledger)")
+    parser.add_argument("--local", action="store_true", help="run the command in this process even if a daemon is running")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    add = subparsers.add_parser("add", help="add a transaction")
+    add.add_argument("--type", required=True, choices=["Expense", "Income"])
+    add.add_argument("--category", required=True)
+    add.add_argument("--amount", required=True, help="amount in the transaction's currency, e.g. 12.50")
+    add.add_argument("--currency", help="three-letter currency code (default: the base currency)")
+    add.add_argument("--description", default="")
+    add.add_argument("--date", help="YYYY-MM-DD (default: today)")
+
+    report = subparsers.add_parser("report", help="print a monthly or yearly report")
+    report.add_argument("report", choices=REPORTS)
+    period = report.add_mutually_exclusive_group()
+    period.add_argument("--month", help="YYYY-MM (default: this month)")
+    period.add_argument("--year", type=int, help="report on a whole year instead of a month")
+    report.add_argument("--workers", type=int, help="processes for yearly reports (default: FINANCE_TRACKER_WORKERS or the CPU count)")
+
+    trends = subparsers.add_parser("trends", help="print monthly or yearly income, spending and savings-rate history")
+    window = trends.add_mutually_exclusive_group()
+    window.add_argument("--months", type=int, help="number of months, ending with this one (default: 12)")
+    window.add_argument("--years", type=int, help="number of calendar years instead, ending with this one")
+
+    forecast = subparsers.add_parser("forecast", help="print recurring transactions and a month's projected cash flow")
+    forecast.add_argument("--month", help="YYYY-MM (default: this month)")
+
+    consolidated = subparsers.add_parser("consolidated", help="print a report summed over profiles and accounts")
+    period = consolidated.add_mutually_exclusive_group()
+    period.add_argument("--month", help="YYYY-MM (default: this month)")
+    period.add_argument("--year", type=int, help="report on a whole year instead of a month")
+    consolidated.add_argument("--include", action="append", metavar="PROFILE[/ACCOUNT]", help="profile or account to include; repeatable (default: all)")
+    consolidated.add_argument("--workers", type=int, help="processes for many shards (default: FINANCE_TRACKER_WORKERS or the CPU count)")
+
+    health = subparsers.add_parser("health-score", help="print the financial health score for a month")
+    health.add_argument("--month", help="YYYY-MM (default: this month)")
+
+    export = subparsers.add_parser("export", help="export transactions as CSV or NDJSON")
+    export.add_argument("--format", dest="export_format", default="csv", choices=["csv", "ndjson"])
+    export.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    export.add_argument("--to", dest="end", help="last date, inclusive, YYYY-MM-DD")
+    export.add_argument("--category", dest="categories", action="append", help="category to export; repeatable")
+    export.add_argument("--type", dest="transaction_type", choices=["Expense", "Income"])
+    export.add_argument("--gzip", dest="compress", action="store_true")
+    export.add_argument("--output", default="-", help="output file (default: stdout)")
+
+    rates = subparsers.add_parser("import-rates", help="add FX rates from a CSV file of currency,date,rate rows")
+    rates.add_argument("path")
+
+    subparsers.add_parser("compact", help="fold amends and deletes into the ledger and drop torn rows")
+
+    migrate = subparsers.add_parser("migrate", help="copy the ledger and budgets to another storage backend")
+    migrate.add_argument("--from", dest="source", default="csv", choices=BACKEND_NAMES)
+    migrate.add_argument("--to", dest="target", required=True, choices=BACKEND_NAMES)
+
+    subparsers.add_parser("daemon", help="serve commands from memory over a Unix socket")
+
+
+def _parse_date(text, name):
+    """Parses an ISO date option."""
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"invalid {name} {text!r}; use YYYY-MM-DD")
+
+
+def _parse_month(text):
+    """Parses a YYYY-MM option, returning (year, month); None means this month."""
+    if text is None:
+        today = datetime.date.today()
+        return today.year, today.month
+    try:
+        month = datetime.datetime.strptime(text, "%Y-%m")
+    except ValueError:
+        raise ValueError(f"invalid month {text!r}; use YYYY-MM")
+    return month.year, month.month
+
+
+def command_add(options, stdout):
+    """Validates and appends one transaction, returning it with the budget alerts it raised."""
+    from finace_tracker.currency import normalize_currency
+    from finace_tracker.database import MAX_AMOUNT, append_transaction, load_fx_rates
+    from finace_tracker.features.analytics.forecast import forecast_alerts
+    from finace_tracker.features.budgets.budgets import budget_alerts
+
+    transaction_type = options["type"]
+    categories = EXPENSE_CATEGORIES if transaction_type == "Expense" else INCOME_CATEGORIES
+    if options["category"] not in categories:
+        raise ValueError(f"unknown {transaction_type} category {options['category']!r}; choose from {', '.join(categories)}")
+    try:
+        amount = Decimal(options["amount"])
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"invalid amount {options['amount']!r}")
+    if not amount.is_finite():
+        raise ValueError(f"invalid amount {options['amount']!r}")
+    # Checked before scaling, which overflows the decimal context for huge exponents
+    if abs(amount) > Decimal(MAX_AMOUNT) / 100:
+        raise ValueError(f"the amount {options['amount']!r} is too large")
+    amount = int(amount * 100)
+    if amount <= 0:
+        raise ValueError("the amount must be positive")
+    date = _parse_date(options["date"], "date") if options.get("date") else datetime.date.today()
+    currency = normalize_currency(options.get("currency"))
+    load_fx_rates().rate_on(currency, date)  # Raises ValueError for a currency without rates
+
+    transaction = {
+        "date": date.isoformat(),
+        "type": transaction_type,
+        "category": options["category"],
+        "amount": amount,
+        "description": options.get("description") or "",
+    }
+    if currency:
+        transaction["currency"] = currency
+    append_transaction(transaction)
+    return {"added": transaction, "alerts": budget_alerts(transaction), "forecast_alerts": forecast_alerts(transaction)}
+
+
+def command_report(options, stdout):
+    """Returns the spending, income or savings figures of a month or year, in paisa."""
+    from finace_tracker.features.analytics.engine import monthly_report
+    from finace_tracker.features.analytics.parallel import period_report
+
+    if options.get("year"):
+        year = options["year"]
+        report = period_report(datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1), workers=options.get("workers"))
+        result = {"year": year}
+    else:
+        year, month = _parse_month(options.get("month"))
+        report = monthly_report(year, month)
+        result = {"month": f"{year:04d}-{month:02d}"}
+    if options["report"] == "spending":
+        keys = ["expenses_by_category", "total_expenses", "average_daily_expense", "budgets"]
+    elif options["report"] == "income":
+        keys = ["income_by_source", "total_income"]
+    else:
+        keys = ["total_income", "total_expenses", "savings", "savings_rate"]
+    result.update((key, report[key]) for key in keys)
+    return result
+
+
+def command_trends(options, stdout):
+    """Returns per-period totals, in paisa, with a rolling average of expenses."""
+    from finace_tracker.features.analytics.trends import monthly_trend, rolling_average, yearly_trend
+
+    if options.get("years"):
+        periods = yearly_trend(options["years"])
+    else:
+        periods = monthly_trend(options.get("months") or 12)
+    if not periods:
+        raise ValueError("the number of periods must be positive")
+    for period, average in zip(periods, rolling_average([period["expenses"] for period in periods])):
+        period["average_expenses"] = average
+    return {"periods": periods}
+
+
+def command_forecast(options, stdout):
+    """Returns a month's recorded and expected cash flow, in paisa, and the recurring transactions behind it."""
+    from finace_tracker.features.analytics.forecast import forecast_month, recurring_transactions
+
+    year, month = _parse_month(options.get("month"))
+    recurring = recurring_transactions()
+    result = forecast_month(year, month, recurring=recurring)
+    result["recurring"] = [
+        dict(pattern, last_date=pattern["last_date"].isoformat(), next_date=pattern["next_date"].isoformat())
+        for pattern in recurring
+    ]
+    return result
+
+
+def command_consolidated(options, stdout):
+    """Returns a month's or year's figures, in paisa, summed over profiles and accounts."""
+    from finace_tracker import profiles
+    from finace_tracker.features.analytics.consolidated import consolidated_report
+
+    if options.get("year"):
+        year = options["year"]
+        start, end = datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+        result = {"year": year}
+    else:
+        year, month = _parse_month(options.get("month"))
+        start = datetime.date(year, month, 1)
+        end = datetime.date(year + month // 12, month % 12 + 1, 1)
+        result = {"month": f"{year:04d}-{month:02d}"}
+    shards = profiles.select_shards(options["include"]) if options.get("include") else None
+    result.update(consolidated_report(start, end, shards, options.get("workers")))
+    return result
+
+
+def command_health_score(options, stdout):
+    """Returns the financial health score of a month."""
+    from finace_tracker.features.analytics.engine import health_score, monthly_report
+
+    year, month = _parse_month(options.get("month"))
+    return {"month": f"{year:04d}-{month:02d}", "score": health_score(monthly_report(year, month))}
+
+
+def export_range(options):
+    """Returns the [start, end) dates of an export, raising ValueError for invalid dates."""
+    start = _parse_date(options["start"], "--from date") if options.get("start") else None
+    end = _parse_date(options["end"], "--to date") + datetime.timedelta(days=1) if options.get("end") else None
+    return start, end
+
+
+def command_export(options, stdout):
+    """Exports transactions to a file, or streams them to `stdout` (returning None)."""
+    from finace_tracker.features.exports.exports import export_transactions
+
+    start, end = export_range(options)
+    count = export_transactions(
+        options["output"],
+        options["export_format"],
+        start,
+        end,
+        options.get("categories"),
+        options.get("transaction_type"),
+        options.get("compress", False),
+        stdout=stdout,
+    )
+    if options["output"] == "-":
+        return None
+    return {"exported": count, "path": options["output"]}
+
+
+def command_import_rates(options, stdout):
+    """Adds FX rates from a CSV file, returning how many rows were imported and skipped."""
+    from finace_tracker.features.imports.imports import import_fx_rates
+
+    return import_fx_rates(options["path"])
+
+
+def command_compact(options, stdout):
+    """Compacts the stored ledger, returning the backend and its number of transactions."""
+    from finace_tracker.database import compact_transactions, get_backend, load_transaction_store
+
+    compact_transactions()
+    return {"compacted": get_backend().name, "transactions": len(load_transaction_store())}
+
+
+def command_migrate(options, stdout):
+    """Copies the ledger from one storage backend to another."""
+    from finace_tracker.database import migrate_ledger
+
+    if options["source"] == options["target"]:
+        raise ValueError("the source and target backends are the same")
+    count = migrate_ledger(options["source"], options["target"])
+    return {"migrated": count, "from": options["source"], "to": options["target"]}
+
+
+COMMANDS = {
+    "add": command_add,
+    "report": command_report,
+    "health-score": command_health_score,
+    "trends": command_trends,
+    "forecast": command_forecast,
+    "consolidated": command_consolidated,
+    "export": command_export,
+    "import-rates": command_import_rates,
+    "compact": command_compact,
+    "migrate": command_migrate,
+}
+
+# Parsed arguments that are not options of a command
+_GLOBAL_ARGUMENTS = {"command", "diagnostics", "profile", "ledger", "socket", "local"}
+
+
+def execute(command, options, stdout=None):
+    """
+    Runs a batch command with `options` (a JSON-compatible dict) and returns
+    its JSON-compatible result, or None if it wrote its output to `stdout`
+    (a binary stream) itself. Invalid options raise ValueError.
+    """
+    if command not in COMMANDS:
+        raise ValueError(f"unknown command {command!r}")
+    return COMMANDS[command](options, stdout)
+
+
+def _run_command(command, options, socket_path):
+    """Sends a command to the daemon on `socket_path` if one is listening, else runs it here."""
+    from finace_tracker import daemon
+
+    if socket_path and os.path.exists(socket_path):
+        try:
+            return daemon.send(socket_path, command, options, sys.stdout.buffer)
+        except (ConnectionRefusedError, FileNotFoundError):
+            pass  # A stale socket left by a stopped daemon
+    return execute(command, options)
+
+
+def run(args):
+    """Runs the batch command parsed into `args`, returning the process exit status."""
+    from finace_tracker import daemon
+
+    socket_path = args.socket or daemon.default_socket_path()
+    if args.command == "daemon":
+        return daemon.serve(socket_path)
+
+    options = {name: value for name, value in vars(args).items() if name not in _GLOBAL_ARGUMENTS}
+    for name in ("output", "path"):
+        if options.get(name) not in (None, "-"):
+            # The daemon may run in another directory
+            options[name] = os.path.abspath(options[name])
+    try:
+        result = _run_command(args.command, options, None if args.local else socket_path)
+    except (ValueError, OSError) as e:
+        print(json.dumps({"error": str(e)}), file=sys.stderr)
+        return 1
+    if result is not None:
+        print(json.dumps(result))
+    return 0
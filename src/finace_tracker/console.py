@@ -0,0 +1,4 @@
+from rich.console import Console
+
+# The Rich console shared by the CLI and every feature module
+console = Console()
@@ -0,0 +1,142 @@
+"""
+Currencies and the local table of foreign-exchange rates.
+
+Amounts are stored in hundredths of their transaction's currency, and a
+transaction without a currency is in BASE_CURRENCY, so ledgers written
+before currencies existed need no migration. Reports are in the base
+currency: a month's totals in another currency are converted at that
+month's rate, the latest rate on or before its last day (so the current
+month uses the latest rate known).
+
+Rates are imported from a CSV file of currency,date,rate rows, where the
+rate is the value of one unit of the currency in the base currency; no
+network is needed. Each currency's rates are kept sorted by date, so a
+lookup is a binary search. Conversions of a (currency, month)'s totals are
+memoized with LRU eviction, keyed by the rate table they used, so a
+re-import never serves stale conversions.
+"""
+import datetime
+import re
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import repeat
+
+BASE_CURRENCY = "INR"
+
+# Symbols shown before amounts; other currencies are shown by code
+SYMBOLS = {"INR": "₹", "USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥"}
+
+# Converted (currency, month) totals kept in memory
+CONVERSION_CACHE_SIZE = 4096
+
+_CODE = re.compile(r"[A-Z]{3}")
+
+
+def normalize_currency(code):
+    """
+    Returns the code to store for a currency: "" for the base currency, else
+    its upper-case ISO 4217 code. Raises ValueError for anything else.
+    """
+    code = (code or "").strip().upper()
+    if code in ("", BASE_CURRENCY):
+        return ""
+    if not _CODE.fullmatch(code):
+        raise ValueError(f"invalid currency {code!r}; use a three-letter code such as USD")
+    return code
+
+
+def symbol(code=BASE_CURRENCY):
+    """Returns the symbol (or code) to show before amounts in a currency."""
+    code = code or BASE_CURRENCY
+    return SYMBOLS.get(code, f"{code} ")
+
+
+def format_amount(amount, code=""):
+    """Formats hundredths of a currency, e.g. "$12.50"; base-currency amounts keep the plain format."""
+    if not code or code == BASE_CURRENCY:
+        return f"{amount / 100:.2f}"
+    return f"{symbol(code)}{amount / 100:.2f}"
+
+
+def month_end(year, month):
+    """Returns the last day of a month."""
+    following = datetime.date(year + month // 12, month % 12 + 1, 1)
+    return following - datetime.timedelta(days=1)
+
+
+class RateTable:
+    """
+    FX rates by currency, each held as date ordinals in an array('i') sorted
+    for binary search, with the rates in a parallel array('d').
+    """
+
+    def __init__(self, rates=()):
+        self.dates = {}
+        self.rates = {}
+        by_currency = {}
+        for code, date, rate in rates:
+            by_currency.setdefault(code, {})[date] = rate  # A later row for the same day wins
+        for code, series in by_currency.items():
+            dates = sorted(series)
+            self.dates[code] = array("i", dates)
+            self.rates[code] = array("d", (series[date] for date in dates))
+
+    def __len__(self):
+        return sum(map(len, self.dates.values()))
+
+    def currencies(self):
+        """Returns the currencies with rates, in code order."""
+        return sorted(self.dates)
+
+    def rows(self):
+        """Yields (currency, date ordinal, rate) for every rate, by currency and date."""
+        for code in self.currencies():
+            yield from zip(repeat(code), self.dates[code], self.rates[code])
+
+    def rate_on(self, code, date):
+        """
+        Returns the base-currency value of one unit of `code` on `date`: the
+        latest rate on or before it, or the earliest rate for older dates.
+        Raises ValueError if the table has no rate for the currency.
+        """
+        if not code or code == BASE_CURRENCY:
+            return 1.0
+        dates = self.dates.get(code)
+        if not dates:
+            raise ValueError(f"no FX rate for {code}; import rates for it first")
+        position = bisect_right(dates, date.toordinal()) - 1
+        return self.rates[code][max(position, 0)]
+
+    def month_rate(self, code, year, month):
+        """Returns the rate a month's amounts in `code` are converted at."""
+        return self.rate_on(code, month_end(year, month))
+
+
+@lru_cache(maxsize=CONVERSION_CACHE_SIZE)
+def converted_totals(table, code, year, month, totals):
+    """
+    Converts a month's totals in `code`, a tuple of (key, amount) pairs, to the
+    base currency, returning the same pairs. Memoized per table, currency,
+    month and totals, evicting the least recently used conversions.
+    """
+    rate = table.month_rate(code, year, month)
+    return tuple((key, round(amount * rate)) for key, amount in totals)
+
+
+def to_base(amount, code, date, table=None):
+    """Converts one amount dated `date` to the base currency at its month's rate."""
+    if not code or code == BASE_CURRENCY:
+        return amount
+    if table is None:
+        from finace_tracker.database import load_fx_rates
+
+        table = load_fx_rates()
+    return round(amount * table.month_rate(code, date.year, date.month))
+
+
+def base_amount(transaction, table=None):
+    """Returns a transaction dict's amount in the base currency."""
+    return to_base(
+        int(transaction["amount"]), transaction.get("currency"), datetime.date.fromisoformat(transaction["date"]), table
+    )
@@ -0,0 +1,130 @@
+"""
+A long-lived process that serves batch commands over a Unix socket.
+
+The daemon keeps the ledger, monthly index and budgets in the process-wide
+cache, so scripted invocations skip re-reading database/transactions.txt.
+Every request still checks the files' keys, so changes made by the
+interactive CLI or another process are picked up on the next request.
+
+Protocol: the client sends one JSON line {"command": ..., "options": {...}}.
+The daemon answers with one JSON line, {"ok": true, "result": ...} or
+{"ok": false, "error": ...}; for an export to stdout the line is
+{"ok": true, "stream": true} and the exported bytes follow until the
+connection closes.
+
+A daemon serves the ledger shard it was started for (see profiles.py); its
+socket sits in the shard's directory, so each shard can have its own.
+"""
+import json
+import os
+import shutil
+import socket
+import socketserver
+from finace_tracker import cli, database
+from finace_tracker.console import console
+from finace_tracker.database import load_budgets, load_monthly_index, load_transaction_store
+
+SOCKET_NAME = "finance.sock"
+
+
+def default_socket_path():
+    """Returns the socket path from FINANCE_TRACKER_SOCKET, or the one next to the active ledger."""
+    return os.environ.get("FINANCE_TRACKER_SOCKET") or os.path.join(os.path.dirname(database.TRANSACTIONS_FILE) or ".", SOCKET_NAME)
+
+
+def _connect(path):
+    """Connects to the daemon's socket."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix sockets are not supported on this platform")
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError:
+        connection.close()
+        raise
+    return connection
+
+
+def is_running(path):
+    """Returns True if a daemon is accepting connections on `path`."""
+    if not os.path.exists(path):
+        return False
+    try:
+        _connect(path).close()
+    except OSError:
+        return False
+    return True
+
+
+def send(path, command, options, stdout):
+    """
+    Runs a command on the daemon and returns its result; streamed output is
+    copied to the binary stream `stdout`. Errors reported by the daemon
+    raise ValueError.
+    """
+    with _connect(path) as connection, connection.makefile("rwb") as stream:
+        stream.write(json.dumps({"command": command, "options": options}).encode("utf-8") + b"\n")
+        stream.flush()
+        response = json.loads(stream.readline() or b'{"ok": false, "error": "no response from daemon"}')
+        if not response["ok"]:
+            raise ValueError(response["error"])
+        if response.get("stream"):
+            shutil.copyfileobj(stream, stdout)
+            stdout.flush()
+            return None
+        return response["result"]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Runs one command per connection."""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return  # A connection check from is_running()
+        try:
+            request = json.loads(line)
+            command, options = request["command"], request["options"]
+            if command == "export" and options.get("output") == "-":
+                cli.export_range(options)  # Report bad dates before streaming starts
+                self._reply({"ok": True, "stream": True})
+            result = cli.execute(command, options, self.wfile)
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            self._reply({"ok": False, "error": str(e)})
+            return
+        if result is not None:
+            self._reply({"ok": True, "result": result})
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.UnixStreamServer):
+    """Handles one request at a time, since the storage layer is not thread-safe."""
+
+    def handle_error(self, request, client_address):
+        console.print("[bold red]Error serving a daemon request.[/bold red]")
+
+
+def serve(path):
+    """Warms the caches and serves commands on `path` until interrupted."""
+    if is_running(path):
+        console.print(f"[bold red]A daemon is already listening on {path}.[/bold red]")
+        return 1
+    if os.path.exists(path):
+        os.remove(path)  # Left behind by a daemon that did not shut down cleanly
+
+    load_transaction_store()
+    load_monthly_index()
+    load_budgets()
+
+    with _Server(path, _Handler) as server:
+        os.chmod(path, 0o600)
+        console.print(f"[bold green]Serving on {path}. Press Ctrl+C to stop.[/bold green]")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+    return 0
@@ -1,46 +1,1271 @@
 import csv
-from rich.console import Console
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, compress, islice, repeat
+import tempfile
+from contextlib import contextmanager
+from finace_tracker import instrumentation
+from finace_tracker.currency import RateTable, converted_totals, normalize_currency
+from finace_tracker.instrumentation import argument_rows, timed
+from finace_tracker.console import console
 
-console = Console()
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where writers are not locked
+    fcntl = None
 
 TRANSACTIONS_FILE = "database/transactions.txt"
 BUDGETS_FILE = "database/budgets.txt"
+SQLITE_FILE = "database/finance.db"
 
+# FX rates are shared by every profile (see currency.py)
+FX_RATES_FILE = "database/fx_rates.txt"
+
+TRANSACTION_FIELDS = ["date", "type", "category", "amount", "description"]
+
+# Fields a transaction may leave out. A transaction without a currency is in
+# the base currency, and its dict has no "currency" key.
+OPTIONAL_FIELDS = ["currency"]
+
+# Columns of the transaction log. Every record carries the stable ID of its
+# transaction; "op" is empty for a new transaction, "amend" for a record that
+# replaces an earlier one and "delete" for a tombstone.
+LOG_FIELDS = TRANSACTION_FIELDS + OPTIONAL_FIELDS + ["id", "op"]
+
+# Largest amount, in hundredths of a currency, that fits the int64 amount column
+MAX_AMOUNT = 2**63 - 1
+
+# The transaction log is compacted on the next write once the records
+# compaction would drop (replaced by amend records, tombstones, deleted rows
+# and torn rows) number at least COMPACTION_MIN_RECORDS and COMPACTION_RATIO
+# of the transaction IDs handed out. The count is kept in the ID index.
+COMPACTION_MIN_RECORDS = 100
+COMPACTION_RATIO = 0.25
+
+# Process-wide cache of loaded files: (kind, path) -> (file key, value)
+_cache = {}
+
+# Appends waiting for the next group commit, by write function: [_PendingAppend]
+_pending_appends = {}
+_pending_lock = threading.Lock()
+_commit_lock = threading.Lock()
+# Held while the cached CSV store is looked up, extended in place and cached
+_store_lock = threading.Lock()
+
+# The process umask, read once at import (os.umask can only read it by setting it)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+# Binary snapshot layout: a fixed header, one fixed-width block per column and
+# a string table with the type, category and description pools.
+SNAPSHOT_MAGIC = b"FTSNAP4" + (b"<" if sys.byteorder == "little" else b">")
+# magic, source size, mtime_ns, inode, rows, dates sorted, next ID, revision, string table offset
+_SNAPSHOT_HEADER = struct.Struct("<8sQqQQQQQQ")
+_SNAPSHOT_COLUMNS = [
+    ("amounts", "q"), ("ids", "q"), ("dates", "i"), ("descriptions", "I"), ("categories", "H"), ("types", "B"),
+    ("currencies", "B"),
+]
+_SNAPSHOT_POOLS = ["type", "category", "description", "currency"]
+
+# ID index layout: a header naming the log generation it describes and
+# counting the log's obsolete records, then one array('q') entry per ID with
+# the offset of that transaction's latest record in the log, or -1 once it is
+# deleted.
+ID_INDEX_MAGIC = b"FTIDX2" + (b"<" if sys.byteorder == "little" else b">") + b"\0"
+_ID_INDEX_HEADER = struct.Struct("<8sqQQQ")  # magic, log mtime_ns, log size, log inode, obsolete records
+
+
+def _file_key(path):
+    """Returns the (mtime, size, inode) key of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _cache_get(kind, path, key):
+    """Returns the cached value for a file if it has not changed since it was cached."""
+    entry = _cache.get((kind, path))
+    if entry is not None and entry[0] == key:
+        instrumentation.count("cache.hits")
+        return entry[1]
+    instrumentation.count("cache.misses")
+    return None
+
+
+def _cache_put(kind, path, key, value):
+    """Caches a value loaded from (or just written to) a file."""
+    _cache[(kind, path)] = (key, value)
+
+
+def clear_cache():
+    """Drops every cached ledger, forcing the next load to read from disk."""
+    _cache.clear()
+
+
+def sidecar_path(extension):
+    """Returns the path of a file stored next to the transactions file."""
+    return os.path.splitext(TRANSACTIONS_FILE)[0] + extension
+
+
+def _file_mode(path):
+    """Returns the permissions to give a new version of `path`: its current ones, else those open() would use."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def _atomic_open(path, mode="w"):
+    """
+    Opens a temporary file next to `path` and moves it into place on success,
+    keeping the permissions of the file it replaces.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, _file_mode(path))  # mkstemp creates files readable by their owner only
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"newline": ""})) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def _locked(path):
+    """
+    Holds an exclusive advisory lock for writing `path`, taken on path + ".lock".
+
+    Only writers lock. Readers never wait: files are replaced atomically and
+    otherwise only appended to, so a reader sees a consistent generation of
+    the file, identified by its (inode, size), and ignores anything past it.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def write_sidecar(extension, data):
+    """
+    Replaces a sidecar file of the ledger with `data` atomically, holding the
+    ledger's write lock so processes saving it at once do not interleave.
+    """
+    with _locked(TRANSACTIONS_FILE), _atomic_open(sidecar_path(extension), "wb") as file:
+        file.write(data)
+
+
+def append_sidecar(extension, data):
+    """Appends `data` to a sidecar file of the ledger, holding the ledger's write lock."""
+    with _locked(TRANSACTIONS_FILE), open(sidecar_path(extension), "ab") as file:
+        file.write(data)
+
+
+class _PendingAppend:
+    """A batch waiting for a group commit, and the outcome of the commit that wrote it."""
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.done = False
+        self.error = None
+
+
+def _group_commit(transactions, write):
+    """
+    Queues a batch for `write(transactions)` and returns once it is written.
+
+    Threads that append while another thread holds the commit lock are
+    written together in one batch (a group commit), so concurrent writers
+    share a file lock and an fsync instead of taking turns. If the write
+    raises, every thread whose batch it held raises the same exception.
+    """
+    entry = _PendingAppend(transactions)
+    with _pending_lock:
+        _pending_appends.setdefault(write, []).append(entry)
+    with _commit_lock:
+        if not entry.done:
+            with _pending_lock:
+                batch = _pending_appends.pop(write)
+            try:
+                write([transaction for pending in batch for transaction in pending.transactions])
+            except BaseException as e:
+                for pending in batch:
+                    pending.error = e
+            for pending in batch:
+                pending.done = True
+    if entry.error is not None:
+        raise entry.error
+
+
+def _log_state(path):
+    """Returns the header of the log and whether its last row was cut short."""
+    try:
+        with open(path, "rb") as file:
+            header = file.readline()
+            if not header:
+                return None, False
+            file.seek(-1, os.SEEK_END)
+            torn = file.read(1) != b"\n"
+    except FileNotFoundError:
+        return None, False
+    fieldnames = next(csv.reader([header.decode("utf-8")]), None)
+    return fieldnames, torn
+
+
+def check_amount(amount):
+    """Returns an amount as an int, raising ValueError if it does not fit the amount column."""
+    amount = int(amount)
+    if abs(amount) > MAX_AMOUNT:
+        raise ValueError(f"amount {amount} is out of range")
+    return amount
+
+
+class _StringPool:
+    """Interns strings as small integer codes."""
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self.codes = {value: code for code, value in enumerate(self.strings)}
+
+    def intern(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.codes[value] = code
+            self.strings.append(value)
+        return code
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class TransactionStore:
+    """
+    Compact, column-oriented in-memory store of transactions.
+
+    Dates are kept as ordinals, amounts as hundredths of the row's currency
+    in an array('q'), and the type, category, description and currency
+    columns as codes into string pools, where the base currency is "". Each
+    row also carries the stable ID of its transaction.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.dates = array("i")
+        self.types = array("B")
+        self.categories = array("H")
+        self.amounts = array("q")
+        self.descriptions = array("I")
+        self.currencies = array("B")
+        # True while rows are in date order, which lets date ranges be found by binary search
+        self.dates_sorted = True
+        # Row indices per (column, code), built on first use and extended on append
+        self._postings = {}
+        # Row index per ID, built on first use
+        self._id_rows = None
+        self.next_id = 1
+        # Counts amends and deletes, which change rows in place rather than appending
+        self.revision = 0
+        self.pools = {
+            "type": _StringPool(),
+            "category": _StringPool(),
+            "description": _StringPool(),
+            "currency": _StringPool(),
+        }
+
+    @classmethod
+    def from_transactions(cls, transactions, ids=None):
+        """Builds a store from an iterable of transaction dicts, numbered 1, 2, ... unless `ids` are given."""
+        store = cls()
+        for transaction, transaction_id in zip(transactions, repeat(None) if ids is None else ids):
+            store.append(transaction, transaction_id)
+        return store
+
+    def _convert(self, transaction):
+        """Returns the column values of a transaction dict, raising ValueError if it is malformed."""
+        return (
+            datetime.date.fromisoformat(transaction["date"]).toordinal(),
+            self.pools["type"].intern(transaction["type"]),
+            self.pools["category"].intern(transaction["category"]),
+            check_amount(transaction["amount"]),
+            self.pools["description"].intern(transaction["description"]),
+            self.pools["currency"].intern(transaction.get("currency") or ""),
+        )
+
+    def append(self, transaction, transaction_id=None):
+        """Appends a transaction dict under `transaction_id` (default: the next ID)."""
+        if not isinstance(self.amounts, array):
+            self._thaw()
+        # Convert everything first so a bad row never leaves the columns misaligned.
+        date, type_code, category_code, amount, description_code, currency_code = self._convert(transaction)
+        transaction_id = self.next_id if transaction_id is None else int(transaction_id)
+        if self._id_rows is not None and transaction_id in self._id_rows:
+            raise ValueError(f"duplicate transaction ID {transaction_id}")
+
+        if self.dates and date < self.dates[-1]:
+            self.dates_sorted = False
+        self.ids.append(transaction_id)
+        self.dates.append(date)
+        self.types.append(type_code)
+        self.categories.append(category_code)
+        self.amounts.append(amount)
+        self.descriptions.append(description_code)
+        self.currencies.append(currency_code)
+        self.next_id = max(self.next_id, transaction_id + 1)
+
+        index = len(self.amounts) - 1
+        if self._id_rows is not None:
+            self._id_rows[transaction_id] = index
+        for name, code in (("type", type_code), ("category", category_code)):
+            if name in self._postings:
+                self._postings[name].setdefault(code, array("I")).append(index)
+
+    def index_of(self, transaction_id):
+        """Returns the row index of a transaction ID, raising ValueError if there is none."""
+        if self._id_rows is None:
+            self._id_rows = {transaction_id: index for index, transaction_id in enumerate(self.ids)}
+        index = self._id_rows.get(int(transaction_id))
+        if index is None:
+            raise ValueError(f"no transaction with ID {transaction_id}")
+        return index
+
+    def amend(self, transaction_id, transaction):
+        """Replaces the transaction with ID `transaction_id` by a transaction dict."""
+        index = self.index_of(transaction_id)
+        if not isinstance(self.amounts, array):
+            self._thaw()
+        date, type_code, category_code, amount, description_code, currency_code = self._convert(transaction)
+        if (index and date < self.dates[index - 1]) or (index + 1 < len(self) and date > self.dates[index + 1]):
+            self.dates_sorted = False
+        self.dates[index] = date
+        self.types[index] = type_code
+        self.categories[index] = category_code
+        self.amounts[index] = amount
+        self.descriptions[index] = description_code
+        self.currencies[index] = currency_code
+        self._postings = {}
+        self.revision += 1
+
+    def delete(self, transaction_id):
+        """Removes the transaction with ID `transaction_id`."""
+        self.remove_rows({self.index_of(transaction_id)})
+
+    def remove_rows(self, indices):
+        """
+        Removes the rows at a set of indices with one pass over each column,
+        keeping the ID map up to date.
+        """
+        if not indices:
+            return
+        if not isinstance(self.amounts, array):
+            self._thaw()
+        first = min(indices)
+        removed = [self.ids[index] for index in indices]
+        keep = [index not in indices for index in range(first, len(self))]
+        for name, typecode in _SNAPSHOT_COLUMNS:
+            column = getattr(self, name)
+            column[first:] = array(typecode, compress(column[first:], keep))
+        if self._id_rows is not None:
+            for transaction_id in removed:
+                del self._id_rows[transaction_id]
+            for index in range(first, len(self)):
+                self._id_rows[self.ids[index]] = index
+        self._postings = {}
+        self.revision += 1
+
+    def apply(self, record, deleted=None):
+        """
+        Applies a log record: a new transaction, an amend record or a tombstone.
+
+        When replaying many records, pass a set as `deleted`: tombstones then
+        only add their row's index to it, and the caller removes the rows
+        with remove_rows(deleted) once every record is applied.
+        """
+        op = record.get("op")
+        if not op:
+            self.append(record, record.get("id") or None)
+        elif op in ("amend", "delete"):
+            index = self.index_of(record["id"])
+            if deleted is not None and index in deleted:
+                raise ValueError(f"no transaction with ID {record['id']}")
+            if op == "amend":
+                self.amend(record["id"], record)
+            elif deleted is None:
+                self.remove_rows({index})
+            else:
+                deleted.add(index)
+        else:
+            raise ValueError(f"unknown record type {op!r}")
+
+    def _thaw(self):
+        """Copies memory-mapped snapshot columns into growable arrays."""
+        for name, typecode in _SNAPSHOT_COLUMNS:
+            # Copying the raw bytes is one memcpy, with no temporary copy or loop over the values
+            column = array(typecode)
+            column.frombytes(memoryview(getattr(self, name)).cast("B"))
+            setattr(self, name, column)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def row(self, index):
+        """Returns the transaction at `index` as a dict."""
+        transaction = {
+            "date": datetime.date.fromordinal(self.dates[index]).isoformat(),
+            "type": self.pools["type"][self.types[index]],
+            "category": self.pools["category"][self.categories[index]],
+            "amount": self.amounts[index],
+            "description": self.pools["description"][self.descriptions[index]],
+        }
+        currency = self.pools["currency"][self.currencies[index]]
+        if currency:
+            transaction["currency"] = currency
+        return transaction
+
+    def column(self, name):
+        """Returns the raw column for a transaction field (codes for string fields)."""
+        return {
+            "id": self.ids,
+            "date": self.dates,
+            "type": self.types,
+            "category": self.categories,
+            "amount": self.amounts,
+            "description": self.descriptions,
+            "currency": self.currencies,
+        }[name]
+
+    def prefix_digest(self, rows, strings, columns=("id", "date", "type", "category", "amount", "description", "currency")):
+        """
+        Digests the first `rows` rows of `columns` and the first strings of
+        each pool in `strings` ({pool: count}), which appends leave unchanged.
+        Any amend, delete or rewrite of those rows changes the digest, however
+        the store was rebuilt since.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for name in columns:
+            digest.update(memoryview(self.column(name))[:rows])
+        for name, count in strings.items():
+            digest.update("\0".join(self.pools[name].strings[:count]).encode("utf-8"))
+        return digest.hexdigest()
+
+    def indices_between(self, start=None, end=None):
+        """
+        Returns the indices of rows dated in [start, end), given as ordinals.
+
+        When rows are in date order this is a binary search returning a range;
+        otherwise the date column is scanned.
+        """
+        if self.dates_sorted:
+            low = 0 if start is None else bisect_left(self.dates, start)
+            high = len(self) if end is None else bisect_left(self.dates, end)
+            return range(low, high)
+        return [
+            index for index, date in enumerate(self.dates)
+            if (start is None or date >= start) and (end is None or date < end)
+        ]
+
+    def rows_with(self, name, value):
+        """
+        Returns the indices, in row order, of rows whose type or category
+        column equals `value`, using a posting index built on first use.
+        """
+        if name not in self._postings:
+            postings = {}
+            for index, code in enumerate(self.column(name)):
+                postings.setdefault(code, array("I")).append(index)
+            self._postings[name] = postings
+        code = self.encode(name, value)
+        return self._postings[name].get(code, array("I"))
+
+    def has_foreign_currency(self):
+        """Returns True if any row may be in a currency other than the base currency."""
+        return any(self.pools["currency"].strings)
+
+    def encode(self, name, value):
+        """Returns the code of a string value in a column, or None if it never occurs."""
+        return self.pools[name].codes.get(value)
+
+    def decode(self, name, code):
+        """Returns the string value behind a column code."""
+        return self.pools[name][code]
+
+
+class _FilePrefix(io.RawIOBase):
+    """Reads a binary file only up to byte `end`, hiding anything written after it."""
+
+    def __init__(self, raw, end):
+        self.raw = raw
+        self.end = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = max(0, min(len(buffer), self.end - self.raw.tell()))
+        return self.raw.readinto(memoryview(buffer)[:size])
+
+
+def _last_row_end(raw, size):
+    """Returns the offset just past the last complete row in the first `size` bytes of a file."""
+    position = size
+    while position > 0:
+        start = max(0, position - 65536)
+        raw.seek(start)
+        newline = raw.read(position - start).rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+def _open_generation(raw, stat, offset=0):
+    """
+    Returns a text stream over the complete rows of one generation of the CSV
+    file: bytes [offset, stat.st_size) of the open file `raw`. A row that a
+    writer is still appending is left for the next load.
+    """
+    end = _last_row_end(raw, stat.st_size)
+    raw.seek(offset)
+    return io.TextIOWrapper(io.BufferedReader(_FilePrefix(raw, end)), encoding="utf-8", newline=""), end
+
+
+def _append_csv_rows(store, raw, stat, offset=0):
+    """
+    Parses log records from the open CSV file `raw`, starting at byte
+    `offset`, into `store`, folding amend records and tombstones into the
+    rows they replace.
+    """
+    try:
+        fieldnames = None
+        if offset:
+            raw.seek(0)
+            fieldnames = next(csv.reader([raw.readline().decode("utf-8")]), None)
+        file, end = _open_generation(raw, stat, offset)
+        deleted = set()
+        for row in csv.DictReader(file, fieldnames=fieldnames):
+            try:
+                store.apply(row, deleted)
+            except (ValueError, KeyError, TypeError) as e:
+                console.print(f"[bold yellow]Warning: Skipping corrupted transaction row: {row}. Error: {e}[/bold yellow]")
+        store.remove_rows(deleted)
+        instrumentation.count("bytes_read.transactions", max(0, end - offset))
+    except csv.Error as e:
+        console.print(f"[bold red]Error reading transactions file: {e}[/bold red]")
+    return store
+
+
+def _write_snapshot(store, stat):
+    """Writes `store` as a binary snapshot of the CSV file described by `stat`."""
+    strings = []
+    for name in _SNAPSHOT_POOLS:
+        pool = store.pools[name].strings
+        text = "".join(pool).encode("utf-8")
+        strings.append(struct.pack("<IQ", len(pool), len(text)))
+        strings.append(array("I", map(len, pool)).tobytes())
+        strings.append(text)
+    columns = [array(typecode, getattr(store, name)).tobytes() for name, typecode in _SNAPSHOT_COLUMNS]
+    strings_offset = _SNAPSHOT_HEADER.size + sum(map(len, columns))
+    header = _SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, stat.st_size, stat.st_mtime_ns, stat.st_ino, len(store), store.dates_sorted,
+        store.next_id, store.revision, strings_offset,
+    )
+    try:
+        with _atomic_open(sidecar_path(".snap"), "wb") as file:
+            file.write(header)
+            file.writelines(columns)
+            file.writelines(strings)
+    except OSError:
+        pass  # The snapshot is only a cache; the CSV file stays the source of truth
+
+
+def _read_snapshot():
+    """Memory-maps the binary snapshot, returning (store, source size, mtime_ns, inode) or None."""
+    try:
+        with open(sidecar_path(".snap"), "rb") as file:
+            snapshot = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None  # Missing or empty snapshot
+    instrumentation.count("bytes_mapped.snapshot", len(snapshot))
+    try:
+        (
+            magic, size, mtime_ns, inode, rows, dates_sorted, next_id, revision, strings_offset,
+        ) = _SNAPSHOT_HEADER.unpack_from(snapshot)
+        if magic != SNAPSHOT_MAGIC:
+            return None
+
+        store = TransactionStore()
+        store.dates_sorted = bool(dates_sorted)
+        store.next_id = next_id
+        store.revision = revision
+        view = memoryview(snapshot)
+        offset = _SNAPSHOT_HEADER.size
+        for name, typecode in _SNAPSHOT_COLUMNS:
+            width = rows * array(typecode).itemsize
+            setattr(store, name, view[offset:offset + width].cast(typecode))
+            offset += width
+        if len(store.amounts) != rows or len(store.types) != rows:
+            return None
+
+        # Each pool is stored as a count, the text size, string lengths and the joined text.
+        offset = strings_offset
+        for name in _SNAPSHOT_POOLS:
+            count, text_size = struct.unpack_from("<IQ", snapshot, offset)
+            offset += struct.calcsize("<IQ")
+            bounds = list(accumulate(view[offset:offset + 4 * count].cast("I"), initial=0))
+            offset += 4 * count
+            text = str(view[offset:offset + text_size], "utf-8")
+            offset += text_size
+            store.pools[name] = _StringPool(text[start:end] for start, end in zip(bounds, bounds[1:]))
+    except (struct.error, TypeError, ValueError):
+        return None  # Truncated or corrupted snapshot; it is rebuilt from the CSV file
+    return store, size, mtime_ns, inode
+
+
+def _csv_load_transaction_store():
+    """
+    Loads transactions into a TransactionStore.
+
+    The store is shared through the process-wide cache, so callers must not
+    modify it. Columns are memory-mapped from the binary snapshot next to the
+    CSV file. The snapshot is rebuilt when the CSV file changes; rows appended
+    since the last snapshot are parsed on their own.
+
+    When another process only appended to the file, the cached store is
+    extended in place from the byte offset it had reached, so long-running
+    readers such as the dashboard pay only for the new rows. Threads load
+    one at a time, so each appended row is applied once.
+    """
+    key = _file_key(TRANSACTIONS_FILE)
+    if key is None:
+        return TransactionStore()
+    with _store_lock:
+        store = _cache_get("store", TRANSACTIONS_FILE, key)
+        if store is not None:
+            return store
+
+        try:
+            raw = open(TRANSACTIONS_FILE, "rb")
+        except FileNotFoundError:
+            return TransactionStore()
+        with raw:
+            # Everything below reads the generation that was open, even if a writer replaces the file.
+            stat = os.fstat(raw.fileno())
+            store = _catch_up_cached_store(raw, stat)
+            if store is None:
+                store = _read_store(raw, stat)
+        _cache_put("store", TRANSACTIONS_FILE, (stat.st_mtime_ns, stat.st_size, stat.st_ino), store)
+        return store
+
+
+def _catch_up_cached_store(raw, stat):
+    """Extends the cached store with rows appended since it was loaded, or returns None."""
+    entry = _cache.get(("store", TRANSACTIONS_FILE))
+    if entry is None:
+        return None
+    (_, size, inode), store = entry
+    if inode != stat.st_ino or not 0 < size < stat.st_size or not _ends_row(raw, size):
+        return None
+    return _append_csv_rows(store, raw, stat, size)
+
+
+def _read_store(raw, stat):
+    """Reads the store from the snapshot, catching up or rebuilding it as needed."""
+    snapshot = _read_snapshot()
+    if snapshot is not None:
+        store, size, mtime_ns, inode = snapshot
+        if (size, mtime_ns, inode) == (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+            return store
+        if inode == stat.st_ino and 0 < size < stat.st_size and _ends_row(raw, size):
+            # Only rows were appended since the snapshot was taken.
+            store = _append_csv_rows(store, raw, stat, size)
+            _write_snapshot(store, stat)
+            return store
+
+    store = _append_csv_rows(TransactionStore(), raw, stat)
+    _write_snapshot(store, stat)
+    return store
+
+
+def _ends_row(raw, offset):
+    """Returns True if byte `offset` of the open CSV file falls on a row boundary."""
+    raw.seek(offset - 1)
+    return raw.read(1) == b"\n"
+
+
+def _csv_load_transactions():
+    """
+    Loads transactions from the CSV file.
+
+    The list is shared through the process-wide cache until the file changes,
+    so callers must not modify it; write through save_transactions() or
+    append_transactions() instead.
+    """
+    key = _file_key(TRANSACTIONS_FILE)
+    transactions = _cache_get("transactions", TRANSACTIONS_FILE, key)
+    if transactions is not None:
+        return transactions
 
-def load_transactions():
-    """Loads transactions from the CSV file."""
     transactions = []
+    ids = array("q")
+    # Position in `transactions` of each ID, built once an amend record, a
+    # tombstone or an out-of-order ID needs it
+    positions = None
+    next_id = 1
     try:
-        with open(TRANSACTIONS_FILE, "r", newline="") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
+        with open(TRANSACTIONS_FILE, "rb") as raw:
+            stat = os.fstat(raw.fileno())
+            key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            file, end = _open_generation(raw, stat)
+            reader = csv.reader(file)
+            fieldnames = next(reader, None) or []
+            # Logs written before IDs or currencies existed lack those columns; short rows lack them too
+            columns = [fieldnames.index(field) if field in fieldnames else len(fieldnames) for field in LOG_FIELDS]
+            date, type_, category, amount, description, currency_, id_, op_ = columns
+            for values in reader:
                 try:
-                    row["amount"] = int(row["amount"])
-                    transactions.append(row)
-                except (ValueError, KeyError) as e:
+                    op = values[op_] if op_ < len(values) else ""
+                    transaction_id = values[id_] if id_ < len(values) else ""
+                    transaction_id = int(transaction_id) if transaction_id else next_id
+                    if positions is None and (op or transaction_id < next_id):
+                        positions = dict(zip(ids, range(len(ids))))
+                    if op == "delete":
+                        transactions[positions.pop(transaction_id)] = None
+                        continue
+                    row = {
+                        "date": values[date],
+                        "type": values[type_],
+                        "category": values[category],
+                        "amount": check_amount(values[amount]),
+                        "description": values[description],
+                    }
+                    if currency_ < len(values) and values[currency_]:
+                        row["currency"] = values[currency_]
+                    if op == "amend":
+                        transactions[positions[transaction_id]] = row
+                    elif op:
+                        raise ValueError(f"unknown record type {op!r}")
+                    else:
+                        if positions is not None:
+                            if transaction_id in positions:
+                                raise ValueError(f"duplicate transaction ID {transaction_id}")
+                            positions[transaction_id] = len(transactions)
+                        ids.append(transaction_id)
+                        transactions.append(row)
+                        if transaction_id >= next_id:
+                            next_id = transaction_id + 1
+                except (ValueError, KeyError, IndexError) as e:
+                    row = dict(zip(fieldnames, values))
                     console.print(f"[bold yellow]Warning: Skipping corrupted transaction row: {row}. Error: {e}[/bold yellow]")
+            instrumentation.count("bytes_read.transactions", end)
+        if positions is not None and len(positions) < len(transactions):
+            transactions = [transaction for transaction in transactions if transaction is not None]
     except FileNotFoundError:
         pass  # It's okay if the file doesn't exist yet
     except csv.Error as e:
         console.print(f"[bold red]Error reading transactions file: {e}[/bold red]")
+        return transactions
+    _cache_put("transactions", TRANSACTIONS_FILE, key, transactions)
     return transactions
 
 
-def save_transactions(transactions):
-    """Saves all transactions to the CSV file."""
+class _Lines(list):
+    """Collects what a csv writer writes, one line per row."""
+
+    write = list.append
+
+
+class _CountingWriter:
+    """Encodes what a csv writer writes into a binary file, returning the number of bytes written."""
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.file.write(data)
+        return len(data)
+
+
+def _csv_save_transactions(transactions):
+    """Saves all transactions to the CSV file, replacing it atomically and numbering them from 1."""
+    with _locked(TRANSACTIONS_FILE):
+        _csv_write_transactions(transactions)
+
+
+def _csv_write_transactions(transactions, ids=None, next_id=None):
+    """
+    Replaces the CSV file with `transactions`, under `ids` (default: 1, 2, ...),
+    and writes the ID index from the offsets of the rows; the caller holds
+    the file's lock. `next_id` keeps IDs of deleted transactions from being reused.
+    """
+    ids = range(1, len(transactions) + 1) if ids is None else ids
+    offsets = array("q", [-1]) * ((next_id or max(ids, default=0) + 1) - 1)
     try:
-        with open(TRANSACTIONS_FILE, "w", newline="") as file:
-            if not transactions:
-                return
-            writer = csv.DictWriter(file, fieldnames=transactions[0].keys())
-            writer.writeheader()
-            writer.writerows(transactions)
+        with _atomic_open(TRANSACTIONS_FILE, "wb") as file:
+            if transactions:
+                # The writer emits one line per row, which gives every row's offset
+                lines = _Lines()
+                writer = csv.writer(lines)
+                writer.writerow(LOG_FIELDS)
+                position = file.write(lines.pop().encode("utf-8"))
+                rows = zip(transactions, ids)
+                while chunk := list(islice(rows, 1000)):
+                    writer.writerows(
+                        [t["date"], t["type"], t["category"], t["amount"], t["description"], t.get("currency", ""), transaction_id, ""]
+                        for t, transaction_id in chunk
+                    )
+                    encoded = [line.encode("utf-8") for line in lines]
+                    for (_, transaction_id), start in zip(chunk, accumulate(map(len, encoded), initial=position)):
+                        offsets[transaction_id - 1] = start
+                    position += file.write(b"".join(encoded))
+                    lines.clear()
     except IOError as e:
         console.print(f"[bold red]Error writing transactions file: {e}[/bold red]")
+        return
 
+    # Keep the cache warm with what was just written instead of re-reading it.
+    key = _file_key(TRANSACTIONS_FILE)
+    _write_id_index(key, offsets, 0)
+    _cache_put("transactions", TRANSACTIONS_FILE, key, transactions)
+    if ("store", TRANSACTIONS_FILE) in _cache:
+        try:
+            store = TransactionStore.from_transactions(transactions, ids)
+            store.next_id = max(store.next_id, next_id or 1)
+            _cache_put("store", TRANSACTIONS_FILE, key, store)
+        except (ValueError, KeyError, TypeError):
+            del _cache[("store", TRANSACTIONS_FILE)]
+
+
+def _csv_rewrite_log():
+    """
+    Rewrites the log from its store, folding amend records and tombstones into
+    the rows they change and keeping every ID; the caller holds the file's lock.
+    """
+    store = _csv_load_transaction_store()
+    _csv_write_transactions(list(store), array("q", store.ids), store.next_id)
+
+
+def _csv_append_transactions(transactions):
+    """
+    Appends a batch of transactions to the end of the CSV file.
+
+    Batches appended concurrently by other threads are written with it,
+    under one lock and one fsync.
+    """
+    _group_commit(transactions, _csv_write_appended)
+
+
+def _csv_write_appended(transactions):
+    """Numbers appended transactions from the ID index and writes them, holding the file's lock."""
+    with _locked(TRANSACTIONS_FILE), _open_id_index() as index:
+        next_id = _id_count(index) + 1
+        records = [dict(transaction, id=next_id + number, op="") for number, transaction in enumerate(transactions)]
+        if _csv_write_records(records, index):
+            _csv_compact_if_due(index)
+
+
+def _csv_change_transaction(record):
+    """Appends an amend record or tombstone for a transaction found through the ID index."""
+    with _locked(TRANSACTIONS_FILE), _open_id_index() as index:
+        old = _read_log_record(_id_offset(index, record["id"]))
+        if _csv_write_records([record], index, [old]):
+            _csv_compact_if_due(index)
+
+
+def _csv_compact_if_due(index):
+    """Rewrites the log if enough of its records are obsolete (see COMPACTION_RATIO); the caller holds the file's lock."""
+    obsolete = _obsolete_records(index)
+    if obsolete >= COMPACTION_MIN_RECORDS and obsolete >= COMPACTION_RATIO * _id_count(index):
+        _csv_rewrite_log()
+
+
+def _csv_amend_transaction(transaction_id, transaction):
+    """Replaces a transaction by appending an amend record."""
+    _csv_change_transaction(dict(transaction, id=int(transaction_id), op="amend"))
+
+
+def _csv_delete_transaction(transaction_id):
+    """Deletes a transaction by appending a tombstone."""
+    _csv_change_transaction({"id": int(transaction_id), "op": "delete"})
+
+
+def _csv_get_transaction(transaction_id):
+    """Returns a transaction by ID, read from its latest record through the ID index when it is current."""
+    key = _file_key(TRANSACTIONS_FILE)
+    try:
+        with open(sidecar_path(".ids"), "rb") as index:
+            if _id_index_matches(index, key):
+                return _read_log_record(_id_offset(index, int(transaction_id)))
+    except FileNotFoundError:
+        pass
+    store = _csv_load_transaction_store()
+    return store.row(store.index_of(transaction_id))
+
+
+def _csv_write_records(records, index, removed=()):
+    """
+    Appends log records in one write and one fsync, then brings the cached
+    ledgers, the monthly index and the open ID index up to date; the caller
+    holds the file's lock. `removed` holds the transactions that amend records
+    and tombstones replace. Returns False if nothing was written.
+    """
+    old_key = _file_key(TRANSACTIONS_FILE)
+    fieldnames, torn = _log_state(TRANSACTIONS_FILE)
+    output = _CountingWriter(io.BytesIO())
+    position = old_key[1] if old_key else 0
+    # Records the write makes obsolete: a torn row, the rows amended or deleted and the tombstones
+    obsolete = _obsolete_records(index) + torn + sum({"": 0, "amend": 1, "delete": 2}[record["op"]] for record in records)
+    if torn:
+        # A previous write was cut short; keep the torn row on its own line.
+        position += output.write("\n")
+    writer = csv.DictWriter(output, fieldnames=fieldnames or LOG_FIELDS, extrasaction="ignore")
+    if fieldnames is None:
+        position += writer.writeheader()
+    entries = []
+    for record in records:
+        entries.append((record["id"], -1 if record["op"] == "delete" else position))
+        position += writer.writerow(record)
+    try:
+        # One write call, so readers of other processes rarely see a partial batch
+        with open(TRANSACTIONS_FILE, "ab") as file:
+            file.write(output.file.getvalue())
+            file.flush()
+            os.fsync(file.fileno())
+    except IOError as e:
+        console.print(f"[bold red]Error writing transactions file: {e}[/bold red]")
+        return False
+    key = _file_key(TRANSACTIONS_FILE)
+    _update_cache_after_append(old_key, records)
+    _update_monthly_index(old_key, [record for record in records if record["op"] != "delete"], removed)
+    _patch_id_index(index, key, entries, obsolete)
+    return True
+
+
+def _update_cache_after_append(old_key, records):
+    """Applies freshly written log records to the cached ledgers that were current."""
+    key = _file_key(TRANSACTIONS_FILE)
+    transactions = _cache_get("transactions", TRANSACTIONS_FILE, old_key)
+    if transactions is not None:
+        if any(record["op"] for record in records):
+            del _cache[("transactions", TRANSACTIONS_FILE)]  # Re-read on the next load
+        else:
+            transactions.extend(_transaction(record) for record in records)
+            _cache_put("transactions", TRANSACTIONS_FILE, key, transactions)
+    with _store_lock:
+        store = _cache_get("store", TRANSACTIONS_FILE, old_key)
+        if store is not None:
+            try:
+                deleted = set()
+                for record in records:
+                    store.apply(record, deleted)
+                store.remove_rows(deleted)
+                _cache_put("store", TRANSACTIONS_FILE, key, store)
+            except (ValueError, KeyError, TypeError):
+                del _cache[("store", TRANSACTIONS_FILE)]  # Re-read on the next load
+
+
+def _id_index_header(key, obsolete):
+    """Returns the ID index header for the log generation identified by `key`."""
+    return _ID_INDEX_HEADER.pack(ID_INDEX_MAGIC, *(key or (0, 0, 0)), obsolete)
+
+
+def _id_index_matches(index, key):
+    """Reads the header of an open ID index, returning True if it describes the log generation `key`."""
+    header = index.read(_ID_INDEX_HEADER.size)
+    return len(header) == _ID_INDEX_HEADER.size and _ID_INDEX_HEADER.unpack(header)[:4] == (ID_INDEX_MAGIC, *(key or (0, 0, 0)))
+
+
+def _obsolete_records(index):
+    """Returns the number of obsolete log records counted by the open ID index."""
+    index.seek(0)
+    return _ID_INDEX_HEADER.unpack(index.read(_ID_INDEX_HEADER.size))[4]
+
+
+def _build_id_index():
+    """
+    Scans the log for the offset of each ID's latest record, numbering rows
+    without an ID as loads do, and counts its obsolete records. Returns
+    (offsets, obsolete records).
+    """
+    offsets = array("q")
+    obsolete = 0
+    try:
+        raw = open(TRANSACTIONS_FILE, "rb")
+    except FileNotFoundError:
+        return offsets, obsolete
+    with raw:
+        end = _last_row_end(raw, os.fstat(raw.fileno()).st_size)
+        raw.seek(0)
+        fieldnames = next(csv.reader([raw.readline().decode("utf-8")]), [])
+        position = raw.tell()
+
+        def lines():
+            nonlocal position
+            while position < end:
+                line = raw.readline()
+                position += len(line)
+                yield line.decode("utf-8")
+
+        start = position
+        for values in csv.reader(lines()):
+            record = dict(zip(fieldnames, values))
+            try:
+                if record.get("op") == "delete":
+                    offsets[int(record["id"]) - 1] = -1
+                    obsolete += 2
+                else:
+                    # Rows that loads would skip as corrupted get no ID
+                    datetime.date.fromisoformat(record["date"])
+                    check_amount(record["amount"])
+                    transaction_id = int(record.get("id") or len(offsets) + 1)
+                    if transaction_id > len(offsets):
+                        offsets.extend([-1] * (transaction_id - len(offsets)))
+                    offsets[transaction_id - 1] = start
+                    obsolete += record.get("op") == "amend"
+            except (ValueError, KeyError, IndexError):
+                obsolete += 1
+            start = position
+    instrumentation.count("id_index.rebuilds")
+    return offsets, obsolete
+
+
+def _write_id_index(key, offsets, obsolete):
+    """Persists the ID index of the log generation identified by `key`."""
+    with _atomic_open(sidecar_path(".ids"), "wb") as file:
+        file.write(_id_index_header(key, obsolete))
+        file.write(offsets.tobytes())
+
+
+def _open_id_index():
+    """
+    Opens the ID index for reading and patching, first upgrading a log written
+    before transactions had IDs or currencies and rebuilding an index that
+    does not match the log. The caller holds the log's lock.
+    """
+    fieldnames, _ = _log_state(TRANSACTIONS_FILE)
+    if fieldnames is not None and any(field not in fieldnames for field in LOG_FIELDS):
+        _csv_rewrite_log()  # Numbers the rows in log order and writes their index
+    key = _file_key(TRANSACTIONS_FILE)
+    try:
+        index = open(sidecar_path(".ids"), "r+b")
+        if _id_index_matches(index, key):
+            return index
+        index.close()
+    except FileNotFoundError:
+        pass
+    _write_id_index(key, *_build_id_index())
+    return open(sidecar_path(".ids"), "r+b")
+
+
+def _id_count(index):
+    """Returns the number of IDs handed out, deleted ones included, according to the open ID index."""
+    return (os.fstat(index.fileno()).st_size - _ID_INDEX_HEADER.size) // 8
+
+
+def _id_offset(index, transaction_id):
+    """Returns the log offset of a transaction's latest record, raising ValueError if there is none."""
+    offset = -1
+    if 0 < transaction_id <= _id_count(index):
+        index.seek(_ID_INDEX_HEADER.size + 8 * (transaction_id - 1))
+        offset = array("q", index.read(8))[0]
+    if offset < 0:
+        raise ValueError(f"no transaction with ID {transaction_id}")
+    return offset
+
+
+def _patch_id_index(index, key, entries, obsolete):
+    """
+    Records the (ID, offset) entries of freshly written records, then marks the
+    index as describing log generation `key` with `obsolete` records. A crash
+    before the header is written leaves the index stale, so it is rebuilt.
+    """
+    for transaction_id, offset in entries:
+        index.seek(_ID_INDEX_HEADER.size + 8 * (transaction_id - 1))
+        index.write(array("q", [offset]).tobytes())
+    index.seek(0)
+    index.write(_id_index_header(key, obsolete))
+
+
+def _read_log_record(offset):
+    """Reads the transaction recorded at byte `offset` of the log."""
+    with open(TRANSACTIONS_FILE, "rb") as raw:
+        fieldnames = next(csv.reader([raw.readline().decode("utf-8")]))
+        raw.seek(offset)
+        record = dict(zip(fieldnames, next(csv.reader(line.decode("utf-8") for line in raw))))
+    transaction = _transaction(record)
+    transaction["amount"] = int(transaction["amount"])
+    return transaction
+
+
+def _transaction(record):
+    """Returns the transaction dict held by a log record, with a currency only if it has one."""
+    transaction = {field: record[field] for field in TRANSACTION_FIELDS}
+    if record.get("currency"):
+        transaction["currency"] = record["currency"]
+    return transaction
+
+
+def _sums_key(transaction_type, category, currency):
+    """
+    Returns the key a transaction is totalled under in a monthly index:
+    (type, category) in the base currency, else (type, category, currency).
+    """
+    return (transaction_type, category, currency) if currency else (transaction_type, category)
+
+
+def _build_monthly_index(store):
+    """Sums the store's amounts by (year, month) and then (type, category), or (type, category, currency)."""
+    sums = {}
+    for date, type_code, category_code, currency_code, amount in zip(
+        store.column("date"), store.column("type"), store.column("category"), store.column("currency"), store.column("amount")
+    ):
+        key = (date, type_code, category_code, currency_code)
+        sums[key] = sums.get(key, 0) + amount
+
+    index = {}
+    for (date, type_code, category_code, currency_code), amount in sums.items():
+        day = datetime.date.fromordinal(date)
+        month = index.setdefault((day.year, day.month), {})
+        key = _sums_key(
+            store.decode("type", type_code), store.decode("category", category_code), store.decode("currency", currency_code)
+        )
+        month[key] = month.get(key, 0) + amount
+    return index
+
+
+def _read_monthly_index():
+    """Reads the persisted monthly index, returning (source file key, index) or None."""
+    try:
+        with open(sidecar_path(".monthly.json"), "r") as file:
+            text = file.read()
+        instrumentation.count("bytes_read.monthly_index", len(text))
+        data = json.loads(text)
+        index = {}
+        for year, month, transaction_type, category, amount, *currency in data["totals"]:
+            index.setdefault((year, month), {})[(transaction_type, category, *currency)] = amount
+        return tuple(data["source"]), index
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_monthly_index(key, index):
+    """Persists the monthly index along with the key of the file it summarizes."""
+    totals = [
+        [year, month, transaction_type, category, amount, *currency]
+        for (year, month), sums in sorted(index.items())
+        for (transaction_type, category, *currency), amount in sums.items()
+    ]
+    try:
+        with _atomic_open(sidecar_path(".monthly.json")) as file:
+            json.dump({"source": key, "totals": totals}, file)
+    except OSError:
+        pass  # The index is rebuilt from the transactions file when missing
+
+
+def _current_monthly_index(key):
+    """Returns the cached or persisted monthly index if it matches `key`, else None."""
+    index = _cache_get("monthly", TRANSACTIONS_FILE, key)
+    if index is None:
+        persisted = _read_monthly_index()
+        if persisted is not None and persisted[0] == key:
+            index = persisted[1]
+    return index
+
+
+def _csv_load_monthly_index():
+    """
+    Loads running totals of the transactions, keyed by (year, month) and then
+    by (type, category).
+
+    The index is persisted next to the transactions file and updated on every
+    append, so it is only rebuilt after the file is changed by other means.
+    """
+    key = _file_key(TRANSACTIONS_FILE)
+    if key is None:
+        return {}
+    index = _current_monthly_index(key)
+    if index is None:
+        index = _build_monthly_index(_csv_load_transaction_store())
+        _write_monthly_index(key, index)
+    _cache_put("monthly", TRANSACTIONS_FILE, key, index)
+    return index
+
+
+def _update_monthly_index(old_key, appended, removed=()):
+    """
+    Adds freshly appended transactions to the monthly index, and subtracts the
+    transactions they replace or delete, if the index was current.
+    """
+    index = _current_monthly_index(old_key)
+    if index is None:
+        return  # Rebuilt on the next load
+    key = _file_key(TRANSACTIONS_FILE)
+    try:
+        for transactions, sign in ((removed, -1), (appended, 1)):
+            for transaction in transactions:
+                day = datetime.date.fromisoformat(transaction["date"])
+                sums = index.setdefault((day.year, day.month), {})
+                category_key = _sums_key(transaction["type"], transaction["category"], transaction.get("currency"))
+                sums[category_key] = sums.get(category_key, 0) + sign * int(transaction["amount"])
+                if sign < 0 and not sums[category_key]:
+                    del sums[category_key]
+                    if not sums:
+                        del index[(day.year, day.month)]
+    except (ValueError, KeyError, TypeError):
+        _cache.pop(("monthly", TRANSACTIONS_FILE), None)  # Rebuilt on the next load
+        return
+    _write_monthly_index(key, index)
+    _cache_put("monthly", TRANSACTIONS_FILE, key, index)
+
+
+def _csv_compact_transactions():
+    """
+    Rewrites the transaction log, folding in amend records and tombstones and
+    dropping torn and corrupted rows.
+    """
+    with _locked(TRANSACTIONS_FILE):
+        # Read under the lock, so rows appended meanwhile are not dropped
+        _csv_rewrite_log()
+
+
+def _csv_load_budgets():
+    """Loads budgets from the CSV file, sharing the cached dict until the file changes."""
+    key = _file_key(BUDGETS_FILE)
+    budgets = _cache_get("budgets", BUDGETS_FILE, key)
+    if budgets is not None:
+        return budgets
 
-def load_budgets():
-    """Loads budgets from the CSV file."""
     budgets = {}
     try:
         with open(BUDGETS_FILE, "r", newline="") as file:
@@ -55,15 +1280,1003 @@ def load_budgets():
         pass  # It's okay if the file doesn't exist yet
     except csv.Error as e:
         console.print(f"[bold red]Error reading budgets file: {e}[/bold red]")
+        return budgets
+    _cache_put("budgets", BUDGETS_FILE, key, budgets)
     return budgets
 
 
-def save_budgets(budgets):
-    """Saves all budgets to the CSV file."""
+def _csv_save_budgets(budgets):
+    """Saves all budgets to the CSV file, replacing it atomically."""
     try:
-        with open(BUDGETS_FILE, "w", newline="") as file:
+        with _locked(BUDGETS_FILE), _atomic_open(BUDGETS_FILE) as file:
             writer = csv.writer(file)
             for category, amount in budgets.items():
                 writer.writerow([category, amount])
     except IOError as e:
         console.print(f"[bold red]Error writing budgets file: {e}[/bold red]")
+        return
+    _cache_put("budgets", BUDGETS_FILE, _file_key(BUDGETS_FILE), budgets)
+
+
+class StorageBackend:
+    """
+    Interface implemented by every storage backend.
+
+    The module-level load_*/save_* functions delegate to the active backend,
+    so features never depend on how the ledger is stored.
+    """
+
+    name = None
+
+    def load_transactions(self):
+        """Returns every transaction as a list of dicts."""
+        raise NotImplementedError
+
+    def save_transactions(self, transactions):
+        """Replaces every transaction."""
+        raise NotImplementedError
+
+    def append_transactions(self, transactions):
+        """Adds a batch of transactions to the end of the ledger."""
+        raise NotImplementedError
+
+    def load_transaction_store(self):
+        """Returns every transaction as a TransactionStore."""
+        raise NotImplementedError
+
+    def get_transaction(self, transaction_id):
+        """Returns the transaction with ID `transaction_id`, raising ValueError if there is none."""
+        store = self.load_transaction_store()
+        return store.row(store.index_of(transaction_id))
+
+    def amend_transaction(self, transaction_id, transaction):
+        """
+        Replaces the transaction with ID `transaction_id`, raising ValueError if
+        there is none. The transaction keeps its ID, and so do all others.
+        """
+        raise NotImplementedError
+
+    def delete_transaction(self, transaction_id):
+        """Deletes the transaction with ID `transaction_id`, raising ValueError if there is none."""
+        raise NotImplementedError
+
+    def load_transaction_store_between(self, start=None, end=None):
+        """
+        Returns a store holding at least the transactions dated in [start, end).
+        Backends may return more rows, so callers still filter by date.
+        """
+        return self.load_transaction_store()
+
+    def load_monthly_index(self):
+        """
+        Returns totals keyed by (year, month) and then by (type, category), or
+        by (type, category, currency) for amounts in another currency.
+        """
+        raise NotImplementedError
+
+    def month_sums(self, year, month):
+        """Returns one month's totals, keyed as in load_monthly_index()."""
+        return self.load_monthly_index().get((year, month), {})
+
+    def has_transactions(self):
+        """Returns True if the ledger holds at least one transaction."""
+        return bool(self.load_monthly_index())
+
+    def ledger_key(self):
+        """Returns a value that changes whenever the stored ledger changes."""
+        raise NotImplementedError
+
+    def compact(self):
+        """Reclaims space left behind by appends and torn writes."""
+
+    def load_budgets(self):
+        """Returns budgets as {category: amount}."""
+        raise NotImplementedError
+
+    def save_budgets(self, budgets):
+        """Replaces every budget."""
+        raise NotImplementedError
+
+
+class CsvBackend(StorageBackend):
+    """Stores the ledger in the flat CSV files TRANSACTIONS_FILE and BUDGETS_FILE."""
+
+    name = "csv"
+
+    def load_transactions(self):
+        return _csv_load_transactions()
+
+    def save_transactions(self, transactions):
+        _csv_save_transactions(transactions)
+
+    def append_transactions(self, transactions):
+        _csv_append_transactions(transactions)
+
+    def load_transaction_store(self):
+        return _csv_load_transaction_store()
+
+    def get_transaction(self, transaction_id):
+        return _csv_get_transaction(transaction_id)
+
+    def amend_transaction(self, transaction_id, transaction):
+        _csv_amend_transaction(transaction_id, transaction)
+
+    def delete_transaction(self, transaction_id):
+        _csv_delete_transaction(transaction_id)
+
+    def load_monthly_index(self):
+        return _csv_load_monthly_index()
+
+    def ledger_key(self):
+        return _file_key(TRANSACTIONS_FILE)
+
+    def compact(self):
+        _csv_compact_transactions()
+
+    def load_budgets(self):
+        return _csv_load_budgets()
+
+    def save_budgets(self, budgets):
+        _csv_save_budgets(budgets)
+
+
+def _sqlite_transaction(row):
+    """Returns the transaction dict of a (date, type, category, amount, description, currency) row."""
+    transaction = dict(zip(TRANSACTION_FIELDS, row))
+    if row[5]:
+        transaction["currency"] = row[5]
+    return transaction
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Stores the ledger in a SQLite database in WAL mode.
+
+    Inserts are batched through prepared statements, and monthly aggregates
+    are computed by the database using the (date, type, category) index.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = path
+        self._connections = {}
+
+    def _connect(self):
+        """Returns the connection for the database file, creating the schema on first use."""
+        path = self.path or SQLITE_FILE
+        connection = self._connections.get(path)
+        if connection is None:
+            connection = sqlite3.connect(path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with connection:
+                connection.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS transactions (
+                        id INTEGER PRIMARY KEY,
+                        date TEXT NOT NULL,
+                        type TEXT NOT NULL,
+                        category TEXT NOT NULL,
+                        amount INTEGER NOT NULL,
+                        description TEXT NOT NULL,
+                        currency TEXT NOT NULL DEFAULT ''
+                    );
+                    CREATE INDEX IF NOT EXISTS transactions_date_type_category
+                        ON transactions (date, type, category);
+                    CREATE TABLE IF NOT EXISTS budgets (
+                        category TEXT PRIMARY KEY,
+                        amount INTEGER NOT NULL
+                    );
+                    """
+                )
+                columns = {row[1] for row in connection.execute("PRAGMA table_info(transactions)")}
+                if "currency" not in columns:
+                    # Databases created before currencies existed
+                    connection.execute("ALTER TABLE transactions ADD COLUMN currency TEXT NOT NULL DEFAULT ''")
+            self._connections[path] = connection
+        return connection
+
+    def close(self):
+        """Closes every open connection."""
+        for connection in self._connections.values():
+            connection.close()
+        self._connections.clear()
+
+    def _version(self, connection):
+        """Returns a key that changes whenever any connection commits a change."""
+        return connection.execute("PRAGMA data_version").fetchone()[0], connection.total_changes
+
+    def load_transactions(self):
+        rows = self._connect().execute(
+            "SELECT date, type, category, amount, description, currency FROM transactions ORDER BY id"
+        )
+        return [_sqlite_transaction(row) for row in rows]
+
+    def save_transactions(self, transactions):
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM transactions")
+            self._insert(connection, transactions)
+
+    def append_transactions(self, transactions):
+        connection = self._connect()
+        with connection:
+            self._insert(connection, transactions)
+
+    def _insert(self, connection, transactions):
+        connection.executemany(
+            "INSERT INTO transactions (date, type, category, amount, description, currency) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                [t["date"], t["type"], t["category"], int(t["amount"]), t["description"], t.get("currency") or ""]
+                for t in transactions
+            ),
+        )
+
+    def load_transaction_store(self):
+        connection = self._connect()
+        path = self.path or SQLITE_FILE
+        key = self._version(connection)
+        store = _cache_get("sqlite-store", path, key)
+        if store is None:
+            rows = connection.execute(
+                "SELECT id, date, type, category, amount, description, currency FROM transactions ORDER BY id"
+            ).fetchall()
+            store = TransactionStore.from_transactions(
+                [_sqlite_transaction(row[1:]) for row in rows], [row[0] for row in rows]
+            )
+            store.revision = self._revision(connection)
+            _cache_put("sqlite-store", path, key, store)
+        return store
+
+    def _revision(self, connection):
+        """Returns the number of amends and deletes, kept in the database's user_version."""
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+
+    def _change(self, sql, parameters, transaction_id):
+        """Runs an UPDATE or DELETE of one transaction, counting it as a revision."""
+        connection = self._connect()
+        with connection:
+            if connection.execute(sql, parameters).rowcount == 0:
+                raise ValueError(f"no transaction with ID {transaction_id}")
+            connection.execute(f"PRAGMA user_version = {self._revision(connection) + 1}")
+
+    def get_transaction(self, transaction_id):
+        row = self._connect().execute(
+            "SELECT date, type, category, amount, description, currency FROM transactions WHERE id = ?",
+            (int(transaction_id),),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"no transaction with ID {transaction_id}")
+        return _sqlite_transaction(row)
+
+    def amend_transaction(self, transaction_id, transaction):
+        t = transaction
+        self._change(
+            "UPDATE transactions SET date = ?, type = ?, category = ?, amount = ?, description = ?, currency = ? WHERE id = ?",
+            (t["date"], t["type"], t["category"], int(t["amount"]), t["description"], t.get("currency") or "", int(transaction_id)),
+            transaction_id,
+        )
+
+    def delete_transaction(self, transaction_id):
+        self._change("DELETE FROM transactions WHERE id = ?", (int(transaction_id),), transaction_id)
+
+    def load_monthly_index(self):
+        rows = self._connect().execute(
+            "SELECT CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER), type, category, currency, "
+            "SUM(amount) FROM transactions GROUP BY substr(date, 1, 7), type, category, currency"
+        )
+        index = {}
+        for year, month, transaction_type, category, currency, amount in rows:
+            index.setdefault((year, month), {})[_sums_key(transaction_type, category, currency)] = amount
+        return index
+
+    def month_sums(self, year, month):
+        first_day = datetime.date(year, month, 1)
+        next_month = (first_day + datetime.timedelta(days=32)).replace(day=1)
+        rows = self._connect().execute(
+            "SELECT type, category, currency, SUM(amount) FROM transactions "
+            "WHERE date >= ? AND date < ? GROUP BY type, category, currency",
+            (first_day.isoformat(), next_month.isoformat()),
+        )
+        return {_sums_key(transaction_type, category, currency): amount for transaction_type, category, currency, amount in rows}
+
+    def has_transactions(self):
+        return self._connect().execute("SELECT 1 FROM transactions LIMIT 1").fetchone() is not None
+
+    def ledger_key(self):
+        connection = self._connect()
+        return connection.execute("SELECT COUNT(*), MAX(id), SUM(amount) FROM transactions").fetchone() + (
+            self._revision(connection),
+        )
+
+    def compact(self):
+        self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def load_budgets(self):
+        return dict(self._connect().execute("SELECT category, amount FROM budgets"))
+
+    def save_budgets(self, budgets):
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM budgets")
+            connection.executemany("INSERT INTO budgets (category, amount) VALUES (?, ?)", budgets.items())
+
+
+def _segment_totals(transactions, totals=(), sign=1):
+    """
+    Adds transactions to a segment's manifest totals, a list of [type, category,
+    amount] entries with the currency appended for amounts in another currency.
+    With `sign` -1 the transactions are subtracted instead, and entries that
+    drop to zero are removed.
+    """
+    sums = {(t, c, *currency): a for t, c, a, *currency in totals}
+    for transaction in transactions:
+        key = _sums_key(transaction["type"], transaction["category"], transaction.get("currency"))
+        sums[key] = sums.get(key, 0) + sign * int(transaction["amount"])
+        if sign < 0 and not sums[key]:
+            del sums[key]
+    return [[t, c, a, *currency] for (t, c, *currency), a in sums.items()]
+
+
+def _fold_records(ids, transactions, records):
+    """
+    Applies log records to a segment's (IDs, transactions): new transactions
+    are added at the end, amend records replace and tombstones remove.
+    """
+    positions = {transaction_id: position for position, transaction_id in enumerate(ids)}
+    deleted = set()
+    for record in records:
+        if record["op"] == "delete":
+            deleted.add(positions[record["id"]])
+        elif record["op"] == "amend":
+            transactions[positions[record["id"]]] = _transaction(record)
+        else:
+            positions[record["id"]] = len(ids)
+            ids.append(record["id"])
+            transactions.append(_transaction(record))
+    keep = [position not in deleted for position in range(len(ids))]
+    return array("q", compress(ids, keep)), list(compress(transactions, keep))
+
+
+class PartitionedBackend(StorageBackend):
+    """
+    Stores the ledger as one CSV segment per month plus a JSON manifest.
+
+    The manifest records each segment's file, size, row count, largest ID and
+    (type, category) totals, so monthly reports never open a segment and
+    range queries open only the months they cover. Months before the current
+    one are closed: their segments are gzip-compressed and rewritten only
+    when a transaction in them is added, amended or deleted. The current
+    month is an append-only log like the flat CSV file, with the same
+    columns: amend records and tombstones are appended to it.
+    """
+
+    name = "partitioned"
+
+    def __init__(self, directory=None):
+        self.directory = directory
+
+    def _directory(self):
+        """Returns the segment directory, next to TRANSACTIONS_FILE by default."""
+        return self.directory or os.path.splitext(TRANSACTIONS_FILE)[0]
+
+    def _path(self, name):
+        return os.path.join(self._directory(), name)
+
+    # --- Segments ---
+
+    def _read_segment(self, entry):
+        """
+        Reads one segment, folding its amend records and tombstones in, and
+        returns (IDs, transactions). Rows of segments written before
+        transactions had IDs get ID 0.
+        """
+        rows = {}
+        path = self._path(entry["file"])
+        try:
+            with open(path, "rb") as raw:
+                if entry["closed"]:
+                    file = io.TextIOWrapper(gzip.GzipFile(fileobj=raw), encoding="utf-8", newline="")
+                else:
+                    end = entry.get("size", os.fstat(raw.fileno()).st_size)
+                    file = io.TextIOWrapper(io.BufferedReader(_FilePrefix(raw, end)), encoding="utf-8", newline="")
+                for number, row in enumerate(csv.DictReader(file)):
+                    try:
+                        op = row.pop("op", None) or ""
+                        transaction_id = int(row.pop("id", None) or 0)
+                        key = transaction_id or -1 - number
+                        if op and key not in rows:
+                            raise ValueError(f"no transaction with ID {transaction_id}")
+                        if op == "delete":
+                            del rows[key]
+                            continue
+                        if op not in ("", "amend"):
+                            raise ValueError(f"unknown record type {op!r}")
+                        if not op and key in rows:
+                            raise ValueError(f"duplicate transaction ID {transaction_id}")
+                        row["amount"] = check_amount(row["amount"])
+                        datetime.date.fromisoformat(row["date"])
+                        if not row.get("currency"):
+                            row.pop("currency", None)
+                        rows[key] = row
+                    except (ValueError, KeyError, TypeError) as e:
+                        console.print(f"[bold yellow]Warning: Skipping corrupted transaction row: {row}. Error: {e}[/bold yellow]")
+        except FileNotFoundError:
+            pass
+        except (csv.Error, OSError, EOFError) as e:
+            console.print(f"[bold red]Error reading transaction segment {path}: {e}[/bold red]")
+        return array("q", (max(key, 0) for key in rows)), list(rows.values())
+
+    def _write_segment(self, month, ids, transactions, closed, max_id=0):
+        """Writes a whole segment atomically, returning its manifest entry."""
+        text = io.StringIO(newline="")
+        writer = csv.DictWriter(text, fieldnames=LOG_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(dict(transaction, id=transaction_id) for transaction_id, transaction in zip(ids, transactions))
+        data = text.getvalue().encode("utf-8")
+        name = f"{month}.csv.gz" if closed else f"{month}.csv"
+        with _atomic_open(self._path(name), "wb") as file:
+            file.write(gzip.compress(data, mtime=0) if closed else data)
+        # The other form of the segment, if any, is now stale
+        stale = self._path(f"{month}.csv" if closed else f"{month}.csv.gz")
+        if os.path.exists(stale):
+            os.remove(stale)
+        return self._entry(name, closed, ids, transactions, max_id)
+
+    def _rewrite_segment(self, month, entry, closed=None):
+        """Rewrites a segment with its records folded in, keeping its largest ID."""
+        closed = entry["closed"] if closed is None else closed
+        return self._write_segment(month, *self._read_segment(entry), closed=closed, max_id=entry.get("max_id", 0))
+
+    def _append_segment(self, entry, records, removed=()):
+        """
+        Appends log records to an open segment with one fsync, updating its
+        entry. `removed` holds the transactions that amend records and
+        tombstones replace.
+        """
+        path = self._path(entry["file"])
+        fieldnames, torn = _log_state(path)
+        if fieldnames is not None and any(field not in fieldnames for field in LOG_FIELDS):
+            # A segment written before IDs or currencies existed gains their columns
+            ids, transactions = _fold_records(*self._read_segment(entry), records)
+            entry.update(self._write_segment(entry["file"][:7], ids, transactions, closed=False, max_id=entry.get("max_id", 0)))
+            return
+        with open(path, "a", newline="") as file:
+            if torn:
+                file.write("\n")  # Keep the torn row on its own line
+            writer = csv.DictWriter(file, fieldnames=fieldnames or LOG_FIELDS, extrasaction="ignore")
+            if fieldnames is None:
+                writer.writeheader()
+            writer.writerows(records)
+            file.flush()
+            os.fsync(file.fileno())
+        entry["rows"] += sum(not record["op"] for record in records) - sum(record["op"] == "delete" for record in records)
+        entry["size"] = os.path.getsize(path)
+        entry["max_id"] = max([entry.get("max_id", 0)] + [record["id"] for record in records])
+        totals = _segment_totals(removed, entry["totals"], sign=-1)
+        entry["totals"] = _segment_totals([record for record in records if record["op"] != "delete"], totals)
+
+    def _write_records(self, segments, month, records, removed=()):
+        """
+        Writes log records for one month: appended to its segment while the
+        month is open, else folded into a rewrite of that segment alone.
+        """
+        entry = segments.get(month)
+        if entry is not None and not entry["closed"]:
+            self._append_segment(entry, records, removed)
+            return
+        if entry is None:
+            ids, transactions = array("q"), []
+            closed, max_id = month < datetime.date.today().isoformat()[:7], 0
+        else:
+            ids, transactions = self._read_segment(entry)
+            closed, max_id = True, entry.get("max_id", 0)
+        ids, transactions = _fold_records(ids, transactions, records)
+        segments[month] = self._write_segment(month, ids, transactions, closed, max_id)
+
+    def _entry(self, name, closed, ids, transactions, max_id=0):
+        """
+        Builds the manifest entry of a segment holding `transactions` under
+        `ids`. Segments written before transactions had IDs get no "max_id".
+        """
+        entry = {
+            "file": name,
+            "closed": closed,
+            "rows": len(transactions),
+            "size": os.path.getsize(self._path(name)),
+            "totals": _segment_totals(transactions),
+        }
+        if all(ids):
+            entry["max_id"] = max(max(ids, default=0), max_id)
+        return entry
+
+    # --- Manifest ---
+
+    def _load_manifest(self, repair=False):
+        """
+        Returns {month: entry} from the manifest, shared until it changes.
+
+        Readers trust the manifest: open segments are read only up to the
+        size it records, so rows a writer is still appending stay hidden until
+        the manifest is replaced. Writers, holding the lock, pass `repair` to
+        get a private copy that is first brought in line with the segment
+        files, picking up segments left behind by a crash between writing a
+        segment and the manifest. A missing or corrupt manifest is rebuilt
+        from the segments either way.
+        """
+        path = self._path("manifest.json")
+        key = _file_key(path)
+        if not repair:
+            segments = _cache_get("manifest", path, key)
+            if segments is not None:
+                return segments
+        try:
+            with open(path, "r") as file:
+                segments = json.load(file)["segments"]
+        except FileNotFoundError:
+            segments, repair = {}, True
+        except (ValueError, KeyError, TypeError) as e:
+            console.print(f"[bold yellow]Warning: Rebuilding the segment manifest. Error: {e}[/bold yellow]")
+            segments, repair = {}, True
+
+        if repair:
+            self._reconcile(segments)
+        _cache_put("manifest", path, key, segments)
+        return segments
+
+    def _reconcile(self, segments):
+        """Brings manifest entries in line with the segment files, returning True if any changed."""
+        try:
+            names = sorted(os.listdir(self._directory()))
+        except FileNotFoundError:
+            names = []
+        files = {}
+        for name in names:
+            month, _, extension = name.partition(".")
+            if extension in ("csv", "csv.gz") and len(month) == 7:
+                files[month] = name  # "csv.gz" sorts last and wins
+        changed = False
+        for month in set(segments) - set(files):
+            del segments[month]
+            changed = True
+        for month, name in files.items():
+            entry = segments.get(month)
+            if entry is None or entry["file"] != name or entry["size"] != os.path.getsize(self._path(name)):
+                closed = name.endswith(".gz")
+                max_id = entry.get("max_id", 0) if entry else 0
+                segments[month] = self._entry(name, closed, *self._read_segment({"file": name, "closed": closed}), max_id)
+                changed = True
+        return changed
+
+    def _upgrade(self, segments):
+        """
+        Numbers the transactions of segments written before transactions had
+        IDs, in month order as loads number them, returning True if any
+        segment was rewritten. The caller holds the manifest's lock.
+        """
+        legacy = sorted(month for month, entry in segments.items() if "max_id" not in entry)
+        next_id = self._next_id(segments)
+        for month in legacy:
+            entry = segments[month]
+            _, transactions = self._read_segment(entry)
+            ids = array("q", range(next_id, next_id + len(transactions)))
+            segments[month] = self._write_segment(month, ids, transactions, entry["closed"])
+            next_id += len(transactions)
+        return bool(legacy)
+
+    def _next_id(self, segments):
+        """Returns the ID the next appended transaction gets."""
+        return max((entry.get("max_id", 0) for entry in segments.values()), default=0) + 1
+
+    def _write_manifest(self, segments):
+        """Persists the manifest and keeps it cached."""
+        path = self._path("manifest.json")
+        with _atomic_open(path) as file:
+            json.dump({"version": 2, "segments": dict(sorted(segments.items()))}, file)
+        _cache_put("manifest", path, _file_key(path), segments)
+
+    def _close_months(self, segments):
+        """Compresses open segments of months that have ended."""
+        current = datetime.date.today().isoformat()[:7]
+        for month, entry in segments.items():
+            if not entry["closed"] and month < current:
+                segments[month] = self._rewrite_segment(month, entry, closed=True)
+
+    # --- StorageBackend ---
+
+    def load_transactions(self):
+        segments = self._load_manifest()
+        key = self.ledger_key()
+        transactions = _cache_get("partitioned-transactions", self._directory(), key)
+        if transactions is None:
+            transactions = [t for month in sorted(segments) for t in self._read_segment(segments[month])[1]]
+            _cache_put("partitioned-transactions", self._directory(), key, transactions)
+        return transactions
+
+    def save_transactions(self, transactions):
+        """Replaces every transaction, numbering them from 1 in the order given."""
+        os.makedirs(self._directory(), exist_ok=True)
+        by_month = {}
+        for transaction_id, transaction in enumerate(transactions, 1):
+            ids, rows = by_month.setdefault(transaction["date"][:7], (array("q"), []))
+            ids.append(transaction_id)
+            rows.append(transaction)
+        current = datetime.date.today().isoformat()[:7]
+        with _locked(self._path("manifest.json")):
+            segments = self._load_manifest(repair=True)
+            for month in set(segments) - set(by_month):
+                os.remove(self._path(segments[month]["file"]))
+            segments = {
+                month: self._write_segment(month, ids, rows, closed=month < current)
+                for month, (ids, rows) in sorted(by_month.items())
+            }
+            self._write_manifest(segments)
+            loaded = [t for month in sorted(by_month) for t in by_month[month][1]]
+            _cache_put("partitioned-transactions", self._directory(), self.ledger_key(), loaded)
+
+    def append_transactions(self, transactions):
+        os.makedirs(self._directory(), exist_ok=True)
+        _group_commit(transactions, self._write_appended)
+
+    def _write_appended(self, transactions):
+        """Numbers appended transactions and writes them into their segments, holding the manifest's lock."""
+        with _locked(self._path("manifest.json")):
+            segments = self._load_manifest(repair=True)
+            self._upgrade(segments)
+            old_key = self.ledger_key()
+            next_id = self._next_id(segments)
+            by_month = {}
+            for number, transaction in enumerate(transactions):
+                by_month.setdefault(transaction["date"][:7], []).append(dict(transaction, id=next_id + number, op=""))
+            # Appending to the latest month keeps the load order, so cached ledgers can be extended.
+            in_order = not segments or min(by_month) >= max(segments)
+
+            for month, records in sorted(by_month.items()):
+                self._write_records(segments, month, records)
+            self._close_months(segments)
+            self._write_manifest(segments)
+
+            key = self.ledger_key()
+            # Segments load in month order, so cached ledgers gain the batch in that order too.
+            appended = [record for month in sorted(by_month) for record in by_month[month]]
+            for kind in ("partitioned-transactions", "partitioned-store"):
+                cached = _cache_get(kind, self._directory(), old_key)
+                if cached is None or not in_order:
+                    _cache.pop((kind, self._directory()), None)
+                    continue
+                if kind == "partitioned-transactions":
+                    cached.extend(map(_transaction, appended))
+                else:
+                    for record in appended:
+                        cached.append(record, record["id"])
+                _cache_put(kind, self._directory(), key, cached)
+
+    def amend_transaction(self, transaction_id, transaction):
+        self._change(int(transaction_id), transaction)
+
+    def delete_transaction(self, transaction_id):
+        self._change(int(transaction_id), None)
+
+    def _change(self, transaction_id, transaction):
+        """
+        Amends a transaction, or deletes it when `transaction` is None, by
+        writing records to the segments of its old and new months only.
+        """
+        with _locked(self._path("manifest.json")):
+            segments = self._load_manifest(repair=True)
+            if self._upgrade(segments):
+                self._write_manifest(segments)
+            old_key = self.ledger_key()
+            store = self.load_transaction_store()
+            index = store.index_of(transaction_id)
+            old = store.row(index)
+            month = old["date"][:7]
+            if transaction is not None and transaction["date"][:7] == month:
+                self._write_records(segments, month, [dict(transaction, id=transaction_id, op="amend")], [old])
+            else:
+                self._write_records(segments, month, [{"id": transaction_id, "op": "delete"}], [old])
+                if transaction is not None:
+                    # The transaction moves to the segment of its new month
+                    self._write_records(segments, transaction["date"][:7], [dict(transaction, id=transaction_id, op="")])
+            self._write_manifest(segments)
+
+            _cache.pop(("partitioned-transactions", self._directory()), None)
+            if _cache_get("partitioned-store", self._directory(), old_key) is not store:
+                return
+            if transaction is None:
+                store.delete(transaction_id)
+            elif transaction["date"][:7] == month:
+                store.amend(transaction_id, transaction)
+            else:
+                del _cache[("partitioned-store", self._directory())]  # Its rows are no longer in month order
+                return
+            _cache_put("partitioned-store", self._directory(), self.ledger_key(), store)
+
+    def load_transaction_store(self):
+        key = self.ledger_key()
+        store = _cache_get("partitioned-store", self._directory(), key)
+        if store is None:
+            store = self._build_store(sorted(self._load_manifest()))
+            _cache_put("partitioned-store", self._directory(), key, store)
+        return store
+
+    def load_transaction_store_between(self, start=None, end=None):
+        segments = self._load_manifest()
+        first = start.isoformat()[:7] if start else None
+        last = (end - datetime.timedelta(days=1)).isoformat()[:7] if end else None
+        months = [
+            month for month in sorted(segments)
+            if (first is None or month >= first) and (last is None or month <= last)
+        ]
+        if len(months) == len(segments):
+            return self.load_transaction_store()
+        return self._build_store(months)
+
+    def _build_store(self, months):
+        """Builds a store from the segments of `months`, in order."""
+        segments = self._load_manifest()
+        store = TransactionStore()
+        for month in months:
+            for transaction_id, transaction in zip(*self._read_segment(segments[month])):
+                store.append(transaction, transaction_id or None)
+        return store
+
+    def load_monthly_index(self):
+        return {
+            (int(month[:4]), int(month[5:])): {(t, c, *currency): a for t, c, a, *currency in entry["totals"]}
+            for month, entry in self._load_manifest().items()
+            if entry["rows"]
+        }
+
+    def month_sums(self, year, month):
+        entry = self._load_manifest().get(f"{year:04d}-{month:02d}")
+        return {(t, c, *currency): a for t, c, a, *currency in entry["totals"]} if entry else {}
+
+    def has_transactions(self):
+        return any(entry["rows"] for entry in self._load_manifest().values())
+
+    def ledger_key(self):
+        return _file_key(self._path("manifest.json"))
+
+    def compact(self):
+        """Rewrites open segments without torn rows, amend records and tombstones, and compresses ended months."""
+        if not os.path.isdir(self._directory()):
+            return
+        with _locked(self._path("manifest.json")):
+            segments = self._load_manifest(repair=True)
+            self._upgrade(segments)
+            for month, entry in segments.items():
+                if not entry["closed"]:
+                    segments[month] = self._rewrite_segment(month, entry)
+            self._close_months(segments)
+            self._write_manifest(segments)
+
+    def load_budgets(self):
+        return _csv_load_budgets()
+
+    def save_budgets(self, budgets):
+        _csv_save_budgets(budgets)
+
+
+BACKENDS = {"csv": CsvBackend, "sqlite": SqliteBackend, "partitioned": PartitionedBackend}
+
+_backend = None
+
+
+def get_backend():
+    """Returns the active storage backend, chosen by FINANCE_TRACKER_BACKEND (default "csv")."""
+    global _backend
+    if _backend is None:
+        name = os.environ.get("FINANCE_TRACKER_BACKEND", "csv")
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown storage backend: {name}")
+        _backend = BACKENDS[name]()
+    return _backend
+
+
+def set_backend(backend):
+    """Selects the storage backend, given as a name from BACKENDS or an instance."""
+    global _backend
+    _backend = BACKENDS[backend]() if isinstance(backend, str) else backend
+
+
+@timed("database.load_transactions")
+def load_transactions():
+    """
+    Loads transactions from the active storage backend.
+
+    The list may be shared through the process-wide cache, so callers must not
+    modify it; write through save_transactions() or append_transactions() instead.
+    """
+    return get_backend().load_transactions()
+
+
+@timed("database.save_transactions", rows=argument_rows)
+def save_transactions(transactions):
+    """Saves all transactions, replacing the stored ledger."""
+    get_backend().save_transactions(transactions)
+
+
+@timed("database.append_transaction", rows=lambda args, result: 1)
+def append_transaction(transaction):
+    """Appends a single transaction to the ledger."""
+    get_backend().append_transactions([transaction])
+
+
+@timed("database.append_transactions", rows=argument_rows)
+def append_transactions(transactions):
+    """Appends a batch of transactions to the ledger in one write."""
+    get_backend().append_transactions(transactions)
+
+
+def get_transaction(transaction_id):
+    """Returns the transaction with ID `transaction_id`, raising ValueError if there is none."""
+    return get_backend().get_transaction(transaction_id)
+
+
+@timed("database.amend_transaction", rows=lambda args, result: 1)
+def amend_transaction(transaction_id, transaction):
+    """Replaces the transaction with ID `transaction_id`, raising ValueError if there is none."""
+    get_backend().amend_transaction(transaction_id, transaction)
+
+
+@timed("database.delete_transaction", rows=lambda args, result: 1)
+def delete_transaction(transaction_id):
+    """Deletes the transaction with ID `transaction_id`, raising ValueError if there is none."""
+    get_backend().delete_transaction(transaction_id)
+
+
+@timed("database.load_transaction_store")
+def load_transaction_store():
+    """Loads transactions into a TransactionStore, shared until the ledger changes."""
+    return get_backend().load_transaction_store()
+
+
+@timed("database.load_transaction_store_between")
+def load_transaction_store_between(start=None, end=None):
+    """
+    Loads a store holding at least the transactions dated in [start, end)
+    (dates; None is unbounded). Callers still filter by date.
+    """
+    return get_backend().load_transaction_store_between(start, end)
+
+
+@timed("database.load_monthly_index")
+def load_monthly_index():
+    """Loads running totals in the base currency, keyed by (year, month) and then by (type, category)."""
+    index = get_backend().load_monthly_index()
+    if not any(len(key) > 2 for sums in index.values() for key in sums):
+        return index
+    rates = load_fx_rates()
+    return {(year, month): _month_in_base(sums, year, month, rates) for (year, month), sums in index.items()}
+
+
+@timed("database.monthly_sums")
+def monthly_sums(year, month):
+    """Returns {(type, category): total} in the base currency for one month."""
+    sums = get_backend().month_sums(year, month)
+    if not any(len(key) > 2 for key in sums):
+        return sums
+    return _month_in_base(sums, year, month, load_fx_rates())
+
+
+def _month_in_base(sums, year, month, rates):
+    """
+    Merges a month's totals in other currencies, converted at the month's
+    rate, into its base-currency totals. Currencies without rates are left
+    out with a warning.
+    """
+    merged = {key: amount for key, amount in sums.items() if len(key) == 2}
+    foreign = {}
+    for key, amount in sums.items():
+        if len(key) > 2:
+            foreign.setdefault(key[2], []).append((key[:2], amount))
+    for currency, totals in foreign.items():
+        try:
+            converted = converted_totals(rates, currency, year, month, tuple(sorted(totals)))
+        except ValueError as e:
+            console.print(f"[bold yellow]Warning: Leaving {currency} amounts out of the totals: {e}[/bold yellow]")
+            continue
+        for key, amount in converted:
+            merged[key] = merged.get(key, 0) + amount
+    return merged
+
+
+def monthly_totals(year, month, transaction_type):
+    """Returns {category: total} for one transaction type in one month."""
+    sums = monthly_sums(year, month)
+    return {category: amount for (type_, category), amount in sums.items() if type_ == transaction_type}
+
+
+def has_transactions():
+    """Returns True if the ledger holds at least one transaction."""
+    return get_backend().has_transactions()
+
+
+def ledger_key():
+    """Returns a value that changes whenever the stored ledger changes."""
+    return get_backend().ledger_key()
+
+
+def compact_transactions():
+    """Compacts the stored ledger."""
+    get_backend().compact()
+
+
+def migrate_ledger(source, target):
+    """
+    Copies the ledger and budgets from one backend to another, given as
+    names from BACKENDS or instances, and returns the number of transactions.
+    The source is left untouched.
+    """
+    source = BACKENDS[source]() if isinstance(source, str) else source
+    target = BACKENDS[target]() if isinstance(target, str) else target
+    transactions = source.load_transactions()
+    target.save_transactions(transactions)
+    target.save_budgets(source.load_budgets())
+    return len(transactions)
+
+
+@timed("database.load_fx_rates")
+def load_fx_rates():
+    """Loads the FX rate table, sharing it until the file changes."""
+    key = _file_key(FX_RATES_FILE)
+    table = _cache_get("fx_rates", FX_RATES_FILE, key)
+    if table is not None:
+        return table
+
+    rates = []
+    try:
+        with open(FX_RATES_FILE, "r", newline="") as file:
+            for row in csv.reader(file):
+                if row:
+                    try:
+                        rates.append(parse_fx_rate(row))
+                    except (ValueError, IndexError) as e:
+                        console.print(f"[bold yellow]Warning: Skipping corrupted FX rate row: {row}. Error: {e}[/bold yellow]")
+    except FileNotFoundError:
+        pass  # No currencies other than the base currency yet
+    except csv.Error as e:
+        console.print(f"[bold red]Error reading FX rates file: {e}[/bold red]")
+        return RateTable(rates)
+    table = RateTable(rates)
+    _cache_put("fx_rates", FX_RATES_FILE, key, table)
+    return table
+
+
+def parse_fx_rate(row):
+    """Parses a currency,date,rate row into (currency, date ordinal, rate), raising ValueError if it is invalid."""
+    currency = normalize_currency(row[0])
+    if not currency:
+        raise ValueError("the base currency has no rate")
+    rate = float(row[2])
+    if not rate > 0:
+        raise ValueError(f"invalid rate {row[2]!r}")
+    return currency, datetime.date.fromisoformat(row[1].strip()).toordinal(), rate
+
+
+def save_fx_rates(rates):
+    """Replaces the FX rate table with (currency, date ordinal, rate) rows, or a RateTable."""
+    table = rates if isinstance(rates, RateTable) else RateTable(rates)
+    try:
+        with _locked(FX_RATES_FILE), _atomic_open(FX_RATES_FILE) as file:
+            writer = csv.writer(file)
+            for currency, date, rate in table.rows():
+                writer.writerow([currency, datetime.date.fromordinal(date).isoformat(), repr(rate)])
+    except IOError as e:
+        console.print(f"[bold red]Error writing FX rates file: {e}[/bold red]")
+        return
+    _cache_put("fx_rates", FX_RATES_FILE, _file_key(FX_RATES_FILE), table)
+
+
+@timed("database.load_budgets")
+def load_budgets():
+    """Loads budgets as {category: amount}."""
+    return get_backend().load_budgets()
+
+
+@timed("database.save_budgets", rows=argument_rows)
+def save_budgets(budgets):
+    """Saves all budgets."""
+    get_backend().save_budgets(budgets)
@@ -1,100 +1,92 @@
-from rich.console import Console
 from rich.table import Table
-from collections import defaultdict
 import datetime
 import questionary
-from finace_tracker.database import load_transactions, load_budgets
+from finace_tracker import profiles
+from finace_tracker.currency import format_amount
+from finace_tracker.database import has_transactions
+from finace_tracker.features.analytics.consolidated import consolidated_report
+from finace_tracker.features.analytics.engine import monthly_report, health_score
+from finace_tracker.features.analytics.forecast import advance, forecast_month, recurring_transactions
+from finace_tracker.features.analytics.trends import category_trend, monthly_trend, rolling_average, yearly_trend
+from finace_tracker.instrumentation import timed
+from finace_tracker.console import console
+
+
+def _current_month_report():
+    """
+    Returns the analytics engine's report for the current month.
+    """
+    today = datetime.date.today()
+    return monthly_report(today.year, today.month)
 
-console = Console()
 
+@timed("analytics.spending_analysis", rows=None)
 def spending_analysis():
     """
     Analyzes spending patterns and displays insights.
     """
-    transactions = load_transactions()
-    if not transactions:
+    if not has_transactions():
         console.print("[bold yellow]No transactions available for analysis.[/bold yellow]")
         return
 
-    # Filter for expenses in the current month
-    current_month = datetime.date.today().month
-    current_year = datetime.date.today().year
-    monthly_expenses = [
-        t for t in transactions
-        if t["type"] == "Expense" and
-           datetime.date.fromisoformat(t["date"]).month == current_month and
-           datetime.date.fromisoformat(t["date"]).year == current_year
-    ]
-
-    if not monthly_expenses:
+    # Expenses in the current month, by category
+    report = _current_month_report()
+    category_spending = report["expenses_by_category"]
+
+    if not category_spending:
         console.print("[bold yellow]No expenses recorded for the current month.[/bold yellow]")
         return
 
     # 1. Breakdown by category
-    category_spending = defaultdict(int)
-    total_spending = 0
-    for t in monthly_expenses:
-        category_spending[t["category"]] += t["amount"]
-        total_spending += t["amount"]
+    total_spending = report["total_expenses"]
 
     table = Table(title=f"Spending Breakdown for {datetime.date.today().strftime('%B %Y')}")
     table.add_column("Category", style="green")
     table.add_column("Amount", justify="right", style="yellow")
     table.add_column("% of Total", justify="right", style="cyan")
 
-    for category, amount in sorted(category_spending.items(), key=lambda item: item[1], reverse=True):
+    for category, amount in category_spending.items():
         percentage = (amount / total_spending) * 100 if total_spending else 0
         table.add_row(category, f"{amount / 100:.2f}", f"{percentage:.2f}%")
 
     console.print(table)
 
     # 2. Top 3 spending categories
-    top_3 = sorted(category_spending.items(), key=lambda item: item[1], reverse=True)[:3]
+    top_3 = list(category_spending.items())[:3]
     console.print("\n[bold]Top 3 Spending Categories:[/bold]")
     for i, (category, amount) in enumerate(top_3):
         console.print(f"{i+1}. {category}: {amount / 100:.2f}")
 
     # 3. Average daily expense
-    num_days_in_month = (datetime.date.today().day)
-    avg_daily_expense = total_spending / num_days_in_month if num_days_in_month else 0
+    avg_daily_expense = report["average_daily_expense"]
     console.print(f"\n[bold]Average Daily Expense:[/bold] {avg_daily_expense / 100:.2f}")
 
 
+@timed("analytics.income_analysis", rows=None)
 def income_analysis():
     """
     Analyzes income patterns and displays insights.
     """
-    transactions = load_transactions()
-    if not transactions:
+    if not has_transactions():
         console.print("[bold yellow]No transactions available for analysis.[/bold yellow]")
         return
 
-    # Filter for income in the current month
-    current_month = datetime.date.today().month
-    current_year = datetime.date.today().year
-    monthly_income = [
-        t for t in transactions
-        if t["type"] == "Income" and
-           datetime.date.fromisoformat(t["date"]).month == current_month and
-           datetime.date.fromisoformat(t["date"]).year == current_year
-    ]
-
-    if not monthly_income:
+    # Income in the current month, by source
+    report = _current_month_report()
+    source_income = report["income_by_source"]
+
+    if not source_income:
         console.print("[bold yellow]No income recorded for the current month.[/bold yellow]")
         return
 
     # 1. Income by source
-    source_income = defaultdict(int)
-    total_income = 0
-    for t in monthly_income:
-        source_income[t["category"]] += t["amount"]
-        total_income += t["amount"]
+    total_income = report["total_income"]
 
     table = Table(title=f"Income Breakdown for {datetime.date.today().strftime('%B %Y')}")
     table.add_column("Source", style="green")
     table.add_column("Amount", justify="right", style="yellow")
 
-    for source, amount in sorted(source_income.items(), key=lambda item: item[1], reverse=True):
+    for source, amount in source_income.items():
         table.add_row(source, f"{amount / 100:.2f}")
 
     console.print(table)
@@ -103,34 +95,21 @@ def income_analysis():
     console.print(f"\n[bold]Total Income This Month:[/bold] {total_income / 100:.2f}")
 
 
+@timed("analytics.savings_analysis", rows=None)
 def savings_analysis():
     """
     Analyzes savings and displays insights.
     """
-    transactions = load_transactions()
-    if not transactions:
+    if not has_transactions():
         console.print("[bold yellow]No transactions available for analysis.[/bold yellow]")
         return
 
-    # Filter for income and expenses in the current month
-    current_month = datetime.date.today().month
-    current_year = datetime.date.today().year
-
-    monthly_income = sum(
-        t["amount"] for t in transactions
-        if t["type"] == "Income" and
-           datetime.date.fromisoformat(t["date"]).month == current_month and
-           datetime.date.fromisoformat(t["date"]).year == current_year
-    )
-    monthly_expenses = sum(
-        t["amount"] for t in transactions
-        if t["type"] == "Expense" and
-           datetime.date.fromisoformat(t["date"]).month == current_month and
-           datetime.date.fromisoformat(t["date"]).year == current_year
-    )
-
-    monthly_savings = monthly_income - monthly_expenses
-    savings_rate = (monthly_savings / monthly_income) * 100 if monthly_income else 0
+    # Income and expenses in the current month
+    report = _current_month_report()
+    monthly_income = report["total_income"]
+    monthly_expenses = report["total_expenses"]
+    monthly_savings = report["savings"]
+    savings_rate = report["savings_rate"]
 
     console.print(f"\n[bold]Savings for {datetime.date.today().strftime('%B %Y')}:[/bold]")
     console.print(f"  [green]Total Income:[/green] {monthly_income / 100:.2f}")
@@ -139,60 +118,17 @@ def savings_analysis():
     console.print(f"  [bold cyan]Savings Rate:[/bold cyan] {savings_rate:.2f}%")
 
 
+@timed("analytics.financial_health_score", rows=None)
 def financial_health_score():
     """
     Calculates and displays a financial health score.
     """
-    transactions = load_transactions()
-    budgets = load_budgets()
-
-    if not transactions:
+    if not has_transactions():
         console.print("[bold yellow]No transactions available for analysis.[/bold yellow]")
         return
 
-    # --- Calculations ---
-    current_month = datetime.date.today().month
-    current_year = datetime.date.today().year
-
-    monthly_income = sum(
-        t["amount"] for t in transactions
-        if t["type"] == "Income" and
-           datetime.date.fromisoformat(t["date"]).month == current_month and
-           datetime.date.fromisoformat(t["date"]).year == current_year
-    )
-    monthly_expenses = sum(
-        t["amount"] for t in transactions
-        if t["type"] == "Expense" and
-           datetime.date.fromisoformat(t["date"]).month == current_month and
-           datetime.date.fromisoformat(t["date"]).year == current_year
-    )
-    monthly_savings = monthly_income - monthly_expenses
-    savings_rate = (monthly_savings / monthly_income) * 100 if monthly_income else 0
-
     # --- Scoring ---
-    score = 0
-    # 1. Savings Rate (40 points)
-    if savings_rate >= 20:
-        score += 40
-    elif savings_rate >= 10:
-        score += 20
-    elif savings_rate > 0:
-        score += 10
-
-    # 2. Budget Adherence (30 points)
-    if budgets:
-        total_budgeted = sum(budgets.values())
-        if total_budgeted > 0:
-            if monthly_expenses <= total_budgeted:
-                score += 30
-            elif monthly_expenses <= total_budgeted * 1.1: # Within 10% over
-                score += 15
-
-    # 3. Income vs Expenses (30 points)
-    if monthly_income > monthly_expenses:
-        score += 30
-    elif monthly_income > monthly_expenses * 0.9: # Expenses are not more than 10% of income
-        score += 15
+    score = health_score(_current_month_report())
 
     # --- Display ---
     console.print(f"\n[bold]Financial Health Score: {score}/100[/bold]")
@@ -204,6 +140,164 @@ def financial_health_score():
         console.print("[bold red]Needs Improvement. Let's work on getting this score up.[/bold red]")
 
 
+# Trend windows offered by the Trends menu: label -> (trend function, periods)
+TREND_WINDOWS = {
+    "Last 12 Months": (monthly_trend, 12),
+    "Last 24 Months": (monthly_trend, 24),
+    "Last 5 Years": (yearly_trend, 5),
+}
+
+
+@timed("analytics.trends", rows=None)
+def trends():
+    """
+    Displays income, spending and savings-rate history with rolling averages,
+    and how spending per category moved over the same periods.
+    """
+    if not has_transactions():
+        console.print("[bold yellow]No transactions available for analysis.[/bold yellow]")
+        return
+
+    window = questionary.select("Select a period:", choices=list(TREND_WINDOWS)).ask()
+    if window is None:
+        return
+    trend, count = TREND_WINDOWS[window]
+    periods = trend(count)
+    average_expenses = rolling_average([period["expenses"] for period in periods])
+
+    table = Table(title=f"Trends: {window}")
+    table.add_column("Period", style="green")
+    table.add_column("Income", justify="right", style="green")
+    table.add_column("Expenses", justify="right", style="red")
+    table.add_column("3-Period Avg Expenses", justify="right", style="yellow")
+    table.add_column("Savings", justify="right", style="blue")
+    table.add_column("Savings Rate", justify="right", style="cyan")
+    for period, average in zip(periods, average_expenses):
+        table.add_row(
+            period["period"],
+            f"{period['income'] / 100:.2f}",
+            f"{period['expenses'] / 100:.2f}",
+            f"{average / 100:.2f}",
+            f"{period['savings'] / 100:.2f}",
+            f"{period['savings_rate']:.2f}%",
+        )
+    console.print(table)
+
+    categories = category_trend(periods)
+    if not categories:
+        return
+    table = Table(title="Spending by Category")
+    table.add_column("Category", style="green")
+    table.add_column("Average", justify="right", style="yellow")
+    table.add_column(f"Latest ({periods[-1]['period']})", justify="right", style="yellow")
+    table.add_column("Change vs Average", justify="right", style="cyan")
+    for category, amounts in sorted(categories.items(), key=lambda item: sum(item[1]), reverse=True):
+        average = sum(amounts) / len(amounts)
+        change = (amounts[-1] - average) / average * 100 if average else 0
+        color = "red" if change > 0 else "green"
+        table.add_row(category, f"{average / 100:.2f}", f"{amounts[-1] / 100:.2f}", f"[{color}]{change:+.1f}%[/{color}]")
+    console.print(table)
+
+
+@timed("analytics.forecast", rows=None)
+def forecast():
+    """
+    Displays the recurring transactions found in the ledger and the cash flow
+    they project for the rest of this month and for next month, with the
+    budgets this month is on course to overrun.
+    """
+    if not has_transactions():
+        console.print("[bold yellow]No transactions available for analysis.[/bold yellow]")
+        return
+
+    today = datetime.date.today()
+    recurring = recurring_transactions(today)
+    if not recurring:
+        console.print("[bold yellow]No recurring transactions found yet.[/bold yellow]")
+        return
+
+    table = Table(title="Recurring Transactions")
+    table.add_column("Description", style="white")
+    table.add_column("Category", style="green")
+    table.add_column("Every", style="magenta")
+    table.add_column("Amount", justify="right", style="yellow")
+    table.add_column("Next Due", style="cyan")
+    for pattern in recurring:
+        sign = "+" if pattern["type"] == "Income" else "-"
+        table.add_row(
+            pattern["description"],
+            pattern["category"],
+            pattern["period"],
+            f"{sign}{format_amount(pattern['amount'], pattern.get('currency'))}",
+            pattern["next_date"].isoformat(),
+        )
+    console.print(table)
+
+    this_month = today.replace(day=1)
+    forecasts = [forecast_month(month.year, month.month, today, recurring) for month in (this_month, advance(this_month, 0, 1))]
+    table = Table(title="Cash-Flow Forecast")
+    table.add_column("", style="bold")
+    for month_forecast in forecasts:
+        table.add_column(month_forecast["month"], justify="right")
+    for label, key, style in (
+        ("Recorded Income", "recorded_income", "green"),
+        ("Expected Income", "expected_income", "green"),
+        ("Recorded Expenses", "recorded_expenses", "red"),
+        ("Expected Expenses", "expected_expenses", "red"),
+        ("Net", "net", "blue"),
+    ):
+        table.add_row(label, *(f"[{style}]{month_forecast[key] / 100:.2f}[/{style}]" for month_forecast in forecasts))
+    console.print(table)
+
+    for overrun in forecasts[0]["overruns"]:
+        console.print(
+            f"[bold red]{overrun['category']} is on course to end the month at {overrun['projected'] / 100:.2f}, "
+            f"{overrun['overrun'] / 100:.2f} over its budget of {overrun['budget'] / 100:.2f}.[/bold red]"
+        )
+
+
+# Consolidated report periods: label -> first day, counted back from the first of next month
+CONSOLIDATED_PERIODS = {
+    "This Month": lambda today: today.replace(day=1),
+    "This Year": lambda today: today.replace(month=1, day=1),
+}
+
+
+@timed("analytics.consolidated", rows=None)
+def consolidated():
+    """
+    Displays income, spending and savings summed over every account of every
+    profile, with a row per account.
+    """
+    period = questionary.select("Select a period:", choices=list(CONSOLIDATED_PERIODS)).ask()
+    if period is None:
+        return
+    today = datetime.date.today()
+    end = advance(today.replace(day=1), 0, 1)
+    report = consolidated_report(CONSOLIDATED_PERIODS[period](today), end)
+
+    table = Table(title=f"Consolidated Report: {period}")
+    table.add_column("Profile", style="green")
+    table.add_column("Income", justify="right", style="green")
+    table.add_column("Expenses", justify="right", style="red")
+    table.add_column("Savings", justify="right", style="blue")
+    for shard in report["shards"]:
+        table.add_row(
+            profiles.shard_name(shard["profile"], shard["account"]),
+            f"{shard['income'] / 100:.2f}",
+            f"{shard['expenses'] / 100:.2f}",
+            f"{shard['savings'] / 100:.2f}",
+        )
+    table.add_row(
+        "[bold]Total[/bold]",
+        f"[bold]{report['total_income'] / 100:.2f}[/bold]",
+        f"[bold]{report['total_expenses'] / 100:.2f}[/bold]",
+        f"[bold]{report['savings'] / 100:.2f}[/bold]",
+    )
+    console.print(table)
+    console.print(f"[bold cyan]Savings Rate:[/bold cyan] {report['savings_rate']:.2f}%")
+
+
 def analytics_menu():
     """
     Displays the menu for financial analytics.
@@ -211,7 +305,7 @@ def analytics_menu():
     while True:
         choice = questionary.select(
             "Financial Analytics",
-            choices=["Spending Analysis", "Income Analysis", "Savings Analysis", "Financial Health Score", "Back to Main Menu"],
+            choices=["Spending Analysis", "Income Analysis", "Savings Analysis", "Financial Health Score", "Trends", "Forecast", "Consolidated Report", "Back to Main Menu"],
         ).ask()
 
         if choice == "Spending Analysis":
@@ -222,5 +316,11 @@ def analytics_menu():
             savings_analysis()
         elif choice == "Financial Health Score":
             financial_health_score()
+        elif choice == "Trends":
+            trends()
+        elif choice == "Forecast":
+            forecast()
+        elif choice == "Consolidated Report":
+            consolidated()
         elif choice == "Back to Main Menu" or choice is None:
             break
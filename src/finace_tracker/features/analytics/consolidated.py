@@ -0,0 +1,84 @@
+"""
+Consolidated reports across profiles and accounts.
+
+Each ledger shard (see profiles.py) already keeps a month rollup, its
+monthly index. A consolidated report asks every shard only for the months
+in range and merges those small dicts, so no ledger is loaded into memory.
+With many shards the rollups are read by forked worker processes, each
+activating one shard at a time; a few shards are read serially.
+"""
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from finace_tracker import profiles
+from finace_tracker.database import load_budgets, load_monthly_index
+from finace_tracker.features.analytics.engine import _report
+from finace_tracker.features.analytics.parallel import _can_fork, worker_count
+from finace_tracker.instrumentation import timed
+
+# Fewer shards are rolled up serially; forking would cost more
+PARALLEL_MIN_SHARDS = 8
+
+
+def _in_range(year, month, start, end):
+    """Returns True if the month overlaps [start, end)."""
+    return (start.year, start.month) <= (year, month) and datetime.date(year, month, 1) < end
+
+
+def _shard_rollup(shard, start, end):
+    """
+    Sums one shard's monthly index over the months overlapping [start, end),
+    returning {"profile", "account", "sums", "budgets"}.
+    """
+    profile, account = shard
+    with profiles.using(profile, account):
+        sums = {}
+        for (year, month), totals in load_monthly_index().items():
+            if _in_range(year, month, start, end):
+                for key, amount in totals.items():
+                    sums[key] = sums.get(key, 0) + amount
+        budgets = load_budgets()
+    return {"profile": profile, "account": account, "sums": sums, "budgets": budgets}
+
+
+@timed("analytics.consolidated_report", rows=None)
+def consolidated_report(start, end, shards=None, workers=None):
+    """
+    Computes every metric over the shards (default: every account of every
+    profile) for the months overlapping [start, end), with a per-shard
+    breakdown under "shards". Budgets belong to a profile, so each
+    profile's budgets count once, scaled by the number of months covered.
+    """
+    shards = profiles.list_shards() if shards is None else shards
+    workers = min(worker_count(workers), len(shards))
+    if workers <= 1 or len(shards) < PARALLEL_MIN_SHARDS or not _can_fork():
+        rollups = [_shard_rollup(shard, start, end) for shard in shards]
+    else:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            rollups = list(pool.map(_shard_rollup, shards, [start] * len(shards), [end] * len(shards)))
+
+    sums = {}
+    budgets_by_profile = {}
+    breakdown = []
+    for rollup in rollups:
+        for key, amount in rollup["sums"].items():
+            sums[key] = sums.get(key, 0) + amount
+        budgets_by_profile.setdefault(rollup["profile"], rollup["budgets"])
+        income = sum(amount for (type_, _), amount in rollup["sums"].items() if type_ == "Income")
+        expenses = sum(amount for (type_, _), amount in rollup["sums"].items() if type_ == "Expense")
+        breakdown.append({
+            "profile": rollup["profile"],
+            "account": rollup["account"],
+            "income": income,
+            "expenses": expenses,
+            "savings": income - expenses,
+        })
+
+    months = (end.year - start.year) * 12 + end.month - start.month + (1 if end.day > 1 else 0)
+    budgets = {}
+    for profile_budgets in budgets_by_profile.values():
+        for category, amount in profile_budgets.items():
+            budgets[category] = budgets.get(category, 0) + amount * months
+    report = _report(sums, budgets, (end - start).days)
+    report["shards"] = breakdown
+    return report
@@ -0,0 +1,285 @@
+import datetime
+import heapq
+import threading
+import weakref
+import numpy as np
+from finace_tracker.currency import to_base
+from finace_tracker.database import load_fx_rates, load_transaction_store, monthly_sums, load_budgets
+from finace_tracker.instrumentation import timed
+
+# Months are counted from January 1970, as NumPy's datetime64[M] does
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# Base-currency amounts of stores with rows in other currencies: store -> (rows, revision, rates, amounts)
+_base_amounts = weakref.WeakKeyDictionary()
+_base_amounts_lock = threading.Lock()
+
+
+def _columns(store):
+    """
+    Wraps the store's columns in NumPy arrays, with amounts in the base
+    currency. The columns are not copied unless some rows are in another
+    currency.
+    """
+    dates = np.frombuffer(store.column("date"), dtype=np.int32)
+    amounts = np.frombuffer(store.column("amount"), dtype=np.int64)
+    if store.has_foreign_currency():
+        amounts = _amounts_in_base(store, dates, amounts)
+    return (
+        dates,
+        np.frombuffer(store.column("type"), dtype=np.uint8),
+        np.frombuffer(store.column("category"), dtype=np.uint16),
+        amounts,
+    )
+
+
+def _amounts_in_base(store, dates, amounts):
+    """
+    Returns a copy of the amount column with rows in other currencies
+    converted at their month's rate, kept until the store or the rates
+    change. Rows in a currency without rates count as zero.
+    """
+    rates = load_fx_rates()
+    with _base_amounts_lock:
+        cached = _base_amounts.get(store)
+        if cached is not None and cached[:3] == (len(store), store.revision, rates):
+            return cached[3]
+
+    converted = amounts.copy()
+    currencies = np.frombuffer(store.column("currency"), dtype=np.uint8)
+    for code, currency in enumerate(store.pools["currency"].strings):
+        if not currency:
+            continue
+        rows = np.flatnonzero(currencies == code)
+        if not len(rows):
+            continue
+        months = (dates[rows].astype(np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        unique, inverse = np.unique(months, return_inverse=True)
+        try:
+            factors = np.array([rates.month_rate(currency, 1970 + int(month) // 12, int(month) % 12 + 1) for month in unique])
+        except ValueError:
+            factors = np.zeros(len(unique))
+        converted[rows] = np.rint(amounts[rows] * factors[inverse]).astype(np.int64)
+    with _base_amounts_lock:
+        _base_amounts[store] = (len(store), store.revision, rates, converted)
+    return converted
+
+
+def _code_sums(store, start=None, end=None):
+    """
+    Sums amounts by (type, category) over date ordinals in [start, end) in one
+    vectorized pass, returning {(type code, category code): total}.
+    """
+    dates, types, categories, amounts = _columns(store)
+    if start is not None or end is not None:
+        mask = np.ones(len(dates), dtype=bool)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates < end
+        types, categories, amounts = types[mask], categories[mask], amounts[mask]
+
+    # Group by a combined (type, category) code; np.add.at keeps the sums in exact integers.
+    num_categories = len(store.pools["category"])
+    keys = types.astype(np.int64) * num_categories + categories
+    sums = np.zeros(len(store.pools["type"]) * num_categories, dtype=np.int64)
+    np.add.at(sums, keys, amounts)
+    return {(int(key) // num_categories, int(key) % num_categories): int(sums[key]) for key in np.flatnonzero(sums)}
+
+
+def _decode_sums(store, sums):
+    """Turns {(type code, category code): total} into {(type, category): total}."""
+    return {
+        (store.decode("type", type_code), store.decode("category", category_code)): amount
+        for (type_code, category_code), amount in sums.items()
+        if amount
+    }
+
+
+def _category_sums(store, start=None, end=None):
+    """
+    Sums amounts by (type, category) over date ordinals in [start, end),
+    returning {(type, category): total}.
+    """
+    return _decode_sums(store, _code_sums(store, start, end))
+
+
+def _report(sums, budgets, days):
+    """Builds a report dict from {(type, category): total} sums."""
+    expenses = {category: amount for (type_, category), amount in sums.items() if type_ == "Expense"}
+    income = {category: amount for (type_, category), amount in sums.items() if type_ == "Income"}
+    total_income = sum(income.values())
+    total_expenses = sum(expenses.values())
+    savings = total_income - total_expenses
+
+    budget_status = []
+    for category, budget in budgets.items():
+        spent = expenses.get(category, 0)
+        budget_status.append({
+            "category": category,
+            "budget": budget,
+            "spent": spent,
+            "remaining": budget - spent,
+            "utilization": (spent / budget) * 100 if budget else 0,
+        })
+
+    return {
+        "expenses_by_category": dict(sorted(expenses.items(), key=lambda item: item[1], reverse=True)),
+        "income_by_source": dict(sorted(income.items(), key=lambda item: item[1], reverse=True)),
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "savings": savings,
+        "savings_rate": (savings / total_income) * 100 if total_income else 0,
+        "average_daily_expense": total_expenses / days if days else 0,
+        "total_budgeted": sum(budgets.values()),
+        "budgets": budget_status,
+    }
+
+
+@timed("analytics.build_report", rows=None)
+def build_report(store=None, budgets=None, start=None, end=None):
+    """
+    Computes every metric for transactions dated in [start, end) with one pass
+    over the store's columns. `start` and `end` are dates; None means unbounded.
+    """
+    store = load_transaction_store() if store is None else store
+    budgets = load_budgets() if budgets is None else budgets
+    sums = _category_sums(
+        store,
+        start.toordinal() if start else None,
+        end.toordinal() if end else None,
+    )
+    days = (end - start).days if start and end else 0
+    return _report(sums, budgets, days)
+
+
+@timed("analytics.monthly_report", rows=None)
+def monthly_report(year, month, budgets=None):
+    """
+    Computes every metric for one month from the storage backend's monthly
+    aggregates, without touching individual transactions.
+    """
+    budgets = load_budgets() if budgets is None else budgets
+    today = datetime.date.today()
+    if (year, month) == (today.year, today.month):
+        days = today.day
+    else:
+        first_day = datetime.date(year, month, 1)
+        days = ((first_day + datetime.timedelta(days=32)).replace(day=1) - first_day).days
+    return _report(monthly_sums(year, month), budgets, days)
+
+
+def health_score(report):
+    """Scores a report from 0 to 100 on savings rate, budget adherence and cash flow."""
+    score = 0
+    # 1. Savings Rate (40 points)
+    if report["savings_rate"] >= 20:
+        score += 40
+    elif report["savings_rate"] >= 10:
+        score += 20
+    elif report["savings_rate"] > 0:
+        score += 10
+
+    # 2. Budget Adherence (30 points)
+    total_budgeted = report["total_budgeted"]
+    if total_budgeted > 0:
+        if report["total_expenses"] <= total_budgeted:
+            score += 30
+        elif report["total_expenses"] <= total_budgeted * 1.1: # Within 10% over
+            score += 15
+
+    # 3. Income vs Expenses (30 points)
+    if report["total_income"] > report["total_expenses"]:
+        score += 30
+    elif report["total_income"] > report["total_expenses"] * 0.9: # Expenses are not more than 10% of income
+        score += 15
+    return score
+
+
+@timed("analytics.recent_transactions")
+def recent_transactions(store=None, count=10):
+    """Returns the `count` most recent transactions, newest first."""
+    store = load_transaction_store() if store is None else store
+    dates = np.frombuffer(store.column("date"), dtype=np.int32)
+    if len(dates) > count:
+        candidates = np.argpartition(dates, len(dates) - count)[-count:]
+    else:
+        candidates = np.arange(len(dates))
+    newest_first = candidates[np.argsort(dates[candidates], kind="stable")[::-1]]
+    return [store.row(int(index)) for index in newest_first]
+
+
+class LedgerSummary:
+    """
+    All-time totals and the most recent transactions of a ledger, kept up to
+    date as rows are appended.
+
+    refresh() only visits rows added since the last call when it is given the
+    same store grown in place (as load_transaction_store() does for appends),
+    and rebuilds from the columns otherwise, including after rows were
+    amended or deleted in place. Recent rows are kept in a heap
+    bounded by `recent_count`.
+    """
+
+    def __init__(self, recent_count=10):
+        self.recent_count = recent_count
+        self.store = None
+        self.rows = 0
+        self.revision = 0
+        self.sums = {}
+        self._recent = []
+        self._lock = threading.Lock()
+
+    def refresh(self, store=None):
+        """Brings the summary up to date with `store` (default: the current ledger)."""
+        store = load_transaction_store() if store is None else store
+        with self._lock:
+            if store is not self.store or store.revision != self.revision or len(store) < self.rows:
+                self._rebuild(store)
+            elif len(store) > self.rows:
+                self._extend(store)
+        return self
+
+    def _rebuild(self, store):
+        """Recomputes every total from the store's columns."""
+        self.store = store
+        self.sums = _code_sums(store)
+        dates = store.column("date")
+        if len(store) > self.recent_count:
+            newest = np.argpartition(np.frombuffer(dates, dtype=np.int32), len(store) - self.recent_count)[-self.recent_count:]
+        else:
+            newest = range(len(store))
+        self._recent = [(dates[int(index)], int(index)) for index in newest]
+        heapq.heapify(self._recent)
+        self.rows = len(store)
+        self.revision = store.revision
+
+    def _extend(self, store):
+        """Adds the rows appended since the last refresh."""
+        dates, types, categories, amounts, currencies = (
+            store.column(name) for name in ("date", "type", "category", "amount", "currency")
+        )
+        for index in range(self.rows, len(store)):
+            key = (types[index], categories[index])
+            amount = amounts[index]
+            currency = store.decode("currency", currencies[index])
+            if currency:
+                try:
+                    amount = to_base(amount, currency, datetime.date.fromordinal(dates[index]))
+                except ValueError:
+                    amount = 0  # No rates for the currency, as in _columns()
+            self.sums[key] = self.sums.get(key, 0) + amount
+            if len(self._recent) < self.recent_count:
+                heapq.heappush(self._recent, (dates[index], index))
+            elif (dates[index], index) > self._recent[0]:
+                heapq.heapreplace(self._recent, (dates[index], index))
+        self.rows = len(store)
+
+    def report(self, budgets=None):
+        """Returns the all-time report, as build_report() would compute it."""
+        budgets = load_budgets() if budgets is None else budgets
+        return _report(_decode_sums(self.store, self.sums), budgets, 0)
+
+    def recent(self):
+        """Returns the most recent transactions, newest first."""
+        return [self.store.row(index) for _, index in sorted(self._recent, reverse=True)]
@@ -0,0 +1,434 @@
+"""
+Recurring-transaction detection and cash-flow forecasts.
+
+Transactions share a signature when they have the same type, category and
+currency and their descriptions normalize to the same text (lowercase, digits and
+punctuation dropped), hashed so signatures are small fixed-size keys. Each
+signature keeps its most recent dates and amounts, sorted by date, and how
+often it occurred. A signature recurs when its recent dates fall at a
+regular weekly, fortnightly, monthly, quarterly or yearly interval and its
+recent amounts are similar.
+
+Detection is incremental: refresh() only visits rows appended since the
+last call, and patterns are re-detected only for the signatures that gained
+rows, each from a bounded number of recent occurrences. The detector for
+the ledger is persisted next to the transactions file, so a new process
+only files the rows appended since it was saved. Checking a new
+transaction therefore costs the same on any size of ledger.
+"""
+import calendar
+import datetime
+import hashlib
+import marshal
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from statistics import median
+from finace_tracker.currency import base_amount
+from finace_tracker.database import (
+    ledger_key,
+    load_budgets,
+    load_fx_rates,
+    load_transaction_store,
+    monthly_sums,
+    sidecar_path,
+    write_sidecar,
+)
+from finace_tracker.instrumentation import timed
+from finace_tracker.console import console
+
+DETECTOR_VERSION = 1
+
+# Recurrence periods: (shortest and longest interval in days, step in days, step in months)
+PERIODS = {
+    "weekly": (6, 8, 7, 0),
+    "fortnightly": (13, 15, 14, 0),
+    "monthly": (27, 33, 0, 1),
+    "quarterly": (86, 96, 0, 3),
+    "yearly": (355, 375, 0, 12),
+}
+
+# Occurrences needed before a signature can count as recurring
+MIN_OCCURRENCES = 3
+
+# Only the latest occurrences are examined, keeping detection constant-time per signature
+RECENT_OCCURRENCES = 12
+
+# Share of recent intervals and amounts that must fit the pattern
+REGULARITY = 0.75
+
+# How far an amount may stray from the signature's median amount
+AMOUNT_TOLERANCE = 0.25
+
+_NOISE = re.compile(r"[\d\W_]+")
+
+# The detector for the current ledger, kept warm between calls
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def normalize_description(description):
+    """Reduces a description to the words that stay the same between occurrences."""
+    return " ".join(_NOISE.sub(" ", description.lower()).split())
+
+
+def description_hash(description):
+    """Hashes the normalized form of a description into a 64-bit signature part."""
+    digest = hashlib.blake2b(normalize_description(description).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def advance(date, days, months):
+    """Returns `date` moved on by one period step, keeping the day of the month where it can."""
+    if not months:
+        return date + datetime.timedelta(days=days)
+    month = date.year * 12 + date.month - 1 + months
+    year, month = month // 12, month % 12 + 1
+    return datetime.date(year, month, min(date.day, calendar.monthrange(year, month)[1]))
+
+
+def detect_pattern(dates, amounts):
+    """
+    Returns {"period", "interval", "amount"} if dates (sorted ordinals) recur
+    regularly with similar amounts, else None. Only the most recent
+    RECENT_OCCURRENCES are examined.
+    """
+    dates, amounts = dates[-RECENT_OCCURRENCES:], amounts[-RECENT_OCCURRENCES:]
+    if len(dates) < MIN_OCCURRENCES:
+        return None
+    intervals = [later - earlier for earlier, later in zip(dates, dates[1:])]
+    interval = median(intervals)
+    for period, (shortest, longest, _, _) in PERIODS.items():
+        if shortest <= interval <= longest:
+            break
+    else:
+        return None
+    if sum(shortest <= gap <= longest for gap in intervals) < REGULARITY * len(intervals):
+        return None
+    typical = median(amounts)
+    if sum(abs(amount - typical) <= AMOUNT_TOLERANCE * abs(typical) for amount in amounts) < REGULARITY * len(amounts):
+        return None
+    return {"period": period, "interval": round(interval), "amount": round(median(amounts[-3:]))}
+
+
+class RecurringDetector:
+    """
+    Groups a ledger's rows by signature and finds the signatures that recur.
+
+    refresh() only visits rows added since the last call when it is given the
+    same store grown in place, like LedgerSummary.refresh(), and rebuilds
+    otherwise, including after rows were amended or deleted. A saved
+    detector records how many rows it filed and a digest of them, like the
+    search index, so it is reused only while those rows are unchanged.
+    """
+
+    def __init__(self):
+        self.store = None
+        self.rows = 0
+        self.revision = 0
+        # Pool sizes and digest of the filed rows, set when the detector is saved
+        self.strings = {}
+        self.digest = None
+        # Signature -> [recent date ordinals, their amounts, row of the latest occurrence, occurrences]
+        self.series = {}
+        # True once rows were filed that the saved detector lacks
+        self.unsaved = False
+        # Description code -> description hash, so each distinct description is hashed once
+        self._hashes = {}
+        self._patterns = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def refresh(self, store=None):
+        """Brings the detector up to date with `store` (default: the current ledger)."""
+        store = load_transaction_store() if store is None else store
+        with self._lock:
+            if store is not self.store or store.revision != self.revision or len(store) < self.rows:
+                self.store = store
+                self.revision = store.revision
+                self.rows = 0
+                self.series = {}
+                self._hashes = {}
+                self._patterns = {}
+                self._dirty = set()
+            self._add_rows(store)
+        return self
+
+    def adopt(self, store):
+        """Takes `store` as the one the filed rows came from, returning False if they are not its first rows."""
+        if self.digest is None or self.rows > len(store):
+            return False
+        if any(count > len(store.pools[name]) for name, count in self.strings.items()):
+            return False
+        if store.prefix_digest(self.rows, self.strings) != self.digest:
+            return False
+        self.store = store
+        self.revision = store.revision
+        return True
+
+    def _add_rows(self, store):
+        """Files the rows from self.rows on under their signatures."""
+        dates, types, categories, currencies, amounts, descriptions = (
+            store.column(name) for name in ("date", "type", "category", "currency", "amount", "description")
+        )
+        for index in range(self.rows, len(store)):
+            code = descriptions[index]
+            hashed = self._hashes.get(code)
+            if hashed is None:
+                hashed = self._hashes[code] = description_hash(store.decode("description", code))
+            signature = (types[index], categories[index], currencies[index], hashed)
+            series = self.series.get(signature)
+            if series is None:
+                series = self.series[signature] = [array("i"), array("q"), index, 0]
+            # Rows usually arrive in date order, making this an append
+            position = bisect_right(series[0], dates[index])
+            series[0].insert(position, dates[index])
+            series[1].insert(position, amounts[index])
+            series[3] += 1
+            if position == len(series[0]) - 1:
+                series[2] = index
+            if len(series[0]) > RECENT_OCCURRENCES:
+                del series[0][0], series[1][0]
+            self._dirty.add(signature)
+        if len(store) > self.rows:
+            self.unsaved = True
+        self.rows = len(store)
+
+    def patterns(self):
+        """Returns a dict per recurring signature, re-detecting only signatures that changed."""
+        with self._lock:
+            for signature in self._dirty:
+                dates, amounts, row, occurrences = self.series[signature]
+                pattern = detect_pattern(dates, amounts)
+                if pattern is not None:
+                    latest = self.store.row(row)
+                    pattern.update(
+                        type=latest["type"],
+                        category=latest["category"],
+                        description=latest["description"],
+                        last_date=datetime.date.fromordinal(dates[-1]),
+                        occurrences=occurrences,
+                    )
+                    if "currency" in latest:
+                        pattern["currency"] = latest["currency"]
+                self._patterns[signature] = pattern
+            self._dirty = set()
+            return [pattern for pattern in self._patterns.values() if pattern is not None]
+
+    def save(self, key):
+        """Persists the detector for the ledger identified by `key`."""
+        with self._lock:
+            self.strings = {name: len(pool) for name, pool in self.store.pools.items()}
+            self.digest = self.store.prefix_digest(self.rows, self.strings)
+            data = {
+                "version": DETECTOR_VERSION,
+                "key": key,
+                "rows": self.rows,
+                "strings": self.strings,
+                "digest": self.digest,
+                "series": {
+                    signature: (dates.tobytes(), amounts.tobytes(), row, occurrences)
+                    for signature, (dates, amounts, row, occurrences) in self.series.items()
+                },
+            }
+            write_sidecar(".recurring", marshal.dumps(data))
+            self.unsaved = False
+
+    @classmethod
+    def load(cls, path):
+        """Loads a persisted detector, returning (detector, ledger key) or None."""
+        try:
+            with open(path, "rb") as file:
+                data = marshal.load(file)
+            if data["version"] != DETECTOR_VERSION:
+                return None
+            detector = cls()
+            detector.rows = data["rows"]
+            detector.strings = data["strings"]
+            detector.digest = data["digest"]
+            detector.series = {
+                signature: [array("i", dates), array("q", amounts), row, occurrences]
+                for signature, (dates, amounts, row, occurrences) in data["series"].items()
+            }
+            detector._dirty = set(detector.series)
+            return detector, data["key"]
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            return None
+
+
+def _load_detector(store, key):
+    """Returns the saved detector if the rows it filed are still the first rows of `store`, else None."""
+    loaded = RecurringDetector.load(sidecar_path(".recurring"))
+    if loaded is None:
+        return None
+    detector, saved_key = loaded
+    if saved_key == key and detector.rows == len(store):
+        detector.store = store
+        detector.revision = store.revision
+        return detector
+    return detector if detector.adopt(store) else None
+
+
+def recurring_detector(store=None):
+    """
+    Returns the shared detector, refreshed with `store` (default: the
+    current ledger). The detector for the current ledger is loaded from and
+    saved next to the transactions file.
+    """
+    global _detector
+    if store is not None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = RecurringDetector()
+        return _detector.refresh(store)
+
+    store = load_transaction_store()
+    key = ledger_key()
+    with _detector_lock:
+        if _detector is None or _detector.store is not store:
+            _detector = _load_detector(store, key) or _detector or RecurringDetector()
+        detector = _detector
+    detector.refresh(store)
+    if detector.unsaved:
+        try:
+            detector.save(key)
+        except OSError:
+            pass  # Rebuilt from the ledger when missing
+    return detector
+
+
+def _next_date(pattern):
+    """Returns the date a pattern next falls due, one step after its latest occurrence."""
+    _, _, days, months = PERIODS[pattern["period"]]
+    return advance(pattern["last_date"], days, months)
+
+
+@timed("analytics.recurring_transactions", rows=None)
+def recurring_transactions(today=None, store=None):
+    """
+    Returns the recurring transactions that are still active, soonest due
+    first. A pattern lapses when its next occurrence is overdue by more
+    than half an interval.
+    """
+    today = today or datetime.date.today()
+    recurring = []
+    for pattern in recurring_detector(store).patterns():
+        next_date = _next_date(pattern)
+        if (today - next_date).days <= pattern["interval"] // 2:
+            recurring.append(dict(pattern, next_date=next_date))
+    return sorted(recurring, key=lambda pattern: (pattern["next_date"], pattern["category"]))
+
+
+def projected_transactions(start, end, today=None, recurring=None):
+    """
+    Returns the occurrences of recurring transactions expected in [start, end)
+    and not before `today`. Occurrences already overdue are expected today.
+    """
+    today = today or datetime.date.today()
+    recurring = recurring_transactions(today) if recurring is None else recurring
+    projected = []
+    for pattern in recurring:
+        _, _, days, months = PERIODS[pattern["period"]]
+        date = pattern["next_date"]
+        while date < end:
+            due = max(date, today)
+            if start <= due < end:
+                transaction = {
+                    "date": due.isoformat(),
+                    "type": pattern["type"],
+                    "category": pattern["category"],
+                    "amount": pattern["amount"],
+                    "description": pattern["description"],
+                }
+                if "currency" in pattern:
+                    transaction["currency"] = pattern["currency"]
+                projected.append(transaction)
+            date = advance(date, days, months)
+    return sorted(projected, key=lambda transaction: transaction["date"])
+
+
+@timed("analytics.forecast_month", rows=None)
+def forecast_month(year, month, today=None, recurring=None, budgets=None):
+    """
+    Forecasts a month's cash flow: what has been recorded so far plus the
+    recurring transactions still expected, and the budgets the month is on
+    course to overrun.
+    """
+    today = today or datetime.date.today()
+    start = datetime.date(year, month, 1)
+    end = advance(start, 0, 1)
+    budgets = load_budgets() if budgets is None else budgets
+    upcoming = projected_transactions(start, end, today, recurring)
+
+    recorded = {"Income": 0, "Expense": 0}
+    spent = {}
+    for (transaction_type, category), amount in monthly_sums(year, month).items():
+        recorded[transaction_type] = recorded.get(transaction_type, 0) + amount
+        if transaction_type == "Expense":
+            spent[category] = amount
+    expected = {"Income": 0, "Expense": 0}
+    expected_spend = {}
+    rates = load_fx_rates()
+    for transaction in upcoming:
+        try:
+            amount = base_amount(transaction, rates)
+        except ValueError:
+            continue  # A currency without rates, left out of totals as in reports
+        expected[transaction["type"]] += amount
+        if transaction["type"] == "Expense":
+            expected_spend[transaction["category"]] = expected_spend.get(transaction["category"], 0) + amount
+
+    overruns = []
+    for category, budget in budgets.items():
+        projected = spent.get(category, 0) + expected_spend.get(category, 0)
+        if projected > budget:
+            overruns.append({
+                "category": category,
+                "budget": budget,
+                "spent": spent.get(category, 0),
+                "projected": projected,
+                "overrun": projected - budget,
+            })
+
+    income = recorded["Income"] + expected["Income"]
+    expenses = recorded["Expense"] + expected["Expense"]
+    return {
+        "month": f"{year:04d}-{month:02d}",
+        "recorded_income": recorded["Income"],
+        "recorded_expenses": recorded["Expense"],
+        "expected_income": expected["Income"],
+        "expected_expenses": expected["Expense"],
+        "income": income,
+        "expenses": expenses,
+        "net": income - expenses,
+        "upcoming": upcoming,
+        "overruns": sorted(overruns, key=lambda overrun: overrun["overrun"], reverse=True),
+    }
+
+
+def forecast_alerts(transaction, today=None, budgets=None):
+    """
+    Returns the month-end overrun forecast for the category of a just-added
+    expense if its month is now on course to exceed the budget without
+    having exceeded it yet; budget alerts cover budgets already exceeded.
+    """
+    today = today or datetime.date.today()
+    date = datetime.date.fromisoformat(transaction["date"])
+    if transaction["type"] != "Expense" or (date.year, date.month) != (today.year, today.month):
+        return []
+    budgets = load_budgets() if budgets is None else budgets
+    if transaction["category"] not in budgets:
+        return []
+    forecast = forecast_month(date.year, date.month, today, budgets={transaction["category"]: budgets[transaction["category"]]})
+    return [overrun for overrun in forecast["overruns"] if overrun["spent"] <= overrun["budget"]]
+
+
+def show_forecast_alerts(transaction):
+    """Prints a warning for each budget a new expense puts on course to be overrun by month end."""
+    for alert in forecast_alerts(transaction):
+        console.print(
+            f"[bold yellow]Forecast: with the recurring expenses still due, {alert['category']} is on course to "
+            f"end the month at {alert['projected'] / 100:.2f}, {alert['overrun'] / 100:.2f} over its budget of "
+            f"{alert['budget'] / 100:.2f}.[/bold yellow]"
+        )
@@ -0,0 +1,138 @@
+"""
+Per-month aggregation over large ledgers, optionally spread over processes.
+
+The store's rows are split into contiguous segments (date ranges, when the
+ledger is in date order). Each worker sums its segments by (month, type,
+category) and the partial sums are merged. Workers are forked, so they read
+the parent's columns, which are memory-mapped from the snapshot, without
+copying or pickling them. Small ledgers, a worker count of one and
+platforms without fork() use the same code serially.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from finace_tracker.database import load_budgets, load_transaction_store
+from finace_tracker.features.analytics.engine import _EPOCH_ORDINAL, _columns, _report
+from finace_tracker.instrumentation import timed
+
+# Environment variable holding the worker count; defaults to the CPU count
+WORKERS_ENV = "FINANCE_TRACKER_WORKERS"
+
+# Ledgers with fewer rows are aggregated serially; forking would cost more
+PARALLEL_MIN_ROWS = 500_000
+
+# Segments per worker, so a slow worker does not hold up the merge
+SEGMENTS_PER_WORKER = 4
+
+# The store the forked workers aggregate
+_shared_store = None
+
+
+def worker_count(workers=None):
+    """Returns the number of worker processes to use."""
+    if workers is None:
+        workers = int(os.environ.get(WORKERS_ENV, 0)) or os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _segment_sums(low, high, start=None, end=None, store=None):
+    """
+    Sums rows [low, high) dated in [start, end) (ordinals) by month, type
+    and category, returning {(month, type code, category code): total}.
+    """
+    store = _shared_store if store is None else store
+    dates, types, categories, amounts = (column[low:high] for column in _columns(store))
+    if start is not None or end is not None:
+        mask = np.ones(len(dates), dtype=bool)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates < end
+        dates, types, categories, amounts = dates[mask], types[mask], categories[mask], amounts[mask]
+    if not len(dates):
+        return {}
+
+    months = (dates.astype(np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    first_month = int(months.min())
+    num_types, num_categories = len(store.pools["type"]), len(store.pools["category"])
+    # Group on a dense (month, type, category) grid; np.add.at keeps the sums in exact integers.
+    keys = ((months - first_month) * num_types + types) * num_categories + categories
+    sums = np.zeros(int(keys.max()) + 1, dtype=np.int64)
+    np.add.at(sums, keys, amounts)
+
+    result = {}
+    for key in np.flatnonzero(sums):
+        key = int(key)
+        month, rest = divmod(key, num_types * num_categories)
+        result[(first_month + month, *divmod(rest, num_categories))] = int(sums[key])
+    return result
+
+
+def _segments(rows, count):
+    """Splits a range of row indices into `count` contiguous (low, high) segments."""
+    bounds = np.linspace(rows.start, rows.stop, count + 1).astype(int)
+    return [(int(low), int(high)) for low, high in zip(bounds, bounds[1:]) if high > low]
+
+
+def _can_fork():
+    """Returns True if worker processes can be forked."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+@timed("analytics.month_sums", rows=None)
+def month_sums(start=None, end=None, workers=None, store=None):
+    """
+    Sums transactions dated in [start, end) (dates; None is unbounded) by
+    month, returning {(year, month): {(type, category): total}} like the
+    monthly index.
+    """
+    global _shared_store
+    store = load_transaction_store() if store is None else store
+    start_ordinal = start.toordinal() if start else None
+    end_ordinal = end.toordinal() if end else None
+    # On a date-ordered ledger the range is contiguous; otherwise every row is filtered.
+    rows = store.indices_between(start_ordinal, end_ordinal) if store.dates_sorted else range(len(store))
+
+    workers = worker_count(workers)
+    if workers == 1 or len(rows) < PARALLEL_MIN_ROWS or not _can_fork():
+        partials = [_segment_sums(rows.start, rows.stop, start_ordinal, end_ordinal, store)]
+    else:
+        _shared_store = store
+        _columns(store)  # Converts amounts in other currencies once, before the workers fork
+        try:
+            segments = _segments(rows, workers * SEGMENTS_PER_WORKER)
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                partials = list(pool.map(
+                    _segment_sums,
+                    [low for low, _ in segments],
+                    [high for _, high in segments],
+                    [start_ordinal] * len(segments),
+                    [end_ordinal] * len(segments),
+                ))
+        finally:
+            _shared_store = None
+
+    index = {}
+    for partial in partials:
+        for (month, type_code, category_code), amount in partial.items():
+            sums = index.setdefault((1970 + month // 12, month % 12 + 1), {})
+            key = (store.decode("type", type_code), store.decode("category", category_code))
+            sums[key] = sums.get(key, 0) + amount
+    return index
+
+
+def period_report(start, end, budgets=None, workers=None, store=None):
+    """
+    Computes every metric for transactions dated in [start, end), such as a
+    year or several, merging per-month sums computed by month_sums().
+    Budgets are monthly, so they are scaled by the number of months covered.
+    """
+    budgets = load_budgets() if budgets is None else budgets
+    sums = {}
+    for totals in month_sums(start, end, workers, store).values():
+        for key, amount in totals.items():
+            sums[key] = sums.get(key, 0) + amount
+    months = (end.year - start.year) * 12 + end.month - start.month + (1 if end.day > 1 else 0)
+    scaled_budgets = {category: amount * months for category, amount in budgets.items()}
+    return _report(sums, scaled_budgets, (end - start).days)
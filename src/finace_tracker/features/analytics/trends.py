@@ -0,0 +1,115 @@
+"""
+Month-over-month and year-over-year trends, served from rollups.
+
+The month rollup is the storage backend's monthly index, which is updated
+on every append and rebuilt only when the ledger is changed by other means.
+Year rollups are merged from it: a year costs at most twelve small dicts,
+however many transactions it holds. Day rollups are summed from the store's
+date index for just the days asked for, so no trend report visits the rest
+of the ledger.
+"""
+import datetime
+import numpy as np
+from finace_tracker.database import load_monthly_index, load_transaction_store
+from finace_tracker.features.analytics.engine import _columns
+from finace_tracker.instrumentation import timed
+
+
+def recent_months(count, end=None):
+    """Returns the `count` (year, month) pairs ending with the month of `end` (default: today), oldest first."""
+    end = end or datetime.date.today()
+    last = end.year * 12 + end.month - 1
+    return [(month // 12, month % 12 + 1) for month in range(last - count + 1, last + 1)]
+
+
+def _period(label, sums):
+    """Summarizes {(type, category): total} sums for one period."""
+    expenses = {category: amount for (type_, category), amount in sums.items() if type_ == "Expense"}
+    income = sum(amount for (type_, _), amount in sums.items() if type_ == "Income")
+    total_expenses = sum(expenses.values())
+    savings = income - total_expenses
+    return {
+        "period": label,
+        "income": income,
+        "expenses": total_expenses,
+        "savings": savings,
+        "savings_rate": (savings / income) * 100 if income else 0,
+        "expenses_by_category": expenses,
+    }
+
+
+def year_rollup(index=None):
+    """Merges the month rollup into {year: {(type, category): total}}."""
+    index = load_monthly_index() if index is None else index
+    years = {}
+    for (year, _), sums in index.items():
+        totals = years.setdefault(year, {})
+        for key, amount in sums.items():
+            totals[key] = totals.get(key, 0) + amount
+    return years
+
+
+@timed("analytics.monthly_trend", rows=None)
+def monthly_trend(months=12, end=None, index=None):
+    """Returns one summary per month for the last `months` months, oldest first."""
+    index = load_monthly_index() if index is None else index
+    return [
+        _period(f"{year:04d}-{month:02d}", index.get((year, month), {}))
+        for year, month in recent_months(months, end)
+    ]
+
+
+@timed("analytics.yearly_trend", rows=None)
+def yearly_trend(years=5, end=None, index=None):
+    """Returns one summary per calendar year for the last `years` years, oldest first."""
+    end = end or datetime.date.today()
+    rollup = year_rollup(index)
+    return [_period(str(year), rollup.get(year, {})) for year in range(end.year - years + 1, end.year + 1)]
+
+
+def rolling_average(values, window=3):
+    """Returns the trailing average of each value over up to `window` values."""
+    averages = []
+    total = 0
+    for position, value in enumerate(values):
+        total += value
+        if position >= window:
+            total -= values[position - window]
+        averages.append(total / min(position + 1, window))
+    return averages
+
+
+def category_trend(periods):
+    """Returns {category: [spend per period]} for the categories spent on in any period."""
+    categories = sorted({category for period in periods for category in period["expenses_by_category"]})
+    return {
+        category: [period["expenses_by_category"].get(category, 0) for period in periods]
+        for category in categories
+    }
+
+
+@timed("analytics.daily_totals", rows=None)
+def daily_totals(start, end, store=None):
+    """
+    Returns {"dates", "income", "expenses"} lists with one entry per day in
+    [start, end), summed from only the rows dated in that range.
+    """
+    store = load_transaction_store() if store is None else store
+    days = (end - start).days
+    dates, types, _, amounts = _columns(store)
+    rows = store.indices_between(start.toordinal(), end.toordinal())
+    if isinstance(rows, range):
+        dates, types, amounts = dates[rows.start:rows.stop], types[rows.start:rows.stop], amounts[rows.start:rows.stop]
+    else:
+        dates, types, amounts = dates[rows], types[rows], amounts[rows]
+    offsets = dates.astype(np.int64) - start.toordinal()
+
+    totals = {}
+    for name, type_ in (("income", "Income"), ("expenses", "Expense")):
+        code = store.encode("type", type_)
+        mask = types == code if code is not None else np.zeros(len(types), dtype=bool)
+        sums = np.zeros(days, dtype=np.int64)
+        np.add.at(sums, offsets[mask], amounts[mask])
+        totals[name] = sums.tolist()
+    totals["dates"] = [(start + datetime.timedelta(days=day)).isoformat() for day in range(days)]
+    return totals
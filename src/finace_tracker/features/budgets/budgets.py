@@ -1,18 +1,109 @@
+import datetime
+import os
 import questionary
-from rich.console import Console
 from rich.table import Table
-from finace_tracker.database import load_budgets, save_budgets
-
-# Initialize Rich Console
-console = Console()
+from finace_tracker.categories import EXPENSE_CATEGORIES
+from finace_tracker.currency import base_amount
+from finace_tracker.database import load_budgets, monthly_sums, save_budgets
+from finace_tracker.instrumentation import timed
+from finace_tracker.console import console
 
 # In-memory data store for budgets
 budgets = {}
 
-# Categories from gemini.md
-EXPENSE_CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Other"]
+# Environment variable holding the alert thresholds in percent, e.g. "70,100"
+ALERT_THRESHOLDS_ENV = "FINANCE_TRACKER_BUDGET_ALERTS"
+DEFAULT_ALERT_THRESHOLDS = (70, 100)
+
 
+def alert_thresholds():
+    """Returns the utilization thresholds, in percent and ascending, that raise an alert."""
+    text = os.environ.get(ALERT_THRESHOLDS_ENV)
+    if not text:
+        return DEFAULT_ALERT_THRESHOLDS
+    try:
+        return tuple(sorted({int(part) for part in text.split(",") if part.strip()}))
+    except ValueError:
+        console.print(f"[bold yellow]Warning: Ignoring invalid {ALERT_THRESHOLDS_ENV}: {text!r}[/bold yellow]")
+        return DEFAULT_ALERT_THRESHOLDS
 
+
+def budget_status(year, month, budgets=None):
+    """
+    Returns the spending against each budget in a month, read from the
+    running monthly totals rather than the ledger.
+    """
+    budgets = load_budgets() if budgets is None else budgets
+    sums = monthly_sums(year, month)
+    status = []
+    for category, budget in budgets.items():
+        spent = sums.get(("Expense", category), 0)
+        status.append({
+            "category": category,
+            "budget": budget,
+            "spent": spent,
+            "remaining": budget - spent,
+            "utilization": (spent / budget) * 100 if budget else 0,
+        })
+    return status
+
+
+def budget_alerts(transaction, budgets=None, thresholds=None):
+    """
+    Returns the alerts raised by an expense that was just added: one
+    {"category", "threshold", "spent", "budget", "utilization"} dict for each
+    threshold its month's spending crossed because of it.
+
+    The check is two lookups in the running monthly totals, which already
+    include the transaction, so it costs the same however long the ledger is.
+    """
+    if transaction["type"] != "Expense":
+        return []
+    budgets = load_budgets() if budgets is None else budgets
+    budget = budgets.get(transaction["category"])
+    if not budget:
+        return []
+    thresholds = alert_thresholds() if thresholds is None else thresholds
+
+    date = datetime.date.fromisoformat(transaction["date"])
+    spent = monthly_sums(date.year, date.month).get(("Expense", transaction["category"]), 0)
+    try:
+        before = spent - base_amount(transaction)
+    except ValueError:
+        return []  # A currency without rates is left out of the totals
+    return [
+        {
+            "category": transaction["category"],
+            "threshold": threshold,
+            "spent": spent,
+            "budget": budget,
+            "utilization": spent / budget * 100,
+        }
+        for threshold in thresholds
+        if before * 100 < threshold * budget <= spent * 100
+    ]
+
+
+def show_budget_alerts(transaction):
+    """Prints the alerts raised by an expense that was just added."""
+    for alert in budget_alerts(transaction):
+        color = "red" if alert["threshold"] >= 100 else "yellow"
+        console.print(
+            f"[bold {color}]Budget alert: {alert['category']} spending is at {alert['utilization']:.0f}% "
+            f"of its budget ({alert['spent'] / 100:.2f} of {alert['budget'] / 100:.2f}).[/bold {color}]"
+        )
+
+
+def _status_label(utilization, thresholds):
+    """Returns the status and color of a budget's utilization."""
+    if utilization >= 100:
+        return "Over", "red"
+    if any(threshold <= utilization for threshold in thresholds):
+        return "Warning", "yellow"
+    return "OK", "green"
+
+
+@timed("menu.set_budget", rows=None)
 def set_budget():
     """Sets a budget for a specific category."""
     category = questionary.select(
@@ -39,19 +130,33 @@ def set_budget():
     console.print(f"[bold green]Budget for {category} set to {amount / 100:.2f}[/bold green]")
 
 
+@timed("menu.view_budgets", rows=None)
 def view_budgets():
-    """Displays all set budgets in a table."""
+    """Displays all set budgets with this month's spending against them."""
     if not budgets:
         console.print("[bold yellow]No budgets set.[/bold yellow]")
         return
 
-    table = Table(title="Monthly Budgets")
+    today = datetime.date.today()
+    table = Table(title=f"Monthly Budgets ({today.strftime('%B %Y')})")
     table.add_column("Category", style="green")
     table.add_column("Budget", justify="right", style="yellow")
-
-    for category, amount in budgets.items():
-        display_amount = f"{amount / 100:.2f}"
-        table.add_row(category, display_amount)
+    table.add_column("Spent", justify="right")
+    table.add_column("Remaining", justify="right")
+    table.add_column("Utilization", justify="right")
+    table.add_column("Status")
+
+    thresholds = [threshold for threshold in alert_thresholds() if threshold < 100]
+    for status in budget_status(today.year, today.month, budgets):
+        label, color = _status_label(status["utilization"], thresholds)
+        table.add_row(
+            status["category"],
+            f"{status['budget'] / 100:.2f}",
+            f"{status['spent'] / 100:.2f}",
+            f"{status['remaining'] / 100:.2f}",
+            f"[{color}]{status['utilization']:.1f}%[/{color}]",
+            f"[{color}]{label}[/{color}]",
+        )
 
     console.print(table)
 
@@ -0,0 +1,72 @@
+import questionary
+from rich.table import Table
+from finace_tracker import instrumentation
+from finace_tracker.console import console
+
+
+def view_timings():
+    """Displays the latest timings and counters recorded this session."""
+    if not instrumentation.timings and not instrumentation.counters:
+        console.print("[bold yellow]Nothing has been recorded yet.[/bold yellow]")
+        return
+
+    table = Table(title="Timings")
+    table.add_column("Operation", style="green")
+    table.add_column("Calls", justify="right")
+    table.add_column("Last (ms)", justify="right", style="yellow")
+    table.add_column("Average (ms)", justify="right")
+    table.add_column("Total (ms)", justify="right")
+    table.add_column("Last Rows", justify="right", style="cyan")
+    by_total = sorted(instrumentation.timings.items(), key=lambda item: item[1]["seconds"], reverse=True)
+    for name, entry in by_total:
+        table.add_row(
+            name,
+            f"{entry['calls']:,}",
+            f"{entry['last_seconds'] * 1000:,.2f}",
+            f"{entry['seconds'] / entry['calls'] * 1000:,.2f}",
+            f"{entry['seconds'] * 1000:,.2f}",
+            f"{entry['last_rows']:,}" if entry["last_rows"] is not None else "-",
+        )
+    console.print(table)
+    console.print("[dim]Menu actions include the time spent answering their prompts.[/dim]")
+
+    if instrumentation.counters:
+        counters = Table(title="Counters")
+        counters.add_column("Counter", style="green")
+        counters.add_column("Value", justify="right", style="yellow")
+        for name, value in sorted(instrumentation.counters.items()):
+            counters.add_row(name, f"{value:,}")
+        console.print(counters)
+
+
+def diagnostics_menu():
+    """
+    Displays the menu for diagnostics.
+    """
+    while True:
+        if instrumentation.profile_path():
+            console.print(f"[bold]Profiling this session to {instrumentation.profile_path()}[/bold]")
+        toggle = "Disable Instrumentation" if instrumentation.is_enabled() else "Enable Instrumentation"
+        choice = questionary.select(
+            "Diagnostics",
+            choices=["View Latest Timings", "Reset Timings", toggle, "Back to Main Menu"],
+        ).ask()
+
+        if choice == "View Latest Timings":
+            if not instrumentation.is_enabled():
+                console.print("[bold yellow]Instrumentation is off. Enable it here, start with --diagnostics or set FINANCE_TRACKER_DIAGNOSTICS=1.[/bold yellow]")
+            view_timings()
+        elif choice == "Reset Timings":
+            instrumentation.reset()
+            console.print("[bold green]Timings and counters cleared.[/bold green]")
+        elif choice == "Enable Instrumentation":
+            instrumentation.enable()
+            console.print("[bold green]Instrumentation enabled.[/bold green]")
+        elif choice == "Disable Instrumentation":
+            path = instrumentation.stop_profile()
+            instrumentation.disable()
+            if path:
+                console.print(f"[bold green]Profile saved to {path}[/bold green]")
+            console.print("[bold green]Instrumentation disabled.[/bold green]")
+        elif choice == "Back to Main Menu" or choice is None:
+            break
@@ -0,0 +1,146 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import sys
+import questionary
+from finace_tracker.database import OPTIONAL_FIELDS, TRANSACTION_FIELDS, load_transaction_store_between
+from finace_tracker.instrumentation import timed
+from finace_tracker.categories import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+from finace_tracker.console import console
+
+EXPORT_FORMATS = ["csv", "ndjson"]
+
+
+def iter_transactions(start=None, end=None, categories=None, transaction_type=None, store=None):
+    """
+    Yields transactions dated in [start, end), optionally limited to some
+    categories or one type, one row at a time.
+
+    The date range is located with the store's date index, and filters are
+    checked against column codes before a row is materialized. Backends
+    that partition the ledger only load the segments the range covers.
+    """
+    store = load_transaction_store_between(start, end) if store is None else store
+    indices = store.indices_between(
+        start.toordinal() if start else None,
+        end.toordinal() if end else None,
+    )
+
+    category_codes = None
+    if categories is not None:
+        category_codes = {store.encode("category", category) for category in categories} - {None}
+    type_code = None
+    if transaction_type is not None:
+        type_code = store.encode("type", transaction_type)
+        if type_code is None:
+            return
+
+    category_column = store.column("category")
+    type_column = store.column("type")
+    for index in indices:
+        if category_codes is not None and category_column[index] not in category_codes:
+            continue
+        if type_code is not None and type_column[index] != type_code:
+            continue
+        yield store.row(index)
+
+
+def write_transactions(transactions, file, export_format):
+    """Streams transactions to a text file as CSV or NDJSON, returning the row count."""
+    count = 0
+    if export_format == "csv":
+        writer = csv.DictWriter(file, fieldnames=TRANSACTION_FIELDS + OPTIONAL_FIELDS)
+        writer.writeheader()
+        for transaction in transactions:
+            writer.writerow(transaction)
+            count += 1
+    elif export_format == "ndjson":
+        for transaction in transactions:
+            file.write(json.dumps(transaction, ensure_ascii=False))
+            file.write("\n")
+            count += 1
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
+    return count
+
+
+def _open_output(path, compress, stdout=None):
+    """Opens a file (or `stdout` for "-") for writing text, gzip-compressed if requested."""
+    if path == "-":
+        stdout = stdout or sys.stdout.buffer
+        if compress:
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=stdout, mode="wb"), encoding="utf-8", newline="")
+        return io.TextIOWrapper(stdout, encoding="utf-8", newline="", write_through=True)
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+@timed("exports.export_transactions", rows=lambda args, result: result)
+def export_transactions(path, export_format="csv", start=None, end=None, categories=None, transaction_type=None, compress=False, stdout=None):
+    """
+    Exports filtered transactions to `path` ("-" for stdout, or the binary
+    stream `stdout` if given) and returns the number of rows written. Rows
+    are streamed, never collected into a list.
+    """
+    file = _open_output(path, compress, stdout)
+    try:
+        return write_transactions(iter_transactions(start, end, categories, transaction_type), file, export_format)
+    finally:
+        if path == "-" and not compress:
+            file.detach()  # Flushes without closing stdout
+        else:
+            file.close()
+
+
+def _ask_date(message):
+    """Asks for an optional ISO date, returning False if the prompt was cancelled."""
+    answer = questionary.text(message).ask()
+    if answer is None:
+        return False
+    if not answer.strip():
+        return None
+    try:
+        return datetime.date.fromisoformat(answer.strip())
+    except ValueError:
+        console.print("[bold red]Invalid date. Please use YYYY-MM-DD.[/bold red]")
+        return False
+
+
+@timed("menu.export_transactions", rows=None)
+def export_menu():
+    """Asks for export options and writes the matching transactions to a file."""
+    export_format = questionary.select("Export format:", choices=EXPORT_FORMATS).ask()
+    if export_format is None:
+        return
+
+    start = _ask_date("From date (YYYY-MM-DD, blank for the beginning):")
+    if start is False:
+        return
+    end_date = _ask_date("To date, inclusive (YYYY-MM-DD, blank for today):")
+    if end_date is False:
+        return
+    end = (end_date or datetime.date.today()) + datetime.timedelta(days=1)
+
+    all_categories = list(dict.fromkeys(EXPENSE_CATEGORIES + INCOME_CATEGORIES))
+    categories = questionary.checkbox("Categories to export (none selected exports all):", choices=all_categories).ask()
+    if categories is None:
+        return
+
+    compress = questionary.confirm("Compress with gzip?", default=False).ask()
+    if compress is None:
+        return
+
+    default_path = f"transactions.{export_format}{'.gz' if compress else ''}"
+    path = questionary.path("Output file:", default=default_path).ask()
+    if not path:
+        return
+
+    try:
+        count = export_transactions(path, export_format, start, end, categories or None, compress=compress)
+    except OSError as e:
+        console.print(f"[bold red]Error writing export file: {e}[/bold red]")
+        return
+    console.print(f"[bold green]Exported {count:,} transactions to {path}[/bold green]")
@@ -0,0 +1,378 @@
+import csv
+import datetime
+import hashlib
+import marshal
+import os
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from itertools import islice
+import questionary
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+from rich.table import Table
+from finace_tracker.currency import RateTable, format_amount, normalize_currency
+from finace_tracker.database import (
+    OPTIONAL_FIELDS,
+    TRANSACTION_FIELDS,
+    append_sidecar,
+    append_transactions,
+    check_amount,
+    load_fx_rates,
+    load_transaction_store,
+    parse_fx_rate,
+    save_fx_rates,
+    sidecar_path,
+    write_sidecar,
+)
+from finace_tracker.instrumentation import timed
+from finace_tracker.categories import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+from finace_tracker.console import console
+
+# Number of rows written to the ledger per append
+BATCH_SIZE = 5000
+
+# Date formats tried, in order, when a statement does not use ISO dates
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%d %b %Y"]
+
+# Possible duplicates kept in the import statistics and listed after an import from the menu
+SHOWN_POSSIBLE_DUPLICATES = 10
+
+
+def read_rows(path):
+    """Streams rows of a CSV file as dicts keyed by its header."""
+    with open(path, "r", newline="", encoding="utf-8-sig") as file:
+        yield from csv.DictReader(file)
+
+
+def map_columns(rows, mapping):
+    """Renames source columns to schema fields; `mapping` is {field: source column}."""
+    for row in rows:
+        yield {field: (row.get(column) or "").strip() for field, column in mapping.items() if column}
+
+
+def parse_amount(text):
+    """
+    Converts an amount such as "-1,234.50" to signed integer paisa without
+    using floats, raising ValueError if it is malformed or too large for the
+    ledger.
+    """
+    cleaned = "".join(ch for ch in text if ch.isdigit() or ch in ".-")
+    if text.strip().startswith("(") and text.strip().endswith(")"):
+        cleaned = "-" + cleaned  # Accounting notation for debits
+    try:
+        return check_amount((Decimal(cleaned) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"invalid amount {text!r}")
+
+
+def parse_date(text):
+    """Converts a statement date to ISO format."""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {text!r}")
+
+
+def normalize(rows, stats):
+    """
+    Converts mapped rows to ledger transactions, counting rejected rows in `stats`.
+
+    Without a type column, negative amounts are expenses and positive amounts
+    income. Without a category column, rows are filed under "Other", and
+    without a currency column they are in the base currency. Rows in a
+    currency without FX rates are rejected.
+    """
+    rates = load_fx_rates()
+    for row in rows:
+        stats["read"] += 1
+        try:
+            amount = parse_amount(row["amount"])
+            transaction_type = row.get("type") or ("Expense" if amount < 0 else "Income")
+            category = row.get("category") or "Other"
+            if transaction_type == "Expense":
+                valid = category in EXPENSE_CATEGORIES
+            elif transaction_type == "Income":
+                valid = category in INCOME_CATEGORIES
+            else:
+                valid = False
+            if not valid:
+                raise ValueError(f"unknown {transaction_type!r} category {category!r}")
+            transaction = {
+                "date": parse_date(row["date"]),
+                "type": transaction_type,
+                "category": category,
+                "amount": abs(amount),
+                "description": row.get("description", ""),
+            }
+            currency = normalize_currency(row.get("currency"))
+            if currency:
+                rates.rate_on(currency, datetime.date.fromisoformat(transaction["date"]))
+                transaction["currency"] = currency
+            yield transaction
+        except (ValueError, KeyError):
+            stats["invalid"] += 1
+
+
+def fingerprint(transaction):
+    """Returns a compact 64-bit fingerprint of a transaction for deduplication."""
+    key = "\x1f".join(str(transaction.get(field, "")) for field in TRANSACTION_FIELDS + OPTIONAL_FIELDS)
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _history_extension(source):
+    """Returns the sidecar extension of the import history of a source."""
+    return f".imports/{hashlib.blake2b(source.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+def load_import_history(source):
+    """
+    Returns {fingerprint: count} of the rows imported from a source so far.
+
+    The history file holds the whole history as of the last completed
+    import followed by the counts each later batch changed; a record cut
+    short by a crash ends it.
+    """
+    history = {}
+    try:
+        with open(sidecar_path(_history_extension(source)), "rb") as file:
+            while True:
+                changes = marshal.load(file)
+                if not isinstance(changes, dict):
+                    break
+                history.update(changes)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    return history
+
+
+def save_import_history(source, history):
+    """Replaces the import history of a source next to the ledger with `history`."""
+    os.makedirs(sidecar_path(".imports"), exist_ok=True)
+    write_sidecar(_history_extension(source), marshal.dumps(history))
+
+
+def append_import_history(source, changes):
+    """Records the fingerprint counts ({fingerprint: count}) a batch changed in the import history of a source."""
+    os.makedirs(sidecar_path(".imports"), exist_ok=True)
+    append_sidecar(_history_extension(source), marshal.dumps(changes))
+
+
+def deduplicate(transactions, history, stats):
+    """
+    Drops transactions that earlier imports of the same source brought in.
+
+    Fingerprints are counted: the n-th identical row of a statement is a
+    duplicate only if an earlier import had at least n of them, so repeats
+    such as two coffees on one day are kept. `history` ({fingerprint: count})
+    is updated with the rows passed on.
+    """
+    occurrences = Counter()
+    for transaction in transactions:
+        key = fingerprint(transaction)
+        occurrences[key] += 1
+        if occurrences[key] <= history.get(key, 0):
+            stats["duplicates"] += 1
+            continue
+        history[key] = occurrences[key]
+        yield transaction
+
+
+def flag_possible_duplicates(batches, store, stats):
+    """
+    Passes batches on, counting in stats["possible_duplicates"] transactions
+    that match one already in the ledger on the same day, such as a
+    transaction entered by hand, and keeping the first
+    SHOWN_POSSIBLE_DUPLICATES of them in stats["possible_duplicate_rows"].
+    Matches are counted like in deduplicate().
+
+    Only rows that predate the import are compared, and only those on the
+    dates the statement covers, so memory is bounded by the statement.
+    """
+    rows = len(store)  # Rows appended by this import are not compared
+    dates = store.column("date")
+    if store.dates_sorted:
+        order, ordered = None, dates
+    else:
+        # One sort per import rather than a scan of the ledger per batch
+        order = array("I", sorted(range(rows), key=dates.__getitem__))
+        ordered = array("i", (dates[index] for index in order))
+    ledger = {}  # Fingerprint counts of the ledger's rows, by date ordinal
+    occurrences = Counter()
+    for batch in batches:
+        ordinals = [datetime.date.fromisoformat(transaction["date"]).toordinal() for transaction in batch]
+        for date in set(ordinals) - ledger.keys():
+            low, high = bisect_left(ordered, date, 0, rows), bisect_left(ordered, date + 1, 0, rows)
+            indices = range(low, high) if order is None else order[low:high]
+            ledger[date] = Counter(fingerprint(store.row(index)) for index in indices)
+        for transaction, date in zip(batch, ordinals):
+            key = fingerprint(transaction)
+            occurrences[key] += 1
+            if occurrences[key] <= ledger[date][key]:
+                stats["possible_duplicates"] += 1
+                if len(stats["possible_duplicate_rows"]) < SHOWN_POSSIBLE_DUPLICATES:
+                    stats["possible_duplicate_rows"].append(transaction)
+        yield batch
+
+
+def batched(iterable, size):
+    """Groups an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@timed("imports.import_transactions", rows=lambda args, result: result["imported"])
+def import_transactions(path, mapping, on_batch=None, source=None):
+    """
+    Streams a bank statement CSV into the ledger and returns import statistics.
+
+    Rows flow through a generator pipeline and are appended in batches.
+    Rows that earlier imports from the same source (by default, the file
+    name) already brought in are skipped, using the fingerprint counts kept
+    for that source, so memory is bounded by the statement rather than the
+    ledger. Rows matching other transactions of the ledger, e.g. ones entered
+    by hand, are imported and counted in stats["possible_duplicates"].
+
+    Each batch appends the fingerprint counts it changed to the source's
+    history, which is rewritten whole only once the import completes.
+    """
+    source = source or os.path.basename(path)
+    stats = {
+        "read": 0, "imported": 0, "duplicates": 0, "invalid": 0, "seconds": 0.0,
+        "possible_duplicates": 0, "possible_duplicate_rows": [],
+    }
+    history = load_import_history(source)
+    started = time.perf_counter()
+
+    rows = map_columns(read_rows(path), mapping)
+    transactions = deduplicate(normalize(rows, stats), history, stats)
+    for batch in flag_possible_duplicates(batched(transactions, BATCH_SIZE), load_transaction_store(), stats):
+        append_transactions(batch)
+        append_import_history(source, {key: history[key] for key in map(fingerprint, batch)})
+        stats["imported"] += len(batch)
+        stats["seconds"] = time.perf_counter() - started
+        if on_batch:
+            on_batch(stats)
+    if stats["imported"]:
+        save_import_history(source, history)
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+@timed("imports.import_fx_rates", rows=lambda args, result: result["imported"])
+def import_fx_rates(path):
+    """
+    Merges a CSV file of currency,date,rate rows, with or without a header,
+    into the local FX rate table and returns import statistics. A rate
+    replaces any rate of its currency already recorded for the same day.
+    """
+    stats = {"read": 0, "imported": 0, "invalid": 0}
+    rates = []
+    with open(path, "r", newline="", encoding="utf-8-sig") as file:
+        for number, row in enumerate(csv.reader(file)):
+            if not row:
+                continue
+            try:
+                rates.append(parse_fx_rate(row))
+            except (ValueError, IndexError):
+                if number:  # The first row may be a header
+                    stats["read"] += 1
+                    stats["invalid"] += 1
+                continue
+            stats["read"] += 1
+    if rates:
+        save_fx_rates(RateTable([*load_fx_rates().rows(), *rates]))
+    stats["imported"] = len(rates)
+    return stats
+
+
+@timed("menu.import_fx_rates", rows=None)
+def import_fx_rates_menu():
+    """Asks for a CSV file of currency,date,rate rows and adds them to the FX rate table."""
+    path = questionary.path("Path of the FX rates CSV file (currency,date,rate):").ask()
+    if not path:
+        return
+    try:
+        stats = import_fx_rates(path)
+    except (OSError, csv.Error, UnicodeDecodeError) as e:
+        console.print(f"[bold red]Error reading FX rates file: {e}[/bold red]")
+        return
+    console.print(f"[bold green]Imported {stats['imported']:,} FX rates[/bold green] ({stats['invalid']:,} invalid rows skipped).")
+
+
+def _rate(stats):
+    """Returns the import throughput in rows per second."""
+    return stats["read"] / stats["seconds"] if stats["seconds"] else 0
+
+
+@timed("menu.import_transactions", rows=None)
+def import_menu():
+    """Asks for a bank statement and its column mapping, then imports it."""
+    path = questionary.path("Path of the CSV file to import:").ask()
+    if not path:
+        return
+
+    try:
+        with open(path, "r", newline="", encoding="utf-8-sig") as file:
+            columns = next(csv.reader(file), [])
+    except OSError as e:
+        console.print(f"[bold red]Error reading import file: {e}[/bold red]")
+        return
+
+    mapping = {}
+    for field in TRANSACTION_FIELDS + OPTIONAL_FIELDS:
+        default = field if field in columns else "(none)"
+        column = questionary.select(f"Column holding the {field}:", choices=["(none)"] + columns, default=default).ask()
+        if column is None:
+            return
+        mapping[field] = None if column == "(none)" else column
+    if not mapping["date"] or not mapping["amount"]:
+        console.print("[bold red]The date and amount columns are required.[/bold red]")
+        return
+    source = questionary.text(
+        "Name of the account this statement comes from (rows already imported from it are skipped):",
+        default=os.path.basename(path),
+    ).ask()
+    if source is None:
+        return
+
+    with Progress(SpinnerColumn(), TextColumn("{task.description}"), TimeElapsedColumn(), console=console) as progress:
+        task = progress.add_task("Importing...")
+
+        def on_batch(stats):
+            progress.update(task, description=f"Imported {stats['imported']:,} of {stats['read']:,} rows ({_rate(stats):,.0f} rows/sec)")
+
+        try:
+            stats = import_transactions(path, mapping, on_batch, source.strip())
+        except (OSError, csv.Error, UnicodeDecodeError) as e:
+            console.print(f"[bold red]Error reading import file: {e}[/bold red]")
+            return
+
+    console.print(
+        f"[bold green]Imported {stats['imported']:,} transactions[/bold green] "
+        f"({stats['duplicates']:,} duplicates and {stats['invalid']:,} invalid rows skipped) "
+        f"in {stats['seconds']:.2f}s, {_rate(stats):,.0f} rows/sec."
+    )
+    _show_possible_duplicates(stats["possible_duplicates"], stats["possible_duplicate_rows"])
+
+
+def _show_possible_duplicates(count, transactions):
+    """Lists imported transactions that match ones already in the ledger, so they can be reviewed."""
+    if not count:
+        return
+    table = Table(title=f"{count:,} imported transactions match existing ones; review them for duplicates")
+    table.add_column("Date", style="cyan")
+    table.add_column("Type", style="magenta")
+    table.add_column("Category", style="green")
+    table.add_column("Amount", justify="right", style="yellow")
+    table.add_column("Description", style="white")
+    for t in transactions:
+        table.add_row(t["date"], t["type"], t["category"], format_amount(t["amount"], t.get("currency")), t["description"])
+    if count > len(transactions):
+        table.caption = f"Showing the first {len(transactions):,}."
+    console.print(table)
@@ -0,0 +1,72 @@
+import questionary
+from finace_tracker import profiles
+from finace_tracker.console import console
+
+
+def switch_profile():
+    """
+    Prompts for a profile and account and makes it the active ledger.
+    """
+    current = profiles.shard_name(*profiles.current())
+    names = [profiles.shard_name(*shard) for shard in profiles.list_shards()]
+    name = questionary.select("Select a profile:", choices=names, default=current).ask()
+    if name is None:
+        return
+    profiles.activate(*profiles.parse_shard(name))
+    console.print(f"[bold green]Switched to {name}.[/bold green]")
+
+
+def _create(profile, account):
+    """Creates a profile or account and switches to it."""
+    try:
+        profiles.check_name(profile)
+        profiles.check_name(account)
+    except ValueError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        return
+    if (profile, account) in profiles.list_shards([profile]):
+        console.print(f"[bold red]Error: {profiles.shard_name(profile, account)} already exists.[/bold red]")
+        return
+    profiles.create_shard(profile, account)
+    profiles.activate(profile, account)
+    console.print(f"[bold green]Created and switched to {profiles.shard_name(profile, account)}.[/bold green]")
+
+
+def new_profile():
+    """
+    Prompts for the name of a new profile, such as a household or a business.
+    """
+    name = questionary.text("Enter the profile name:").ask()
+    if name is None:
+        return
+    _create(name.strip(), profiles.MAIN_ACCOUNT)
+
+
+def new_account():
+    """
+    Prompts for the name of a new account in the active profile.
+    """
+    name = questionary.text("Enter the account name:").ask()
+    if name is None:
+        return
+    _create(profiles.current()[0], name.strip())
+
+
+def profiles_menu():
+    """
+    Displays the menu for switching between profiles and accounts.
+    """
+    while True:
+        choice = questionary.select(
+            f"Profiles (current: {profiles.shard_name(*profiles.current())})",
+            choices=["Switch Profile", "New Profile", "New Account", "Back to Main Menu"],
+        ).ask()
+
+        if choice == "Switch Profile":
+            switch_profile()
+        elif choice == "New Profile":
+            new_profile()
+        elif choice == "New Account":
+            new_account()
+        elif choice == "Back to Main Menu" or choice is None:
+            break
@@ -0,0 +1,240 @@
+import datetime
+import heapq
+import marshal
+import re
+from array import array
+from bisect import bisect_left
+from decimal import Decimal, InvalidOperation
+from finace_tracker.database import load_transaction_store, ledger_key, sidecar_path, write_sidecar
+from finace_tracker.instrumentation import timed
+
+INDEX_VERSION = 3
+
+# Trailing date windows understood after "last"
+PERIODS = {"week": 7, "month": 31, "quarter": 92, "year": 366}
+
+_TOKEN = re.compile(r"\w+")
+
+# The loaded index for the current ledger, kept warm between queries
+_index = None
+
+
+def tokenize(text):
+    """Splits text into lowercase search tokens."""
+    return _TOKEN.findall(text.lower())
+
+
+def amount_bucket(amount):
+    """Returns the facet bucket of an amount in paisa: the number of digits in whole rupees."""
+    return len(str(abs(amount) // 100))
+
+
+def _prefix_digest(store, rows, strings):
+    """Digests the indexed rows and the first `strings` descriptions, see TransactionStore.prefix_digest()."""
+    return store.prefix_digest(rows, {"description": strings}, ("id", "date", "amount", "description"))
+
+
+class SearchIndex:
+    """
+    Inverted index over transaction descriptions with an amount-bucket facet.
+
+    Category and type facets come from the store's posting index. The
+    index records how many rows it covers and a digest of them, so rows
+    appended to the ledger are indexed on their own instead of rebuilding
+    everything, while any other change to the covered rows is caught.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.strings = 0
+        self.digest = None
+        self.tokens = {}
+        self.buckets = {}
+
+    def extend(self, store):
+        """Indexes the store's rows that are not covered yet."""
+        descriptions = store.column("description")
+        amounts = store.column("amount")
+        # Tokenize each distinct description once
+        token_cache = {}
+        for index in range(self.rows, len(store)):
+            code = descriptions[index]
+            tokens = token_cache.get(code)
+            if tokens is None:
+                tokens = token_cache[code] = set(tokenize(store.decode("description", code)))
+            for token in tokens:
+                self.tokens.setdefault(token, array("I")).append(index)
+            self.buckets.setdefault(amount_bucket(amounts[index]), array("I")).append(index)
+        self.rows = len(store)
+        self.strings = len(store.pools["description"])
+        self.digest = _prefix_digest(store, self.rows, self.strings)
+
+    def covers_prefix_of(self, store):
+        """Returns True if the indexed rows are still, unchanged, the first rows of `store`."""
+        if self.rows > len(store) or self.strings > len(store.pools["description"]):
+            return False
+        return _prefix_digest(store, self.rows, self.strings) == self.digest
+
+    def save(self, key):
+        """Persists the index for the ledger identified by `key`."""
+        data = {
+            "version": INDEX_VERSION,
+            "key": key,
+            "rows": self.rows,
+            "strings": self.strings,
+            "digest": self.digest,
+            "tokens": {token: rows.tobytes() for token, rows in self.tokens.items()},
+            "buckets": {bucket: rows.tobytes() for bucket, rows in self.buckets.items()},
+        }
+        write_sidecar(".search", marshal.dumps(data))
+
+    @classmethod
+    def load(cls, path):
+        """Loads a persisted index, returning (index, ledger key) or None."""
+        try:
+            with open(path, "rb") as file:
+                data = marshal.load(file)
+            if data["version"] != INDEX_VERSION:
+                return None
+            index = cls()
+            index.rows = data["rows"]
+            index.strings = data["strings"]
+            index.digest = data["digest"]
+            index.tokens = {token: array("I", rows) for token, rows in data["tokens"].items()}
+            index.buckets = {bucket: array("I", rows) for bucket, rows in data["buckets"].items()}
+            return index, data["key"]
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            return None
+
+
+@timed("search.load_search_index", rows=lambda args, result: result.rows)
+def load_search_index(store=None):
+    """
+    Returns a search index that covers every row of the ledger.
+
+    The index is kept in memory and persisted next to the transactions file.
+    Rows appended since it was last saved are indexed incrementally; any
+    other change to the ledger rebuilds it.
+    """
+    global _index
+    store = load_transaction_store() if store is None else store
+    key = ledger_key()
+    if _index is not None and _index[1] == key and _index[0].rows == len(store):
+        return _index[0]
+
+    loaded = SearchIndex.load(sidecar_path(".search"))
+    if loaded is not None and loaded[1] == key and loaded[0].rows == len(store):
+        index = loaded[0]
+    else:
+        index = loaded[0] if loaded is not None else SearchIndex()
+        if not index.covers_prefix_of(store):
+            index = SearchIndex()
+        index.extend(store)
+        try:
+            index.save(key)
+        except OSError:
+            pass  # Rebuilt from the ledger when missing
+    _index = (index, key)
+    return index
+
+
+def _parse_amount(text):
+    """Converts a rupee amount in a query to paisa."""
+    try:
+        return int(Decimal(text.replace(",", "")) * 100)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_query(text, categories=(), today=None):
+    """
+    Parses a query such as "uber in Transport over 500 last quarter".
+
+    Understands "in <category>", "over/under <amount>", "last
+    week/month/quarter/year", "this month/year" and "expense/income";
+    every other word must appear in the description.
+    """
+    today = today or datetime.date.today()
+    categories_by_name = {category.lower(): category for category in categories}
+    query = {"terms": [], "category": None, "type": None, "min_amount": None, "max_amount": None, "start": None}
+    words = text.split()
+    position = 0
+    while position < len(words):
+        word = words[position].lower()
+        following = words[position + 1].lower() if position + 1 < len(words) else None
+        if word == "in" and following in categories_by_name:
+            query["category"] = categories_by_name[following]
+            position += 2
+        elif word in ("over", "above", "under", "below") and following and _parse_amount(following) is not None:
+            query["min_amount" if word in ("over", "above") else "max_amount"] = _parse_amount(following)
+            position += 2
+        elif word == "last" and following in PERIODS:
+            query["start"] = today - datetime.timedelta(days=PERIODS[following])
+            position += 2
+        elif word == "this" and following in ("month", "year"):
+            query["start"] = today.replace(day=1) if following == "month" else today.replace(month=1, day=1)
+            position += 2
+        elif word in ("expense", "expenses", "income"):
+            query["type"] = "Income" if word == "income" else "Expense"
+            position += 1
+        else:
+            query["terms"].extend(tokenize(word))
+            position += 1
+    return query
+
+
+def _contains(rows, index):
+    """Returns True if sorted posting list `rows` contains `index`."""
+    position = bisect_left(rows, index)
+    return position < len(rows) and rows[position] == index
+
+
+@timed("search.search")
+def search(text, limit=50, store=None, today=None):
+    """
+    Returns the indices of transactions matching a query, newest first.
+
+    The most selective posting list (description token, category, type or
+    amount bucket) drives the search; every other condition is checked by
+    binary search or against the columns of that short candidate list.
+    """
+    store = load_transaction_store() if store is None else store
+    index = load_search_index(store)
+    query = parse_query(text, store.pools["category"].strings, today)
+
+    postings = []
+    for term in query["terms"]:
+        postings.append(index.tokens.get(term, array("I")))
+    if query["category"]:
+        postings.append(store.rows_with("category", query["category"]))
+    if query["type"]:
+        postings.append(store.rows_with("type", query["type"]))
+
+    start = query["start"].toordinal() if query["start"] else None
+    if postings:
+        postings.sort(key=len)
+        candidates, others = postings[0], postings[1:]
+        if start is not None and store.dates_sorted:
+            # Postings are in row order, which is date order; skip straight to the range.
+            candidates = candidates[bisect_left(candidates, store.indices_between(start, None).start):]
+    elif query["min_amount"] is not None or query["max_amount"] is not None:
+        low = amount_bucket(query["min_amount"] or 0)
+        high = amount_bucket(query["max_amount"]) if query["max_amount"] is not None else max(index.buckets, default=0)
+        candidates, others = sorted(row for bucket in range(low, high + 1) for row in index.buckets.get(bucket, ())), []
+    else:
+        candidates, others = store.indices_between(start, None), []
+
+    dates = store.column("date")
+    amounts = store.column("amount")
+    matches = []
+    for row in candidates:
+        if start is not None and dates[row] < start:
+            continue
+        if query["min_amount"] is not None and amounts[row] <= query["min_amount"]:
+            continue
+        if query["max_amount"] is not None and amounts[row] >= query["max_amount"]:
+            continue
+        if all(_contains(rows, row) for rows in others):
+            matches.append(row)
+
+    return heapq.nlargest(limit, matches, key=lambda row: (dates[row], row))
@@ -1,83 +1,231 @@
 import questionary
-from rich.console import Console
 from rich.table import Table
 import datetime
-from finace_tracker.database import load_transactions, save_transactions
-
-# Initialize Rich Console
-console = Console()
+from bisect import bisect_right
+from decimal import Decimal, InvalidOperation
+from finace_tracker.currency import BASE_CURRENCY, format_amount, normalize_currency
+from finace_tracker.database import (
+    MAX_AMOUNT,
+    TransactionStore,
+    load_fx_rates,
+    load_transaction_store,
+    append_transaction,
+    amend_transaction,
+    delete_transaction,
+    get_transaction,
+)
+from finace_tracker.categories import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+from finace_tracker.features.analytics.forecast import show_forecast_alerts
+from finace_tracker.features.budgets.budgets import show_budget_alerts
+from finace_tracker.features.search.search import search
+from finace_tracker.instrumentation import timed
+from finace_tracker.console import console
 
 # In-memory data store for transactions
-transactions = []
+transactions = TransactionStore()
 
-# Transaction categories from gemini.md
-EXPENSE_CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Other"]
-INCOME_CATEGORIES = ["Salary", "Freelance", "Business", "Investment", "Gift", "Other"]
+# Number of transactions shown per page
+PAGE_SIZE = 20
 
 
-def add_transaction():
-    """Adds a new transaction (expense or income)."""
+def _prompt_transaction(current=None):
+    """Asks for the fields of a transaction, offering those of `current` as defaults; None if cancelled."""
+    current = current or {}
     transaction_type = questionary.select(
         "Select transaction type:",
         choices=["Expense", "Income"],
+        default=current.get("type"),
     ).ask()
 
     if transaction_type is None:
-        return
+        return None
 
-    if transaction_type == "Expense":
-        category = questionary.select("Select expense category:", choices=EXPENSE_CATEGORIES).ask()
-    else:
-        category = questionary.select("Select income category:", choices=INCOME_CATEGORIES).ask()
+    categories = EXPENSE_CATEGORIES if transaction_type == "Expense" else INCOME_CATEGORIES
+    category = questionary.select(
+        f"Select {transaction_type.lower()} category:",
+        choices=categories,
+        default=current.get("category") if current.get("category") in categories else None,
+    ).ask()
 
     if category is None:
-        return
+        return None
 
-    amount_str = questionary.text("Enter the amount:").ask()
+    amount_default = f"{current['amount'] / 100:.2f}" if current else ""
+    amount_str = questionary.text("Enter the amount:", default=amount_default).ask()
     if amount_str is None:
-        return
+        return None
 
     try:
-        # Store amount in cents
-        amount = int(float(amount_str) * 100)
-    except ValueError:
+        amount = Decimal(amount_str)
+    except InvalidOperation:
+        amount = None
+    if amount is None or not amount.is_finite():
         console.print("[bold red]Invalid amount. Please enter a number.[/bold red]")
-        return
+        return None
+    # Compare before converting to cents: 1e999999 * 100 would overflow the decimal context
+    if abs(amount) > Decimal(MAX_AMOUNT) / 100:
+        console.print("[bold red]The amount is too large.[/bold red]")
+        return None
+    # Store amount in cents
+    amount = int(amount * 100)
+
+    currency = questionary.text(f"Enter the currency (blank for {BASE_CURRENCY}):", default=current.get("currency", "")).ask()
+    if currency is None:
+        return None
+    try:
+        currency = normalize_currency(currency)
+    except ValueError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        return None
 
-    description = questionary.text("Enter a description:").ask()
+    description = questionary.text("Enter a description:", default=current.get("description", "")).ask()
     if description is None:
-        return
+        return None
+
+    date = datetime.date.today().isoformat()
+    if current:
+        date = questionary.text("Enter the date (YYYY-MM-DD):", default=current["date"]).ask()
+        if date is None:
+            return None
+        try:
+            date = datetime.date.fromisoformat(date.strip()).isoformat()
+        except ValueError:
+            console.print("[bold red]Invalid date. Please use YYYY-MM-DD.[/bold red]")
+            return None
+    try:
+        # Amounts are converted at the rate of the transaction's own date
+        load_fx_rates().rate_on(currency, datetime.date.fromisoformat(date))
+    except ValueError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        return None
 
     transaction = {
-        "date": datetime.date.today().isoformat(),
+        "date": date,
         "type": transaction_type,
         "category": category,
         "amount": amount,
         "description": description,
     }
+    if currency:
+        transaction["currency"] = currency
+    return transaction
+
 
-    transactions.append(transaction)
-    save_transactions(transactions)
+def _prompt_transaction_id():
+    """Asks for a transaction ID, returning (ID, transaction) or None if cancelled or unknown."""
+    answer = questionary.text("Enter the transaction ID (shown in View Transactions):").ask()
+    if not answer:
+        return None
+    try:
+        transaction_id = int(answer)
+        return transaction_id, get_transaction(transaction_id)
+    except ValueError:
+        console.print(f"[bold red]No transaction with ID {answer}.[/bold red]")
+        return None
+
+
+@timed("menu.add_transaction", rows=None)
+def add_transaction():
+    """Adds a new transaction (expense or income)."""
+    global transactions
+    transaction = _prompt_transaction()
+    if transaction is None:
+        return
+
+    append_transaction(transaction)
+    # The cached ledger already includes the new row
+    transactions = load_transaction_store()
     console.print("[bold green]Transaction added successfully![/bold green]")
+    show_budget_alerts(transaction)
+    show_forecast_alerts(transaction)
 
 
-def view_transactions():
-    """Displays all transactions in a table."""
-    if not transactions:
-        console.print("[bold yellow]No transactions to display.[/bold yellow]")
+@timed("menu.edit_transaction", rows=None)
+def edit_transaction():
+    """Edits a transaction chosen by ID; the change is appended to the ledger as an amend record."""
+    global transactions
+    found = _prompt_transaction_id()
+    if found is None:
         return
+    transaction_id, current = found
+    transaction = _prompt_transaction(current)
+    if transaction is None:
+        return
+
+    amend_transaction(transaction_id, transaction)
+    transactions = load_transaction_store()
+    console.print("[bold green]Transaction updated successfully![/bold green]")
 
-    table = Table(title="All Transactions")
+
+@timed("menu.delete_transaction", rows=None)
+def delete_transaction_by_id():
+    """Deletes a transaction chosen by ID after confirmation."""
+    global transactions
+    found = _prompt_transaction_id()
+    if found is None:
+        return
+    transaction_id, current = found
+    summary = f"{current['date']} {current['category']} {format_amount(current['amount'], current.get('currency'))} {current['description']}"
+    if not questionary.confirm(f"Delete transaction {transaction_id} ({summary})?", default=False).ask():
+        return
+
+    delete_transaction(transaction_id)
+    transactions = load_transaction_store()
+    console.print("[bold green]Transaction deleted successfully![/bold green]")
+
+
+def matching_rows(store, transaction_type=None, category=None):
+    """
+    Returns the indices of transactions matching the filters, oldest first.
+
+    Filters are served by the store's type and category posting index, so
+    only matching rows are touched.
+    """
+    if category is not None:
+        rows = store.rows_with("category", category)
+        if transaction_type is not None:
+            type_code = store.encode("type", transaction_type)
+            types = store.column("type")
+            rows = [index for index in rows if types[index] == type_code]
+    elif transaction_type is not None:
+        rows = store.rows_with("type", transaction_type)
+    else:
+        rows = range(len(store))
+
+    if not store.dates_sorted:
+        rows = sorted(rows, key=store.column("date").__getitem__)
+    return rows
+
+
+def page_rows(rows, offset, page_size=PAGE_SIZE):
+    """Returns one page of `rows`, newest first, skipping the `offset` newest rows."""
+    end = len(rows) - offset
+    return [rows[index] for index in range(end - 1, max(end - page_size, 0) - 1, -1)]
+
+
+def offset_for_date(store, rows, date):
+    """Returns the page offset at which the newest transaction on or before `date` comes first."""
+    dates = store.column("date")
+    return len(rows) - bisect_right(rows, date.toordinal(), key=dates.__getitem__)
+
+
+def _render_page(store, indices, title):
+    """Renders one page of transactions."""
+    table = Table(title=title)
+    table.add_column("ID", justify="right", style="dim")
     table.add_column("Date", style="cyan")
     table.add_column("Type", style="magenta")
     table.add_column("Category", style="green")
     table.add_column("Amount", justify="right", style="yellow")
     table.add_column("Description", style="white")
 
-    for t in transactions:
+    ids = store.column("id")
+    for index in indices:
+        t = store.row(index)
         # Display amount in currency format
-        display_amount = f"{t['amount'] / 100:.2f}"
+        display_amount = format_amount(t["amount"], t.get("currency"))
         table.add_row(
+            str(ids[index]),
             t["date"],
             t["type"],
             t["category"],
@@ -88,21 +236,100 @@ def view_transactions():
     console.print(table)
 
 
+@timed("menu.view_transactions", rows=None)
+def view_transactions():
+    """Displays transactions one page at a time, newest first."""
+    store = transactions
+    if not len(store):
+        console.print("[bold yellow]No transactions to display.[/bold yellow]")
+        return
+
+    transaction_type = None
+    category = None
+    rows = matching_rows(store)
+    offset = 0
+    while True:
+        if not rows:
+            console.print("[bold yellow]No transactions match the filters.[/bold yellow]")
+        else:
+            first, last = offset + 1, min(offset + PAGE_SIZE, len(rows))
+            filters = ", ".join(f for f in (transaction_type, category) if f) or "All"
+            _render_page(store, page_rows(rows, offset), f"Transactions ({filters}) {first}-{last} of {len(rows)}")
+
+        choices = []
+        if offset + PAGE_SIZE < len(rows):
+            choices.append("Older")
+        if offset > 0:
+            choices.append("Newer")
+        choices += ["Jump to Date", "Filter by Type", "Filter by Category", "Clear Filters", "Back"]
+        choice = questionary.select("Navigate:", choices=choices).ask()
+
+        if choice == "Older":
+            offset += PAGE_SIZE
+        elif choice == "Newer":
+            offset = max(offset - PAGE_SIZE, 0)
+        elif choice == "Jump to Date":
+            answer = questionary.text("Show transactions on or before (YYYY-MM-DD):").ask()
+            if answer:
+                try:
+                    offset = min(offset_for_date(store, rows, datetime.date.fromisoformat(answer.strip())), max(len(rows) - 1, 0))
+                except ValueError:
+                    console.print("[bold red]Invalid date. Please use YYYY-MM-DD.[/bold red]")
+        elif choice in ("Filter by Type", "Filter by Category", "Clear Filters"):
+            if choice == "Filter by Type":
+                transaction_type = questionary.select("Select transaction type:", choices=["Expense", "Income"]).ask()
+            elif choice == "Filter by Category":
+                category = questionary.select("Select category:", choices=list(dict.fromkeys(EXPENSE_CATEGORIES + INCOME_CATEGORIES))).ask()
+            else:
+                transaction_type = category = None
+            rows = matching_rows(store, transaction_type, category)
+            offset = 0
+        elif choice == "Back" or choice is None:
+            break
+
+
+@timed("menu.search_transactions", rows=None)
+def search_transactions():
+    """Searches descriptions and facets, e.g. "uber in Transport over 500 last quarter"."""
+    query = questionary.text("Search (e.g. uber in Transport over 500 last quarter):").ask()
+    if not query:
+        return
+
+    results = search(query, limit=PAGE_SIZE, store=transactions)
+    if not results:
+        console.print("[bold yellow]No transactions match your search.[/bold yellow]")
+        return
+    _render_page(transactions, results, f"Search results for \"{query}\"")
+
+
 def transactions_menu():
     """
     Displays the menu for transaction management.
     """
     global transactions
-    transactions = load_transactions()
+    transactions = load_transaction_store()
     while True:
         choice = questionary.select(
             "Transaction Management",
-            choices=["Add Transaction", "View Transactions", "Back to Main Menu"],
+            choices=[
+                "Add Transaction",
+                "View Transactions",
+                "Search Transactions",
+                "Edit Transaction",
+                "Delete Transaction",
+                "Back to Main Menu",
+            ],
         ).ask()
 
         if choice == "Add Transaction":
             add_transaction()
+        elif choice == "Edit Transaction":
+            edit_transaction()
+        elif choice == "Delete Transaction":
+            delete_transaction_by_id()
         elif choice == "View Transactions":
             view_transactions()
+        elif choice == "Search Transactions":
+            search_transactions()
         elif choice == "Back to Main Menu" or choice is None:
             break
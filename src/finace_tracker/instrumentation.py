@@ -0,0 +1,144 @@
+"""
+Opt-in timings, counters and profiling for the finance tracker.
+
+Instrumentation is off unless FINANCE_TRACKER_DIAGNOSTICS is set ("1" for
+timings and counters, "profile" to also record a cProfile trace of the
+session) or main() is started with --diagnostics / --profile. While it is
+off, instrumented functions cost one flag check per call.
+"""
+import atexit
+import datetime
+import functools
+import os
+import time
+
+# Directory that receives one cProfile trace per profiled session
+PROFILE_DIR = "database/profiles"
+
+# name -> {"calls", "seconds", "rows", "last_seconds", "last_rows"}
+timings = {}
+
+# name -> running total, e.g. cache hits or bytes read
+counters = {}
+
+_enabled = False
+_profiler = None
+_profile_path = None
+
+
+def is_enabled():
+    """Returns True if timings and counters are being recorded."""
+    return _enabled
+
+
+def enable(profile=False):
+    """Starts recording timings and counters, and a cProfile trace if `profile` is set."""
+    global _enabled, _profiler, _profile_path
+    _enabled = True
+    if profile and _profiler is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        _profile_path = os.path.join(PROFILE_DIR, f"session-{stamp}.prof")
+        import cProfile  # Only needed when profiling
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        atexit.register(stop_profile)
+
+
+def disable():
+    """Stops recording; a running profile is saved first."""
+    global _enabled
+    stop_profile()
+    _enabled = False
+
+
+def enable_from_environment():
+    """Enables instrumentation as requested by FINANCE_TRACKER_DIAGNOSTICS."""
+    mode = os.environ.get("FINANCE_TRACKER_DIAGNOSTICS", "").strip().lower()
+    if mode == "profile":
+        enable(profile=True)
+    elif mode not in ("", "0", "off", "false"):
+        enable()
+
+
+def profile_path():
+    """Returns the path the running profile will be saved to, or None."""
+    return _profile_path if _profiler is not None else None
+
+
+def stop_profile():
+    """
+    Stops the session profile and saves it, returning its path or None.
+
+    The file is in pstats format, readable by `python -m pstats` and by
+    viewers such as snakeviz or flameprof for flame graphs.
+    """
+    global _profiler, _profile_path
+    if _profiler is None:
+        return None
+    profiler, path = _profiler, _profile_path
+    _profiler = _profile_path = None
+    profiler.disable()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler.dump_stats(path)
+    return path
+
+
+def reset():
+    """Forgets every recorded timing and counter."""
+    timings.clear()
+    counters.clear()
+
+
+def count(name, amount=1):
+    """Adds `amount` to a counter."""
+    if _enabled:
+        counters[name] = counters.get(name, 0) + amount
+
+
+def record(name, seconds, rows=None):
+    """Records one timed call of `name`, optionally with the number of rows it handled."""
+    entry = timings.get(name)
+    if entry is None:
+        entry = timings[name] = {"calls": 0, "seconds": 0.0, "rows": 0, "last_seconds": 0.0, "last_rows": None}
+    entry["calls"] += 1
+    entry["seconds"] += seconds
+    entry["last_seconds"] = seconds
+    entry["last_rows"] = rows
+    if rows is not None:
+        entry["rows"] += rows
+
+
+def _result_rows(args, result):
+    """Counts the rows in a returned list, store or mapping."""
+    if hasattr(result, "__len__") and not isinstance(result, str):
+        return len(result)
+    return None
+
+
+def argument_rows(args, result):
+    """Counts the rows in the first argument, for functions that write what they are given."""
+    return len(args[0]) if args else None
+
+
+def timed(name, rows=_result_rows):
+    """
+    Decorates a function so each call records its wall time under `name`.
+
+    `rows(args, result)` returns the number of rows the call handled; by
+    default the length of the result.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                record(name, time.perf_counter() - started)
+                raise
+            record(name, time.perf_counter() - started, rows(args, result) if rows else None)
+            return result
+        return wrapper
+    return decorator
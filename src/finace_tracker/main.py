@@ -1,40 +1,73 @@
+import argparse
+import importlib
+import sys
 import questionary
-from rich.console import Console
 from rich.panel import Panel
-from finace_tracker.features.transactions.transactions import transactions_menu
-from finace_tracker.features.budgets.budgets import budgets_menu
-from finace_tracker.features.analytics.analytics import analytics_menu
+from finace_tracker import cli, instrumentation, profiles
+from finace_tracker.console import console
 
-# Initialize Rich Console
-console = Console()
+# Menu entries and the function each one runs, as "module:function". Feature
+# modules (and the storage, NumPy and table code they pull in) are imported on
+# first selection, so the first prompt appears without waiting for them.
+MENU = {
+    "Manage Transactions": "finace_tracker.features.transactions.transactions:transactions_menu",
+    "Manage Budgets": "finace_tracker.features.budgets.budgets:budgets_menu",
+    "View Analytics": "finace_tracker.features.analytics.analytics:analytics_menu",
+    "Import Transactions": "finace_tracker.features.imports.imports:import_menu",
+    "Import FX Rates": "finace_tracker.features.imports.imports:import_fx_rates_menu",
+    "Export Transactions": "finace_tracker.features.exports.exports:export_menu",
+    "Diagnostics": "finace_tracker.features.diagnostics.diagnostics:diagnostics_menu",
+    "Switch Profile": "finace_tracker.features.profiles.profiles:profiles_menu",
+}
 
-def main():
+
+def load_action(target):
+    """Imports a "module:function" target and returns the function."""
+    module_name, function_name = target.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def main(argv=None):
     """
     Main function to display the menu and handle user choices.
+
+    With a subcommand (see cli.py), runs it without prompting and exits.
     """
+    parser = argparse.ArgumentParser(description="Personal Finance Tracker")
+    parser.add_argument("--diagnostics", action="store_true", help="record timings and counters for the Diagnostics menu")
+    parser.add_argument("--profile", action="store_true", help="also save a cProfile trace of the session")
+    cli.add_subcommands(parser)
+    args = parser.parse_args(argv)
+    try:
+        profiles.activate_from_environment(args.ledger)
+    except ValueError as e:
+        parser.error(str(e))
+    instrumentation.enable_from_environment()
+    if args.diagnostics or args.profile:
+        instrumentation.enable(profile=args.profile)
+
+    if args.command:
+        status = cli.run(args)
+        instrumentation.stop_profile()
+        return status
+
     console.print(Panel("[bold green]Welcome to the Personal Finance Tracker![/bold green]"))
 
     while True:
         choice = questionary.select(
-            "What would you like to do?",
-            choices=[
-                "Manage Transactions",
-                "Manage Budgets",
-                "View Analytics",
-                "Exit",
-            ],
+            f"What would you like to do? [{profiles.shard_name(*profiles.current())}]",
+            choices=[*MENU, "Exit"],
         ).ask()
 
-        if choice == "Manage Transactions":
-            transactions_menu()
-        elif choice == "Manage Budgets":
-            budgets_menu()
-        elif choice == "View Analytics":
-            analytics_menu()
+        if choice in MENU:
+            load_action(MENU[choice])()
         elif choice == "Exit" or choice is None:
+            path = instrumentation.stop_profile()
+            if path:
+                console.print(f"[bold]Profile saved to {path}[/bold]")
             console.print("[bold green]Goodbye![/bold green]")
             break
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
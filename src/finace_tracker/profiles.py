@@ -0,0 +1,173 @@
+"""
+Profiles and accounts, each stored as its own ledger shard.
+
+A profile is a household or a business with its own budgets and one or
+more accounts. Every account is a shard: a directory with its own
+transactions file and its own snapshot, indexes and daemon socket. Caches
+are keyed by file path, so shards never share one. The default profile's
+main account is the original ledger, so existing data needs no migration:
+
+    database/transactions.txt            default profile, main account
+    database/budgets.txt                 default profile, budgets of every account
+    database/accounts/<account>/         default profile, other accounts
+    database/ledgers/<profile>/          other profiles, laid out as database/
+
+Activating a shard points the storage paths in database.py at it. This
+module does not import database.py until then, keeping start-up fast.
+"""
+import os
+import re
+from contextlib import contextmanager
+
+DATABASE_DIR = "database"
+DEFAULT_PROFILE = "default"
+MAIN_ACCOUNT = "main"
+
+# Environment variable naming the shard to use, as "profile" or "profile/account"
+PROFILE_ENV = "FINANCE_TRACKER_PROFILE"
+
+_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]*")
+
+# The active (profile, account)
+_current = (DEFAULT_PROFILE, MAIN_ACCOUNT)
+
+
+def check_name(name):
+    """Raises ValueError unless `name` can name a profile or an account (and a directory)."""
+    if not isinstance(name, str) or not _NAME.fullmatch(name):
+        raise ValueError(f"invalid name {name!r}; use letters, digits, '.', '_' and '-'")
+
+
+def profile_dir(profile):
+    """Returns the directory holding a profile's budgets and main account."""
+    check_name(profile)
+    if profile == DEFAULT_PROFILE:
+        return DATABASE_DIR
+    return os.path.join(DATABASE_DIR, "ledgers", profile)
+
+
+def account_dir(profile, account=MAIN_ACCOUNT):
+    """Returns the directory of an account's shard."""
+    check_name(account)
+    if account == MAIN_ACCOUNT:
+        return profile_dir(profile)
+    return os.path.join(profile_dir(profile), "accounts", account)
+
+
+def shard_paths(profile, account=MAIN_ACCOUNT):
+    """Returns the transactions, budgets and SQLite paths of a shard."""
+    directory = account_dir(profile, account)
+    return {
+        "transactions": os.path.join(directory, "transactions.txt"),
+        "budgets": os.path.join(profile_dir(profile), "budgets.txt"),
+        "sqlite": os.path.join(directory, "finance.db"),
+    }
+
+
+def parse_shard(text):
+    """Parses "profile" or "profile/account" into (profile, account)."""
+    profile, _, account = text.partition("/")
+    account = account or MAIN_ACCOUNT
+    check_name(profile)
+    check_name(account)
+    return profile, account
+
+
+def shard_name(profile, account=MAIN_ACCOUNT):
+    """Formats a shard as parse_shard() reads it."""
+    return profile if account == MAIN_ACCOUNT else f"{profile}/{account}"
+
+
+def list_profiles():
+    """Returns the names of every profile, the default one first."""
+    try:
+        names = sorted(
+            name for name in os.listdir(os.path.join(DATABASE_DIR, "ledgers"))
+            if _NAME.fullmatch(name) and name != DEFAULT_PROFILE
+        )
+    except FileNotFoundError:
+        names = []
+    return [DEFAULT_PROFILE] + names
+
+
+def list_accounts(profile):
+    """Returns the names of a profile's accounts, the main one first."""
+    try:
+        names = sorted(
+            name for name in os.listdir(os.path.join(profile_dir(profile), "accounts"))
+            if _NAME.fullmatch(name) and name != MAIN_ACCOUNT
+        )
+    except FileNotFoundError:
+        names = []
+    return [MAIN_ACCOUNT] + names
+
+
+def list_shards(profiles=None):
+    """Returns (profile, account) for every account of `profiles` (default: every profile)."""
+    return [
+        (profile, account)
+        for profile in (list_profiles() if profiles is None else profiles)
+        for account in list_accounts(profile)
+    ]
+
+
+def select_shards(names):
+    """
+    Returns the shards named by "profile" (each of its accounts) or
+    "profile/account" strings, without duplicates.
+    """
+    shards = []
+    for name in names:
+        profile, account = parse_shard(name)
+        for shard in list_shards([profile]) if "/" not in name else [(profile, account)]:
+            if shard not in shards:
+                shards.append(shard)
+    return shards
+
+
+def create_shard(profile, account=MAIN_ACCOUNT):
+    """Creates the directory of a profile or account; it holds no transactions yet."""
+    os.makedirs(account_dir(profile, account), exist_ok=True)
+
+
+def current():
+    """Returns the active (profile, account)."""
+    return _current
+
+
+def activate(profile, account=MAIN_ACCOUNT):
+    """Points the storage backends at a shard; later loads and saves use its files."""
+    global _current
+    from finace_tracker import database
+
+    paths = shard_paths(profile, account)
+    database.TRANSACTIONS_FILE = paths["transactions"]
+    database.BUDGETS_FILE = paths["budgets"]
+    database.SQLITE_FILE = paths["sqlite"]
+    _current = (profile, account)
+
+
+@contextmanager
+def using(profile, account=MAIN_ACCOUNT):
+    """Activates a shard for the duration of a with block, then restores the previous files."""
+    global _current
+    from finace_tracker import database
+
+    saved = (database.TRANSACTIONS_FILE, database.BUDGETS_FILE, database.SQLITE_FILE, _current)
+    activate(profile, account)
+    try:
+        yield
+    finally:
+        database.TRANSACTIONS_FILE, database.BUDGETS_FILE, database.SQLITE_FILE, _current = saved
+
+
+def activate_from_environment(text=None):
+    """
+    Activates the shard named by `text`, else by FINANCE_TRACKER_PROFILE, if
+    either is set, creating it on first use.
+    """
+    text = text or os.environ.get(PROFILE_ENV)
+    if text:
+        profile, account = parse_shard(text)
+        create_shard(profile, account)
+        activate(profile, account)
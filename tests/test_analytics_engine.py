@@ -0,0 +1,189 @@
+import unittest
+import os
+import datetime
+import tempfile
+from unittest import mock
+import finace_tracker.database
+from finace_tracker.database import (
+    amend_transaction,
+    append_transaction,
+    clear_cache,
+    load_monthly_index,
+    load_transaction_store,
+    save_budgets,
+    save_transactions,
+)
+from finace_tracker.features.analytics import forecast, parallel, trends
+from finace_tracker.features.analytics.engine import (
+    build_report,
+    monthly_report,
+    health_score,
+    recent_transactions,
+    LedgerSummary,
+)
+
+TRANSACTIONS = [
+    {"date": "2025-01-05", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"},
+    {"date": "2025-01-06", "type": "Expense", "category": "Food", "amount": 20000, "description": "Groceries"},
+    {"date": "2025-01-20", "type": "Expense", "category": "Transport", "amount": 5000, "description": "Fuel"},
+    {"date": "2025-01-25", "type": "Expense", "category": "Food", "amount": 10000, "description": "Dinner"},
+    {"date": "2025-02-01", "type": "Expense", "category": "Bills", "amount": 7000, "description": "Water"},
+]
+
+
+class TestAnalyticsEngine(unittest.TestCase):
+    def setUp(self):
+        """Set up test files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        finace_tracker.database.BUDGETS_FILE = os.path.join(self.tmp_dir.name, "budgets.txt")
+        save_transactions(list(TRANSACTIONS))
+        save_budgets({"Food": 25000, "Bills": 10000})
+
+    def tearDown(self):
+        """Tear down test files."""
+        self.tmp_dir.cleanup()
+
+    def test_build_report(self):
+        """Test a report over a date range of the columnar store."""
+        report = build_report(start=datetime.date(2025, 1, 1), end=datetime.date(2025, 2, 1))
+        self.assertEqual(report["expenses_by_category"], {"Food": 30000, "Transport": 5000})
+        self.assertEqual(list(report["expenses_by_category"]), ["Food", "Transport"])
+        self.assertEqual(report["income_by_source"], {"Salary": 100000})
+        self.assertEqual(report["savings"], 65000)
+        self.assertEqual(report["savings_rate"], 65)
+        self.assertEqual(report["average_daily_expense"], 35000 / 31)
+        food = report["budgets"][0]
+        self.assertEqual((food["category"], food["spent"], food["remaining"]), ("Food", 30000, -5000))
+        self.assertEqual(food["utilization"], 120)
+
+    def test_monthly_report_matches_build_report(self):
+        """Test that the index-backed monthly report agrees with the column scan."""
+        scanned = build_report(start=datetime.date(2025, 1, 1), end=datetime.date(2025, 2, 1))
+        self.assertEqual(monthly_report(2025, 1), scanned)
+
+    def test_health_score(self):
+        """Test scoring a month with savings and a month with only expenses."""
+        # Savings rate, budget adherence and income vs expenses all score
+        self.assertEqual(health_score(monthly_report(2025, 1)), 100)
+        # Only budget adherence scores
+        self.assertEqual(health_score(monthly_report(2025, 2)), 30)
+
+    def test_recent_transactions(self):
+        """Test that recent transactions come newest first."""
+        recent = recent_transactions(count=2)
+        self.assertEqual([t["date"] for t in recent], ["2025-02-01", "2025-01-25"])
+        self.assertEqual(len(recent_transactions(count=10)), len(TRANSACTIONS))
+
+    def test_ledger_summary(self):
+        """Test that the summary follows appends incrementally and rebuilds after a rewrite."""
+        summary = LedgerSummary(recent_count=2).refresh()
+        self.assertEqual(summary.report(), build_report())
+        append_transaction({"date": "2025-02-02", "type": "Expense", "category": "Food", "amount": 3000, "description": "Snack"})
+        store = load_transaction_store()
+        self.assertIs(store, summary.store)
+        summary.refresh(store)
+        self.assertEqual(summary.rows, len(TRANSACTIONS) + 1)
+        self.assertEqual(summary.report(), build_report())
+        self.assertEqual(summary.recent(), recent_transactions(count=2))
+
+        save_transactions(list(TRANSACTIONS[:2]))
+        summary.refresh()
+        self.assertEqual(summary.report(), build_report())
+        self.assertEqual(summary.recent(), recent_transactions(count=2))
+
+    def test_parallel_month_sums(self):
+        """Test that serial and process-pool aggregation agree with the monthly index."""
+        self.assertEqual(parallel.month_sums(workers=1), load_monthly_index())
+        original = parallel.PARALLEL_MIN_ROWS
+        parallel.PARALLEL_MIN_ROWS = 0
+        try:
+            self.assertEqual(parallel.month_sums(workers=2), load_monthly_index())
+        finally:
+            parallel.PARALLEL_MIN_ROWS = original
+        january = parallel.month_sums(datetime.date(2025, 1, 10), datetime.date(2025, 2, 1), workers=1)
+        self.assertEqual(january, {(2025, 1): {("Expense", "Transport"): 5000, ("Expense", "Food"): 10000}})
+
+    def test_period_report(self):
+        """Test a report over several months with budgets scaled to the period."""
+        report = parallel.period_report(datetime.date(2025, 1, 1), datetime.date(2025, 3, 1), workers=1)
+        self.assertEqual(report["total_expenses"], 42000)
+        self.assertEqual(report["total_budgeted"], 70000)
+        self.assertEqual(report["average_daily_expense"], 42000 / 59)
+
+    def test_trends(self):
+        """Test monthly and yearly trends served from the rollups."""
+        months = trends.monthly_trend(3, end=datetime.date(2025, 2, 14))
+        self.assertEqual([month["period"] for month in months], ["2024-12", "2025-01", "2025-02"])
+        self.assertEqual([month["expenses"] for month in months], [0, 35000, 7000])
+        self.assertEqual(months[1]["savings_rate"], 65)
+        self.assertEqual(trends.category_trend(months)["Food"], [0, 30000, 0])
+        self.assertEqual(trends.rolling_average([0, 35000, 7000, 3000], window=3), [0, 17500, 14000, 15000])
+
+        # Appends are folded into the month rollup
+        append_transaction({"date": "2025-02-10", "type": "Income", "category": "Salary", "amount": 14000, "description": "Bonus"})
+        years = trends.yearly_trend(2, end=datetime.date(2025, 6, 1))
+        self.assertEqual([(year["period"], year["income"], year["expenses"]) for year in years], [("2024", 0, 0), ("2025", 114000, 42000)])
+
+    def test_daily_totals(self):
+        """Test day rollups over a date range."""
+        days = trends.daily_totals(datetime.date(2025, 1, 5), datetime.date(2025, 1, 8))
+        self.assertEqual(days["dates"], ["2025-01-05", "2025-01-06", "2025-01-07"])
+        self.assertEqual(days["income"], [100000, 0, 0])
+        self.assertEqual(days["expenses"], [0, 20000, 0])
+
+    def test_recurring_transactions_and_forecast(self):
+        """Test detecting monthly transactions and projecting them into a month's cash flow."""
+        ledger = []
+        for month in range(1, 5):
+            ledger.append({"date": f"2025-{month:02d}-01", "type": "Expense", "category": "Bills", "amount": 40000 + month, "description": f"Rent {month}/2025"})
+            ledger.append({"date": f"2025-{month:02d}-{3 * month:02d}", "type": "Expense", "category": "Food", "amount": 1000 * month, "description": "Groceries"})
+            ledger.append({"date": f"2025-{month:02d}-25", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"})
+        save_transactions(ledger)
+        save_budgets({"Bills": 45000, "Food": 1000})
+        today = datetime.date(2025, 4, 26)
+
+        recurring = forecast.recurring_transactions(today)
+        self.assertEqual([(r["category"], r["period"], r["next_date"]) for r in recurring], [
+            ("Bills", "monthly", datetime.date(2025, 5, 1)),
+            ("Salary", "monthly", datetime.date(2025, 5, 25)),
+        ])
+        may = forecast.forecast_month(2025, 5, today)
+        self.assertEqual((may["expected_income"], may["expected_expenses"], may["net"]), (100000, 40003, 59997))
+
+        # A rent rise is picked up incrementally and puts July's Bills budget on course to overrun
+        append_transaction({"date": "2025-05-01", "type": "Expense", "category": "Bills", "amount": 46000, "description": "Rent 5/2025"})
+        append_transaction({"date": "2025-06-01", "type": "Expense", "category": "Bills", "amount": 46000, "description": "Rent 6/2025"})
+        july = forecast.forecast_month(2025, 7, datetime.date(2025, 6, 2))
+        self.assertEqual(july["overruns"], [{"category": "Bills", "budget": 45000, "spent": 0, "projected": 46000, "overrun": 1000}])
+        # Budgets already exceeded are left to budget alerts
+        self.assertEqual(forecast.forecast_alerts(ledger[-2], today=datetime.date(2025, 4, 1)), [])
+
+    def test_recurring_detector_is_persisted(self):
+        """Test that a new process files only the rows added since the detector was saved, and rebuilds after an amend."""
+        rent = [
+            {"date": f"2025-{month:02d}-01", "type": "Expense", "category": "Bills", "amount": 40000, "description": "Rent"}
+            for month in range(1, 6)
+        ]
+        save_transactions(rent[:4])
+        forecast._detector = None
+        self.assertEqual([pattern["occurrences"] for pattern in forecast.recurring_detector().patterns()], [4])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, "transactions.recurring")))
+
+        append_transaction(rent[4])
+        clear_cache()
+        forecast._detector = None
+        with mock.patch.object(forecast, "description_hash", wraps=forecast.description_hash) as description_hash:
+            patterns = forecast.recurring_detector().patterns()
+        self.assertEqual(description_hash.call_count, 1)
+        self.assertEqual([(pattern["occurrences"], pattern["last_date"]) for pattern in patterns], [(5, datetime.date(2025, 5, 1))])
+
+        amend_transaction(1, dict(rent[0], category="Food"))
+        clear_cache()
+        forecast._detector = None
+        patterns = forecast.recurring_detector().patterns()
+        self.assertEqual([(pattern["category"], pattern["occurrences"]) for pattern in patterns], [("Bills", 4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
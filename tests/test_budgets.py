@@ -0,0 +1,69 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+import finace_tracker.database
+from finace_tracker.database import append_transaction, clear_cache, save_budgets, save_transactions
+from finace_tracker.features.budgets.budgets import ALERT_THRESHOLDS_ENV, alert_thresholds, budget_alerts, budget_status
+
+
+def expense(amount, date="2025-01-10", category="Food"):
+    return {"date": date, "type": "Expense", "category": category, "amount": amount, "description": "Test"}
+
+
+class TestBudgetAlerts(unittest.TestCase):
+    def setUp(self):
+        """Set up a temporary directory for test files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.original_transactions_file = finace_tracker.database.TRANSACTIONS_FILE
+        self.original_budgets_file = finace_tracker.database.BUDGETS_FILE
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        finace_tracker.database.BUDGETS_FILE = os.path.join(self.tmp_dir.name, "budgets.txt")
+        save_budgets({"Food": 10000, "Bills": 5000})
+        save_transactions([expense(5000)])
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        clear_cache()
+        finace_tracker.database.TRANSACTIONS_FILE = self.original_transactions_file
+        finace_tracker.database.BUDGETS_FILE = self.original_budgets_file
+        self.tmp_dir.cleanup()
+
+    def add(self, transaction):
+        append_transaction(transaction)
+        return [alert["threshold"] for alert in budget_alerts(transaction)]
+
+    def test_alerts_fire_once_per_threshold(self):
+        """Test that each threshold alerts only for the expense that crosses it."""
+        self.assertEqual(self.add(expense(1000)), [])
+        self.assertEqual(self.add(expense(1000)), [70])
+        self.assertEqual(self.add(expense(1000)), [])
+        self.assertEqual(self.add(expense(2000)), [100])
+        self.assertEqual(self.add(expense(500)), [])
+
+    def test_one_expense_can_cross_several_thresholds(self):
+        """Test a large expense crossing both thresholds at once."""
+        self.assertEqual(self.add(expense(6000)), [70, 100])
+
+    def test_no_alerts_without_a_budget_or_for_income(self):
+        """Test that unbudgeted categories, income and other months do not alert."""
+        self.assertEqual(self.add(expense(9000, category="Transport")), [])
+        self.assertEqual(self.add({**expense(9000), "type": "Income", "category": "Salary"}), [])
+        self.assertEqual(self.add(expense(1000, date="2025-02-01")), [])
+
+    def test_configured_thresholds(self):
+        """Test thresholds read from the environment."""
+        with mock.patch.dict(os.environ, {ALERT_THRESHOLDS_ENV: "100, 60"}):
+            self.assertEqual(alert_thresholds(), (60, 100))
+            self.assertEqual(self.add(expense(1000)), [60])
+
+    def test_budget_status(self):
+        """Test live utilization from the monthly totals."""
+        status = {entry["category"]: entry for entry in budget_status(2025, 1)}
+        self.assertEqual(status["Food"]["spent"], 5000)
+        self.assertEqual(status["Food"]["utilization"], 50)
+        self.assertEqual(status["Bills"]["remaining"], 5000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import finace_tracker.database
+from finace_tracker import daemon
+from finace_tracker.cli import execute
+from finace_tracker.database import save_transactions, save_budgets, load_transactions
+
+TRANSACTIONS = [
+    {"date": "2025-01-05", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"},
+    {"date": "2025-01-06", "type": "Expense", "category": "Food", "amount": 20000, "description": "Groceries"},
+    {"date": "2025-02-03", "type": "Expense", "category": "Transport", "amount": 5000, "description": "Fuel"},
+]
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        """Set up test files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        finace_tracker.database.BUDGETS_FILE = os.path.join(self.tmp_dir.name, "budgets.txt")
+        save_transactions(list(TRANSACTIONS))
+        save_budgets({"Food": 25000})
+
+    def tearDown(self):
+        """Tear down test files."""
+        self.tmp_dir.cleanup()
+
+    def test_add(self):
+        """Test adding a transaction and rejecting invalid ones."""
+        result = execute("add", {"type": "Expense", "category": "Food", "amount": "12.50", "description": "Tea", "date": "2025-02-04"})
+        self.assertEqual(result["added"]["amount"], 1250)
+        self.assertEqual(load_transactions()[-1]["description"], "Tea")
+        with self.assertRaises(ValueError):
+            execute("add", {"type": "Expense", "category": "Salary", "amount": "10"})
+        with self.assertRaises(ValueError):
+            execute("add", {"type": "Expense", "category": "Food", "amount": "ten"})
+        for amount in ("inf", "-Infinity", "nan", "sNaN", "1e20", "1e999999", "92233720368547758.08"):
+            with self.assertRaises(ValueError):
+                execute("add", {"type": "Expense", "category": "Food", "amount": amount})
+        self.assertEqual(load_transactions()[-1]["description"], "Tea")
+
+    def test_reports(self):
+        """Test that reports are JSON-compatible and cover the requested month."""
+        spending = execute("report", {"report": "spending", "month": "2025-01"})
+        self.assertEqual(spending["expenses_by_category"], {"Food": 20000})
+        self.assertEqual(spending["budgets"][0]["remaining"], 5000)
+        self.assertEqual(execute("report", {"report": "savings", "month": "2025-01"})["savings"], 80000)
+        self.assertEqual(execute("report", {"report": "spending", "year": 2025, "workers": 1})["total_expenses"], 25000)
+        self.assertEqual(execute("health-score", {"month": "2025-01"}), {"month": "2025-01", "score": 100})
+        forecast = execute("forecast", {"month": "2025-01"})
+        self.assertEqual(forecast["recorded_expenses"], 20000)
+        json.dumps(forecast)
+        years = execute("trends", {"years": 2})["periods"]
+        self.assertEqual(len(years), 2)
+        self.assertIn("average_expenses", years[-1])
+        json.dumps(spending)
+        with self.assertRaises(ValueError):
+            execute("health-score", {"month": "January"})
+
+    def test_compact(self):
+        """Test compacting the ledger from the command line."""
+        execute("add", {"type": "Expense", "category": "Food", "amount": "12.50", "description": "Tea", "date": "2025-02-04"})
+        self.assertEqual(execute("compact", {}), {"compacted": "csv", "transactions": 4})
+        with open(finace_tracker.database.TRANSACTIONS_FILE, newline="") as f:
+            self.assertEqual(len(f.readlines()), 5)
+
+    def test_export_to_stream(self):
+        """Test streaming an export to a binary stream."""
+        stdout = io.BytesIO()
+        options = {"output": "-", "export_format": "ndjson", "start": "2025-01-06", "end": None, "categories": None}
+        self.assertIsNone(execute("export", options, stdout))
+        rows = [json.loads(line) for line in stdout.getvalue().decode("utf-8").splitlines()]
+        self.assertEqual([row["date"] for row in rows], ["2025-01-06", "2025-02-03"])
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+    def test_daemon(self):
+        """Test running commands through the daemon."""
+        path = os.path.join(self.tmp_dir.name, "finance.sock")
+        server = daemon._Server(path, daemon._Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            self.assertTrue(daemon.is_running(path))
+            result = daemon.send(path, "health-score", {"month": "2025-01"}, io.BytesIO())
+            self.assertEqual(result["score"], 100)
+
+            stdout = io.BytesIO()
+            options = {"output": "-", "export_format": "csv", "start": None, "end": "2025-01-05", "categories": None}
+            self.assertIsNone(daemon.send(path, "export", options, stdout))
+            self.assertEqual(stdout.getvalue().decode("utf-8").splitlines()[1].split(",")[0], "2025-01-05")
+
+            with self.assertRaises(ValueError):
+                daemon.send(path, "export", dict(options, start="soon"), io.BytesIO())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import csv
+import datetime
+import os
+import tempfile
+import finace_tracker.database
+from finace_tracker import currency
+from finace_tracker.currency import RateTable, converted_totals, normalize_currency
+from finace_tracker.database import (
+    PartitionedBackend,
+    SqliteBackend,
+    append_transaction,
+    clear_cache,
+    load_fx_rates,
+    load_monthly_index,
+    load_transaction_store,
+    load_transactions,
+    monthly_sums,
+    save_fx_rates,
+    save_transactions,
+    set_backend,
+)
+from finace_tracker.features.analytics.engine import LedgerSummary, build_report, monthly_report
+from finace_tracker.features.imports.imports import import_fx_rates
+
+TRANSACTIONS = [
+    {"date": "2025-01-05", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"},
+    {"date": "2025-01-10", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch", "currency": "USD"},
+    {"date": "2025-02-10", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch", "currency": "USD"},
+]
+
+# Rupees per dollar
+RATES = [("USD", datetime.date(2025, 1, 1).toordinal(), 80.0), ("USD", datetime.date(2025, 2, 15).toordinal(), 85.0)]
+
+
+class TestCurrency(unittest.TestCase):
+    def setUp(self):
+        """Set up test files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        finace_tracker.database.BUDGETS_FILE = os.path.join(self.tmp_dir.name, "budgets.txt")
+        finace_tracker.database.SQLITE_FILE = os.path.join(self.tmp_dir.name, "finance.db")
+        finace_tracker.database.FX_RATES_FILE = os.path.join(self.tmp_dir.name, "fx_rates.txt")
+        save_fx_rates(RATES)
+
+    def tearDown(self):
+        """Tear down test files."""
+        set_backend("csv")
+        self.tmp_dir.cleanup()
+
+    def test_rate_lookup(self):
+        """Test that rates are looked up by date and unknown currencies are rejected."""
+        table = load_fx_rates()
+        self.assertEqual(table.rate_on("USD", datetime.date(2025, 2, 14)), 80.0)
+        self.assertEqual(table.rate_on("USD", datetime.date(2025, 2, 15)), 85.0)
+        self.assertEqual(table.rate_on("USD", datetime.date(2024, 6, 1)), 80.0)
+        self.assertEqual(table.month_rate("USD", 2025, 2), 85.0)
+        self.assertEqual(table.rate_on("", datetime.date(2025, 1, 1)), 1.0)
+        with self.assertRaises(ValueError):
+            table.rate_on("EUR", datetime.date(2025, 1, 1))
+        self.assertEqual(normalize_currency(" usd "), "USD")
+        self.assertEqual(normalize_currency(currency.BASE_CURRENCY), "")
+        with self.assertRaises(ValueError):
+            normalize_currency("dollars")
+
+    def test_ledger_keeps_currencies(self):
+        """Test that the currency column survives saves, appends, snapshots and a legacy log upgrade."""
+        with open(finace_tracker.database.TRANSACTIONS_FILE, "w", newline="") as f:
+            f.write("date,type,category,amount,description,id,op\n")
+            f.write("2025-01-05,Income,Salary,100000,Paycheck,1,\n")
+        append_transaction(TRANSACTIONS[1])
+        with open(finace_tracker.database.TRANSACTIONS_FILE, newline="") as f:
+            self.assertIn("currency", next(csv.reader(f)))
+        self.assertEqual(load_transactions(), TRANSACTIONS[:2])
+        clear_cache()
+        self.assertEqual(load_transactions(), TRANSACTIONS[:2])
+        self.assertEqual(list(load_transaction_store()), TRANSACTIONS[:2])
+
+        for backend in (SqliteBackend(), PartitionedBackend()):
+            set_backend(backend)
+            save_transactions(TRANSACTIONS[:2])
+            append_transaction(TRANSACTIONS[2])
+            self.assertEqual(load_transactions(), TRANSACTIONS)
+            self.assertEqual(monthly_sums(2025, 2), {("Expense", "Food"): 85000})
+            if isinstance(backend, SqliteBackend):
+                backend.close()
+
+    def test_totals_in_base_currency(self):
+        """Test that monthly totals and reports convert each month at its own rate."""
+        save_transactions(TRANSACTIONS)
+        self.assertEqual(monthly_sums(2025, 1), {("Income", "Salary"): 100000, ("Expense", "Food"): 80000})
+        self.assertEqual(load_monthly_index()[(2025, 2)], {("Expense", "Food"): 85000})
+        self.assertEqual(monthly_report(2025, 1)["total_expenses"], 80000)
+        self.assertEqual(build_report()["total_expenses"], 165000)
+        self.assertEqual(LedgerSummary().refresh().report()["total_expenses"], 165000)
+
+        # Conversions are memoized per currency and month
+        hits = converted_totals.cache_info().hits
+        monthly_sums(2025, 1)
+        self.assertEqual(converted_totals.cache_info().hits, hits + 1)
+
+        # New rates take effect without serving stale conversions
+        save_fx_rates(RateTable([("USD", datetime.date(2025, 1, 1).toordinal(), 90.0)]))
+        self.assertEqual(monthly_sums(2025, 1)[("Expense", "Food")], 90000)
+        self.assertEqual(build_report()["total_expenses"], 180000)
+
+    def test_import_fx_rates(self):
+        """Test importing rates with a header, merging them into the table and skipping invalid rows."""
+        path = os.path.join(self.tmp_dir.name, "rates.csv")
+        with open(path, "w", newline="") as f:
+            f.write("currency,date,rate\n")
+            f.write("eur,2025-01-01,90.5\n")
+            f.write("USD,2025-01-01,81\n")
+            f.write("USD,not a date,81\n")
+            f.write("INR,2025-01-01,1\n")
+        stats = import_fx_rates(path)
+        self.assertEqual((stats["imported"], stats["invalid"]), (2, 2))
+        table = load_fx_rates()
+        self.assertEqual(table.currencies(), ["EUR", "USD"])
+        self.assertEqual(table.rate_on("USD", datetime.date(2025, 1, 31)), 81.0)
+        self.assertEqual(table.rate_on("USD", datetime.date(2025, 3, 1)), 85.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,32 @@
 import unittest
 import os
 import csv
+import json
+import multiprocessing
+import tempfile
+import threading
 from finace_tracker.database import (
     load_transactions,
     save_transactions,
+    append_transaction,
+    compact_transactions,
+    load_transaction_store,
     load_budgets,
     save_budgets,
+    clear_cache,
+    load_monthly_index,
+    monthly_totals,
+    get_transaction,
+    amend_transaction,
+    delete_transaction,
 )
 
 class TestDatabase(unittest.TestCase):
     def setUp(self):
         """Set up test files."""
-        self.transactions_file = "test_transactions.txt"
-        self.budgets_file = "test_budgets.txt"
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.transactions_file = os.path.join(self.tmp_dir.name, "test_transactions.txt")
+        self.budgets_file = os.path.join(self.tmp_dir.name, "test_budgets.txt")
         # Override the file paths in the database module
         import finace_tracker.database
         finace_tracker.database.TRANSACTIONS_FILE = self.transactions_file
@@ -20,10 +34,7 @@ class TestDatabase(unittest.TestCase):
 
     def tearDown(self):
         """Tear down test files."""
-        if os.path.exists(self.transactions_file):
-            os.remove(self.transactions_file)
-        if os.path.exists(self.budgets_file):
-            os.remove(self.budgets_file)
+        self.tmp_dir.cleanup()
 
     def test_save_and_load_transactions(self):
         """Test saving and loading transactions."""
@@ -45,6 +56,349 @@ class TestDatabase(unittest.TestCase):
         loaded_transactions = load_transactions()
         self.assertEqual(len(loaded_transactions), 0)
 
+    def test_out_of_range_amount_is_skipped(self):
+        """Test that an amount too large for the amount column is skipped without misaligning the store."""
+        lunch = {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"}
+        paycheck = {"date": "2025-01-02", "type": "Income", "category": "Salary", "amount": 50000, "description": "Paycheck"}
+        save_transactions([lunch])
+        self.assertEqual(len(load_transaction_store()), 1)
+        with open(self.transactions_file, "a", newline="") as f:
+            f.write("2025-01-02,Expense,Food,10000000000000000000000,Huge,,2,\r\n")
+            f.write("2025-01-02,Income,Salary,50000,Paycheck,,3,\r\n")
+
+        # The cached store catches up, then a fresh load reads everything
+        for _ in range(2):
+            store = load_transaction_store()
+            self.assertEqual(list(store), [lunch, paycheck])
+            self.assertEqual(list(store.column("id")), [1, 3])
+            clear_cache()
+        self.assertEqual(load_transactions(), [lunch, paycheck])
+        with self.assertRaises(ValueError):
+            get_transaction(2)
+
+    def test_append_transaction(self):
+        """Test appending transactions one row at a time."""
+        transactions = [
+            {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"},
+            {"date": "2025-01-02", "type": "Income", "category": "Salary", "amount": 50000, "description": "Paycheck"},
+        ]
+        for transaction in transactions:
+            append_transaction(transaction)
+        self.assertEqual(load_transactions(), transactions)
+        with open(self.transactions_file, newline="") as f:
+            self.assertEqual(sum(1 for line in f if line.startswith("date,")), 1)
+
+    def test_append_after_torn_write(self):
+        """Test that a torn trailing row is isolated and dropped by compaction."""
+        with open(self.transactions_file, "w", newline="") as f:
+            f.write("date,type,category,amount,description\n")
+            f.write("2025-01-01,Expense,Food,1000,Lunch\n")
+            f.write("2025-01-02,Inco")  # Crash mid-write
+        transaction = {"date": "2025-01-03", "type": "Expense", "category": "Bills", "amount": 2500, "description": "Power"}
+        append_transaction(transaction)
+
+        loaded_transactions = load_transactions()
+        self.assertEqual(loaded_transactions[-1], transaction)
+        self.assertEqual(len(loaded_transactions), 2)
+
+        compact_transactions()
+        with open(self.transactions_file, newline="") as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_concurrent_appends(self):
+        """Test that appends from several threads and processes are all kept."""
+        def append_rows(name, count):
+            for number in range(count):
+                append_transaction({"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": number + 1, "description": name})
+
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=append_rows, args=(f"process {n}", 25)) for n in range(2)]
+        threads = [threading.Thread(target=append_rows, args=(f"thread {n}", 25)) for n in range(4)]
+        # Fork before starting threads, so no child inherits a held lock
+        for worker in processes + threads:
+            worker.start()
+        for worker in threads + processes:
+            worker.join()
+
+        clear_cache()
+        loaded_transactions = load_transactions()
+        self.assertEqual(len(loaded_transactions), 150)
+        self.assertEqual(len(load_transaction_store()), 150)
+        self.assertEqual(sum(t["amount"] for t in loaded_transactions), 6 * sum(range(1, 26)))
+
+    def test_failed_group_commit_reaches_every_writer(self):
+        """Test that every thread whose rows were in a failed group commit sees the error."""
+        import time
+        import finace_tracker.database
+
+        def write(transactions):
+            raise OSError("disk full")
+
+        failed = []
+        def append(number):
+            try:
+                finace_tracker.database._group_commit([number], write)
+            except OSError:
+                failed.append(number)
+
+        threads = [threading.Thread(target=append, args=(number,)) for number in range(3)]
+        with finace_tracker.database._commit_lock:
+            # Queue every batch before any thread can commit, so they are written together
+            for thread in threads:
+                thread.start()
+            while len(finace_tracker.database._pending_appends.get(write, ())) < 3:
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(failed), [0, 1, 2])
+
+    def test_concurrent_readers_catch_up_once(self):
+        """Test that threads loading at once apply rows appended by another process only once."""
+        save_transactions([{"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1, "description": "Tea"}])
+        load_transaction_store()
+        with open(self.transactions_file, "a", newline="") as f:
+            f.writelines(f"2025-01-02,Expense,Food,1,Tea,,{transaction_id},\r\n" for transaction_id in range(2, 5002))
+
+        barrier = threading.Barrier(8)
+        def load():
+            barrier.wait()
+            load_transaction_store()
+
+        threads = [threading.Thread(target=load) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(load_transaction_store()), 5001)
+
+    def test_reader_skips_row_being_written(self):
+        """Test that a reader sees only complete rows while a writer appends."""
+        with open(self.transactions_file, "w", newline="") as f:
+            f.write("date,type,category,amount,description\n")
+            f.write("2025-01-01,Expense,Food,1000,Lunch\n")
+            f.write("2025-01-02,Expense,Fo")  # Still being written
+        self.assertEqual(len(load_transactions()), 1)
+        self.assertEqual(len(load_transaction_store()), 1)
+
+        with open(self.transactions_file, "a", newline="") as f:
+            f.write("od,2500,Dinner\n")
+        self.assertEqual(load_transactions()[-1]["amount"], 2500)
+        self.assertEqual(list(load_transaction_store().column("amount")), [1000, 2500])
+
+    def test_transaction_store(self):
+        """Test the columnar store against the row-oriented loader."""
+        transactions = [
+            {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"},
+            {"date": "2025-01-02", "type": "Income", "category": "Salary", "amount": 50000, "description": "Paycheck"},
+            {"date": "2025-01-03", "type": "Expense", "category": "Food", "amount": 1500, "description": "Lunch"},
+        ]
+        save_transactions(transactions)
+        store = load_transaction_store()
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(list(store), load_transactions())
+        self.assertEqual(store.row(1), transactions[1])
+        self.assertEqual(list(store.column("amount")), [1000, 50000, 1500])
+        self.assertEqual(store.column("date")[0], 739252)
+        food = store.encode("category", "Food")
+        self.assertEqual(list(store.column("category")).count(food), 2)
+        self.assertEqual(store.column("description")[0], store.column("description")[2])
+        self.assertIsNone(store.encode("category", "Travel"))
+
+    def test_transaction_store_snapshot(self):
+        """Test that the binary snapshot is written, reused and refreshed."""
+        transactions = [
+            {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Chai ☕"},
+            {"date": "2025-01-02", "type": "Income", "category": "Salary", "amount": 50000, "description": "Paycheck"},
+        ]
+        save_transactions(transactions)
+        load_transaction_store()
+        snapshot_file = os.path.splitext(self.transactions_file)[0] + ".snap"
+        self.assertTrue(os.path.exists(snapshot_file))
+
+        clear_cache()
+        store = load_transaction_store()
+        self.assertIsInstance(store.column("amount"), memoryview)
+        self.assertEqual(list(store), transactions)
+
+        # Appended rows are picked up without re-parsing the whole file
+        appended = {"date": "2025-01-03", "type": "Expense", "category": "Bills", "amount": 2500, "description": "Power"}
+        append_transaction(appended)
+        self.assertEqual(list(load_transaction_store()), transactions + [appended])
+
+        # A rewritten file invalidates the snapshot
+        save_transactions(transactions[:1])
+        self.assertEqual(list(load_transaction_store()), transactions[:1])
+
+    def test_ledger_cache(self):
+        """Test that loads are served from the cache until the file changes."""
+        transactions = [
+            {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"},
+        ]
+        save_transactions(transactions)
+        self.assertIs(load_transactions(), transactions)
+        store = load_transaction_store()
+        self.assertIs(load_transaction_store(), store)
+
+        # Appends update the cached ledgers in place
+        appended = {"date": "2025-01-02", "type": "Income", "category": "Salary", "amount": 50000, "description": "Paycheck"}
+        append_transaction(appended)
+        self.assertIs(load_transactions(), transactions)
+        self.assertEqual(len(transactions), 2)
+        self.assertIs(load_transaction_store(), store)
+        self.assertEqual(store.row(1), appended)
+
+        # Rows appended by another process are parsed into the cached store
+        with open(self.transactions_file, "a", newline="") as f:
+            f.write("2025-01-03,Expense,Transport,300,Bus\r\n")
+        self.assertIs(load_transaction_store(), store)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.row(2)["description"], "Bus")
+
+        # Changes made behind the cache's back are picked up
+        with open(self.transactions_file, "w", newline="") as f:
+            f.write("date,type,category,amount,description\n")
+            f.write("2025-02-01,Expense,Bills,700,Water\n")
+        self.assertEqual(load_transactions()[0]["category"], "Bills")
+        self.assertEqual(load_transaction_store().row(0)["category"], "Bills")
+
+    def test_monthly_index(self):
+        """Test that monthly totals are persisted and updated on append."""
+        save_transactions([
+            {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"},
+            {"date": "2025-01-15", "type": "Expense", "category": "Food", "amount": 500, "description": "Snack"},
+            {"date": "2025-02-01", "type": "Income", "category": "Salary", "amount": 50000, "description": "Paycheck"},
+        ])
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Food": 1500})
+        self.assertEqual(monthly_totals(2025, 2, "Income"), {"Salary": 50000})
+        self.assertEqual(monthly_totals(2025, 3, "Expense"), {})
+
+        append_transaction({"date": "2025-01-20", "type": "Expense", "category": "Bills", "amount": 700, "description": "Water"})
+        clear_cache()
+        index_file = os.path.splitext(self.transactions_file)[0] + ".monthly.json"
+        with open(index_file) as f:
+            self.assertIn([2025, 1, "Expense", "Bills", 700], json.load(f)["totals"])
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Food": 1500, "Bills": 700})
+
+        save_transactions([])
+        self.assertEqual(load_monthly_index(), {})
+
+    def test_amend_and_delete_transactions(self):
+        """Test that amend records and tombstones are appended and folded into every view of the ledger."""
+        lunch = {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"}
+        paycheck = {"date": "2025-01-02", "type": "Income", "category": "Salary", "amount": 50000, "description": "Paycheck"}
+        dinner = {"date": "2025-02-01", "type": "Expense", "category": "Food", "amount": 2500, "description": "Dinner"}
+        save_transactions([lunch, paycheck])
+        append_transaction(dinner)
+        store = load_transaction_store()
+        self.assertEqual(list(store.column("id")), [1, 2, 3])
+        size = os.path.getsize(self.transactions_file)
+
+        bus = {"date": "2025-01-01", "type": "Expense", "category": "Transport", "amount": 300, "description": "Bus"}
+        amend_transaction(1, bus)
+        delete_transaction(2)
+        with open(self.transactions_file, newline="") as f:
+            f.seek(size)
+            self.assertEqual(f.read().splitlines(), ["2025-01-01,Expense,Transport,300,Bus,,1,amend", ",,,,,,2,delete"])
+
+        self.assertEqual(list(store), [bus, dinner])
+        self.assertEqual(get_transaction(1), bus)
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Transport": 300})
+        self.assertEqual(monthly_totals(2025, 1, "Income"), {})
+        with self.assertRaises(ValueError):
+            delete_transaction(2)
+
+        clear_cache()
+        self.assertEqual(load_transactions(), [bus, dinner])
+        self.assertEqual(list(load_transaction_store().column("id")), [1, 3])
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Transport": 300})
+
+        # Compaction folds the records in and keeps IDs, including the next one
+        compact_transactions()
+        with open(self.transactions_file, newline="") as f:
+            self.assertEqual(len(f.readlines()), 3)
+        append_transaction(lunch)
+        clear_cache()
+        self.assertEqual(list(load_transaction_store().column("id")), [1, 3, 4])
+        self.assertEqual(get_transaction(4), lunch)
+
+    def test_compaction_is_due_after_amends_and_deletes(self):
+        """Test that the log is compacted once enough records are obsolete, counting across processes."""
+        import finace_tracker.database
+        lunch = {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"}
+        save_transactions([lunch] * 8)
+        minimum = finace_tracker.database.COMPACTION_MIN_RECORDS
+        finace_tracker.database.COMPACTION_MIN_RECORDS = 4
+        try:
+            amend_transaction(1, dict(lunch, amount=900))
+            clear_cache()  # The count is kept in the ID index, not in memory
+            delete_transaction(2)
+            with open(self.transactions_file, newline="") as f:
+                self.assertEqual(len(f.readlines()), 11)
+            amend_transaction(3, dict(lunch, amount=800))
+        finally:
+            finace_tracker.database.COMPACTION_MIN_RECORDS = minimum
+        with open(self.transactions_file, newline="") as f:
+            self.assertEqual(len(f.readlines()), 8)
+        self.assertEqual([t["amount"] for t in load_transactions()], [900, 800, 1000, 1000, 1000, 1000, 1000])
+        self.assertEqual(list(load_transaction_store().column("id")), [1, 3, 4, 5, 6, 7, 8])
+
+    def test_replay_tombstones(self):
+        """Test that tombstones read from the log are folded in one pass, keeping IDs resolvable."""
+        with open(self.transactions_file, "w", newline="") as f:
+            f.write("date,type,category,amount,description,currency,id,op\n")
+            for transaction_id in range(1, 7):
+                f.write(f"2025-01-0{transaction_id},Expense,Food,{transaction_id}00,Lunch,,{transaction_id},\n")
+            f.write(",,,,,,2,delete\n")
+            f.write("2025-01-05,Expense,Bills,900,Water,,5,amend\n")
+            f.write(",,,,,,4,delete\n")
+            f.write("2025-01-04,Expense,Bills,400,Water,,4,amend\n")  # Amends a deleted row; skipped
+        store = load_transaction_store()
+        self.assertEqual(list(store.column("id")), [1, 3, 5, 6])
+        self.assertEqual(store.row(store.index_of(5))["amount"], 900)
+        self.assertEqual(store.index_of(6), 3)
+        self.assertEqual(list(store), load_transactions())
+
+        delete_transaction(3)
+        self.assertEqual(list(store.column("id")), [1, 5, 6])
+        self.assertEqual(store.index_of(6), 2)
+
+    def test_log_without_ids_is_upgraded(self):
+        """Test that a log written before IDs existed is numbered in order and rewritten on the next change."""
+        with open(self.transactions_file, "w", newline="") as f:
+            f.write("date,type,category,amount,description\n")
+            f.write("2025-01-01,Expense,Food,1000,Lunch\n")
+            f.write("2025-01-02,Expense,Bills,700,Water\n")
+        self.assertEqual(list(load_transaction_store().column("id")), [1, 2])
+        self.assertEqual(get_transaction(2)["category"], "Bills")
+
+        delete_transaction(1)
+        with open(self.transactions_file, newline="") as f:
+            self.assertEqual(next(csv.reader(f)), ["date", "type", "category", "amount", "description", "currency", "id", "op"])
+        clear_cache()
+        self.assertEqual([t["description"] for t in load_transactions()], ["Water"])
+        self.assertEqual(list(load_transaction_store().column("id")), [2])
+
+        # A stale ID index is rebuilt from the log
+        os.remove(os.path.splitext(self.transactions_file)[0] + ".ids")
+        amend_transaction(2, {"date": "2025-01-02", "type": "Expense", "category": "Bills", "amount": 900, "description": "Water"})
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Bills": 900})
+
+    @unittest.skipUnless(hasattr(os, "fchmod"), "File modes are not supported")
+    def test_rewrites_keep_file_modes(self):
+        """Test that files replaced atomically keep their permissions, and new ones follow the umask."""
+        import finace_tracker.database
+        lunch = {"date": "2025-01-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"}
+        save_transactions([lunch])
+        save_budgets({"Food": 50000})
+        expected = 0o666 & ~finace_tracker.database._UMASK
+        self.assertEqual(os.stat(self.transactions_file).st_mode & 0o777, expected)
+        self.assertEqual(os.stat(self.budgets_file).st_mode & 0o777, expected)
+
+        os.chmod(self.transactions_file, 0o640)
+        compact_transactions()
+        self.assertEqual(os.stat(self.transactions_file).st_mode & 0o777, 0o640)
+
     def test_save_and_load_budgets(self):
         """Test saving and loading budgets."""
         budgets = {"Food": 50000, "Transport": 20000}
@@ -0,0 +1,65 @@
+import unittest
+import os
+import datetime
+import gzip
+import json
+import tempfile
+import finace_tracker.database
+from finace_tracker.database import save_transactions, TransactionStore
+from finace_tracker.features.exports.exports import export_transactions, iter_transactions
+
+TRANSACTIONS = [
+    {"date": "2025-01-05", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"},
+    {"date": "2025-01-06", "type": "Expense", "category": "Food", "amount": 20000, "description": "Groceries"},
+    {"date": "2025-02-03", "type": "Expense", "category": "Transport", "amount": 5000, "description": "Fuel"},
+    {"date": "2025-03-01", "type": "Expense", "category": "Food", "amount": 7000, "description": "Dinner"},
+]
+
+
+class TestExports(unittest.TestCase):
+    def setUp(self):
+        """Set up test files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        save_transactions(list(TRANSACTIONS))
+
+    def tearDown(self):
+        """Tear down test files."""
+        self.tmp_dir.cleanup()
+
+    def test_iter_transactions_filters(self):
+        """Test date range, category and type filters."""
+        in_range = list(iter_transactions(datetime.date(2025, 1, 6), datetime.date(2025, 3, 1)))
+        self.assertEqual(in_range, TRANSACTIONS[1:3])
+        self.assertEqual(list(iter_transactions(categories=["Food"])), [TRANSACTIONS[1], TRANSACTIONS[3]])
+        self.assertEqual(list(iter_transactions(transaction_type="Income")), TRANSACTIONS[:1])
+        self.assertEqual(list(iter_transactions(categories=["Travel"])), [])
+
+    def test_date_index(self):
+        """Test that date ranges are found by binary search on sorted ledgers."""
+        store = TransactionStore.from_transactions(TRANSACTIONS)
+        self.assertEqual(store.indices_between(datetime.date(2025, 2, 1).toordinal(), None), range(2, 4))
+        store.append({"date": "2024-12-31", "type": "Expense", "category": "Bills", "amount": 100, "description": "Late"})
+        self.assertFalse(store.dates_sorted)
+        self.assertEqual(store.indices_between(None, datetime.date(2025, 1, 1).toordinal()), [4])
+
+    def test_export_csv_gzip(self):
+        """Test exporting compressed CSV."""
+        path = os.path.join(self.tmp_dir.name, "export.csv.gz")
+        count = export_transactions(path, "csv", categories=["Food"], compress=True)
+        self.assertEqual(count, 2)
+        with gzip.open(path, "rt", newline="") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], "date,type,category,amount,description,currency")
+        self.assertEqual(lines[1], "2025-01-06,Expense,Food,20000,Groceries,")
+
+    def test_export_ndjson(self):
+        """Test exporting newline-delimited JSON."""
+        path = os.path.join(self.tmp_dir.name, "export.ndjson")
+        export_transactions(path, "ndjson", start=datetime.date(2025, 2, 1))
+        with open(path) as f:
+            self.assertEqual([json.loads(line) for line in f], TRANSACTIONS[2:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+import finace_tracker.database
+from finace_tracker.database import append_transaction, load_transaction_store, load_transactions, monthly_totals
+from finace_tracker.features.imports import imports
+from finace_tracker.features.imports.imports import import_transactions, load_import_history, parse_amount
+
+MAPPING = {"date": "Date", "type": None, "category": "Category", "amount": "Amount", "description": "Narration"}
+
+
+class TestImports(unittest.TestCase):
+    def setUp(self):
+        """Set up test files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        self.statement_file = os.path.join(self.tmp_dir.name, "statement.csv")
+        with open(self.statement_file, "w", newline="") as f:
+            f.write("Date,Narration,Category,Amount\n")
+            f.write('05/01/2025,UBER TRIP,Transport,"-1,250.50"\n')
+            f.write("06/01/2025,ACME PAYROLL,Salary,90000\n")
+            f.write('05/01/2025,UBER TRIP,Transport,"-1,250.50"\n')  # A second, identical trip
+            f.write("07/01/2025,CASINO,Gambling,-500\n")  # Unknown category
+            f.write("not a date,COFFEE,Food,-90\n")
+            f.write("08/01/2025,TYPO,Food,-100000000000000000000\n")  # Too large for the ledger
+
+    def tearDown(self):
+        """Tear down test files."""
+        self.tmp_dir.cleanup()
+
+    def test_parse_amount(self):
+        """Test converting statement amounts to paisa."""
+        self.assertEqual(parse_amount("1,234.50"), 123450)
+        self.assertEqual(parse_amount("-0.1"), -10)
+        self.assertEqual(parse_amount("(12.00)"), -1200)
+        with self.assertRaises(ValueError):
+            parse_amount("n/a")
+        with self.assertRaises(ValueError):
+            parse_amount("100000000000000000000")
+
+    def test_import_transactions(self):
+        """Test importing, validating and deduplicating a statement."""
+        paycheck = {"date": "2025-01-06", "type": "Income", "category": "Salary", "amount": 9000000, "description": "ACME PAYROLL"}
+        append_transaction(paycheck)  # Entered by hand before the statement arrived
+        stats = import_transactions(self.statement_file, MAPPING)
+        self.assertEqual((stats["read"], stats["imported"], stats["duplicates"], stats["invalid"]), (6, 3, 0, 3))
+        self.assertEqual((stats["possible_duplicates"], stats["possible_duplicate_rows"]), (1, [paycheck]))
+        self.assertEqual(load_transactions()[1], {
+            "date": "2025-01-05", "type": "Expense", "category": "Transport", "amount": 125050, "description": "UBER TRIP",
+        })
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Transport": 250100})
+
+        # Importing the same statement again adds nothing
+        stats = import_transactions(self.statement_file, MAPPING)
+        self.assertEqual((stats["imported"], stats["duplicates"]), (0, 3))
+        self.assertEqual(len(load_transactions()), 4)
+
+        # A later statement of the same account with one more identical trip adds only that one
+        with open(self.statement_file, "a", newline="") as f:
+            f.write('05/01/2025,UBER TRIP,Transport,"-1,250.50"\n')
+        stats = import_transactions(self.statement_file, MAPPING, source="statement.csv")
+        self.assertEqual((stats["imported"], stats["duplicates"]), (1, 3))
+        self.assertEqual(stats["possible_duplicates"], 1)
+
+    def test_import_in_batches(self):
+        """Test batches against a ledger out of date order, and an import cut short after its first batch."""
+        paycheck = {"date": "2025-01-06", "type": "Income", "category": "Salary", "amount": 9000000, "description": "ACME PAYROLL"}
+        append_transaction({"date": "2025-02-01", "type": "Expense", "category": "Bills", "amount": 7000, "description": "Water"})
+        append_transaction(paycheck)
+        self.assertFalse(load_transaction_store().dates_sorted)
+
+        def interrupt(stats):
+            raise KeyboardInterrupt
+
+        with mock.patch.object(imports, "BATCH_SIZE", 1):
+            with self.assertRaises(KeyboardInterrupt):
+                import_transactions(self.statement_file, MAPPING, interrupt)
+            self.assertEqual(sum(load_import_history("statement.csv").values()), 1)
+
+            stats = import_transactions(self.statement_file, MAPPING)
+        self.assertEqual((stats["imported"], stats["duplicates"]), (2, 1))
+        # The second trip also matches the one the interrupted import added
+        self.assertEqual(stats["possible_duplicates"], 2)
+        self.assertEqual([t["description"] for t in stats["possible_duplicate_rows"]], ["ACME PAYROLL", "UBER TRIP"])
+        self.assertEqual(sum(load_import_history("statement.csv").values()), 3)
+        self.assertEqual(len(load_transactions()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
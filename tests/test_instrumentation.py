@@ -0,0 +1,64 @@
+import unittest
+import os
+import pstats
+import tempfile
+import finace_tracker.database
+from finace_tracker import instrumentation
+from finace_tracker.database import save_transactions, load_transactions, load_transaction_store, clear_cache
+
+TRANSACTIONS = [
+    {"date": "2025-01-05", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"},
+    {"date": "2025-01-06", "type": "Expense", "category": "Food", "amount": 20000, "description": "Groceries"},
+]
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        """Set up test files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        instrumentation.PROFILE_DIR = os.path.join(self.tmp_dir.name, "profiles")
+        save_transactions(list(TRANSACTIONS))
+        clear_cache()
+        instrumentation.reset()
+
+    def tearDown(self):
+        """Tear down test files."""
+        instrumentation.disable()
+        instrumentation.reset()
+        self.tmp_dir.cleanup()
+
+    def test_disabled_by_default(self):
+        """Test that nothing is recorded while instrumentation is off."""
+        load_transactions()
+        self.assertEqual(instrumentation.timings, {})
+        self.assertEqual(instrumentation.counters, {})
+
+    def test_timings_and_counters(self):
+        """Test timings, row counts, cache hits and bytes read."""
+        instrumentation.enable()
+        load_transactions()
+        load_transactions()
+        entry = instrumentation.timings["database.load_transactions"]
+        self.assertEqual(entry["calls"], 2)
+        self.assertEqual(entry["last_rows"], 2)
+        self.assertEqual(entry["rows"], 4)
+        self.assertEqual(instrumentation.counters["cache.hits"], 1)
+        size = os.path.getsize(finace_tracker.database.TRANSACTIONS_FILE)
+        self.assertEqual(instrumentation.counters["bytes_read.transactions"], size)
+
+        save_transactions(list(TRANSACTIONS))
+        self.assertEqual(instrumentation.timings["database.save_transactions"]["last_rows"], 2)
+
+    def test_profile(self):
+        """Test that a profiled session is saved as a pstats trace."""
+        instrumentation.enable(profile=True)
+        load_transaction_store()
+        path = instrumentation.stop_profile()
+        self.assertTrue(path.startswith(instrumentation.PROFILE_DIR))
+        stats = pstats.Stats(path)
+        self.assertTrue(any(function[2] == "load_transaction_store" for function in stats.stats))
+
+
+if __name__ == "__main__":
+    unittest.main()
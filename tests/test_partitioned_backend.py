@@ -0,0 +1,171 @@
+import unittest
+import datetime
+import json
+import os
+import tempfile
+import finace_tracker.database
+from finace_tracker.database import (
+    PartitionedBackend,
+    clear_cache,
+    set_backend,
+    load_transactions,
+    save_transactions,
+    append_transactions,
+    load_transaction_store,
+    load_transaction_store_between,
+    load_budgets,
+    save_budgets,
+    monthly_totals,
+    has_transactions,
+    migrate_ledger,
+    amend_transaction,
+    delete_transaction,
+    get_transaction,
+)
+
+TRANSACTIONS = [
+    {"date": "2025-01-05", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"},
+    {"date": "2025-01-06", "type": "Expense", "category": "Food", "amount": 20000, "description": "Groceries"},
+    {"date": "2025-01-31", "type": "Expense", "category": "Food", "amount": 500, "description": "Tea"},
+    {"date": "2025-02-01", "type": "Expense", "category": "Bills", "amount": 7000, "description": "Water"},
+]
+
+
+class TestPartitionedBackend(unittest.TestCase):
+    def setUp(self):
+        """Set up a segment directory and flat CSV files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.original_transactions_file = finace_tracker.database.TRANSACTIONS_FILE
+        self.original_budgets_file = finace_tracker.database.BUDGETS_FILE
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        finace_tracker.database.BUDGETS_FILE = os.path.join(self.tmp_dir.name, "budgets.txt")
+        self.directory = os.path.join(self.tmp_dir.name, "transactions")
+        self.backend = PartitionedBackend(self.directory)
+        set_backend(self.backend)
+
+    def tearDown(self):
+        """Restore the default backend and files."""
+        set_backend(None)
+        clear_cache()
+        finace_tracker.database.TRANSACTIONS_FILE = self.original_transactions_file
+        finace_tracker.database.BUDGETS_FILE = self.original_budgets_file
+        self.tmp_dir.cleanup()
+
+    def test_save_append_and_load_transactions(self):
+        """Test saving, appending and loading through the module functions."""
+        self.assertFalse(has_transactions())
+        save_transactions(TRANSACTIONS[:2])
+        self.assertEqual(len(load_transaction_store()), 2)
+        append_transactions(TRANSACTIONS[2:])
+        self.assertTrue(has_transactions())
+        self.assertEqual(load_transactions(), TRANSACTIONS)
+        self.assertEqual(list(load_transaction_store()), TRANSACTIONS)
+        clear_cache()
+        self.assertEqual(load_transactions(), TRANSACTIONS)
+
+    def test_closed_months_are_compressed(self):
+        """Test that past months are gzip segments and a backdated append rewrites only its month."""
+        today = datetime.date.today().isoformat()
+        current = {"date": today, "type": "Expense", "category": "Food", "amount": 100, "description": "Lunch"}
+        save_transactions(TRANSACTIONS + [current])
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.directory) if name[0].isdigit()),
+            ["2025-01.csv.gz", "2025-02.csv.gz", f"{today[:7]}.csv"],
+        )
+
+        february = os.stat(os.path.join(self.directory, "2025-02.csv.gz"))
+        backdated = {"date": "2025-01-20", "type": "Expense", "category": "Food", "amount": 300, "description": "Snack"}
+        append_transactions([backdated])
+        self.assertEqual(os.stat(os.path.join(self.directory, "2025-02.csv.gz")).st_mtime_ns, february.st_mtime_ns)
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Food": 20800})
+        self.assertEqual(load_transactions(), TRANSACTIONS[:3] + [backdated, TRANSACTIONS[3], current])
+
+    def test_amend_and_delete_touch_only_their_months(self):
+        """Test that IDs stay stable and amends and deletes write only to the affected segments."""
+        today = datetime.date.today().isoformat()
+        current = {"date": today, "type": "Expense", "category": "Food", "amount": 100, "description": "Lunch"}
+        save_transactions(TRANSACTIONS + [current])
+        february = os.stat(os.path.join(self.directory, "2025-02.csv.gz"))
+
+        delete_transaction(2)
+        self.assertEqual(get_transaction(4), TRANSACTIONS[3])
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Food": 500})
+        self.assertEqual(os.stat(os.path.join(self.directory, "2025-02.csv.gz")).st_mtime_ns, february.st_mtime_ns)
+
+        # The open month gets an amend record appended
+        segment = os.path.join(self.directory, f"{today[:7]}.csv")
+        size = os.path.getsize(segment)
+        dinner = dict(current, amount=900, description="Dinner")
+        amend_transaction(5, dinner)
+        with open(segment, newline="") as f:
+            f.seek(size)
+            self.assertEqual(f.read(), f"{today},Expense,Food,900,Dinner,,5,amend\r\n")
+
+        # An amend to another month moves the transaction, keeping its ID
+        moved = dict(TRANSACTIONS[0], date="2025-02-05")
+        amend_transaction(1, moved)
+        self.assertEqual(get_transaction(1), moved)
+        self.assertEqual(monthly_totals(2025, 2, "Income"), {"Salary": 100000})
+        with self.assertRaises(ValueError):
+            delete_transaction(2)
+
+        clear_cache()
+        self.assertEqual(list(load_transaction_store().column("id")), [3, 4, 1, 5])
+        self.assertEqual(load_transactions(), [TRANSACTIONS[2], TRANSACTIONS[3], moved, dinner])
+        append_transactions([current])
+        self.assertEqual(list(load_transaction_store().column("id")), [3, 4, 1, 5, 6])
+
+    def test_segments_without_ids_are_upgraded(self):
+        """Test that segments written before IDs existed are numbered in load order on the next change."""
+        os.makedirs(self.directory)
+        with open(os.path.join(self.directory, "2025-01.csv"), "w", newline="") as f:
+            f.write("date,type,category,amount,description\n")
+            f.writelines(f"{t['date']},{t['type']},{t['category']},{t['amount']},{t['description']}\n" for t in TRANSACTIONS[:3])
+        self.assertEqual(list(load_transaction_store().column("id")), [1, 2, 3])
+
+        delete_transaction(1)
+        clear_cache()
+        self.assertEqual(list(load_transaction_store().column("id")), [2, 3])
+        self.assertEqual(get_transaction(3), TRANSACTIONS[2])
+
+    def test_monthly_sums_come_from_the_manifest(self):
+        """Test that monthly totals are read without opening any segment."""
+        save_transactions(TRANSACTIONS)
+        with open(os.path.join(self.directory, "manifest.json")) as file:
+            self.assertEqual(json.load(file)["segments"]["2025-01"]["rows"], 3)
+        # The manifest is still cached, so deleted segments go unnoticed
+        os.remove(os.path.join(self.directory, "2025-01.csv.gz"))
+        os.remove(os.path.join(self.directory, "2025-02.csv.gz"))
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Food": 20500})
+        self.assertEqual(self.backend.load_monthly_index()[(2025, 2)], {("Expense", "Bills"): 7000})
+
+    def test_range_store_reads_only_covered_segments(self):
+        """Test that a date range loads only the months it covers."""
+        save_transactions(TRANSACTIONS)
+        store = load_transaction_store_between(datetime.date(2025, 2, 1), datetime.date(2025, 3, 1))
+        self.assertEqual(list(store), TRANSACTIONS[3:])
+        self.assertEqual(len(load_transaction_store_between()), len(TRANSACTIONS))
+
+    def test_manifest_is_rebuilt(self):
+        """Test that a corrupt manifest is rebuilt from the segments."""
+        save_transactions(TRANSACTIONS)
+        clear_cache()
+        with open(os.path.join(self.directory, "manifest.json"), "w") as file:
+            file.write("{not json")
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Food": 20500})
+        self.assertEqual(load_transactions(), TRANSACTIONS)
+
+    def test_migrate_from_csv(self):
+        """Test migrating a flat CSV ledger and its budgets."""
+        set_backend("csv")
+        save_transactions(TRANSACTIONS)
+        save_budgets({"Food": 30000})
+        self.assertEqual(migrate_ledger("csv", self.backend), len(TRANSACTIONS))
+
+        set_backend(self.backend)
+        self.assertEqual(load_transactions(), TRANSACTIONS)
+        self.assertEqual(load_budgets(), {"Food": 30000})
+
+
+if __name__ == "__main__":
+    unittest.main()
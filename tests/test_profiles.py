@@ -0,0 +1,109 @@
+import unittest
+import datetime
+import os
+import tempfile
+import finace_tracker.database
+from finace_tracker import profiles
+from finace_tracker.database import append_transaction, load_budgets, load_transactions, save_budgets, save_transactions
+from finace_tracker.features.analytics import consolidated
+
+HOUSEHOLD = [
+    {"date": "2025-01-05", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"},
+    {"date": "2025-01-06", "type": "Expense", "category": "Food", "amount": 20000, "description": "Groceries"},
+]
+SAVINGS = [
+    {"date": "2025-01-10", "type": "Expense", "category": "Bills", "amount": 3000, "description": "Fees"},
+    {"date": "2025-02-10", "type": "Expense", "category": "Bills", "amount": 3000, "description": "Fees"},
+]
+BUSINESS = [
+    {"date": "2025-01-15", "type": "Income", "category": "Freelance", "amount": 50000, "description": "Invoice"},
+    {"date": "2025-01-16", "type": "Expense", "category": "Food", "amount": 5000, "description": "Lunch"},
+]
+
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        """Set up a default profile with a second account, and a business profile."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.saved = (profiles.DATABASE_DIR, profiles.current())
+        profiles.DATABASE_DIR = self.tmp_dir.name
+        for (profile, account), transactions in (
+            (("default", "main"), HOUSEHOLD),
+            (("default", "savings"), SAVINGS),
+            (("business", "main"), BUSINESS),
+        ):
+            profiles.create_shard(profile, account)
+            profiles.activate(profile, account)
+            save_transactions(list(transactions))
+        profiles.activate("default")
+        save_budgets({"Food": 25000})
+        profiles.activate("business")
+        save_budgets({"Food": 10000})
+        profiles.activate("default")
+
+    def tearDown(self):
+        """Tear down test files."""
+        profiles.DATABASE_DIR, current = self.saved
+        profiles.activate(*current)
+        self.tmp_dir.cleanup()
+
+    def test_shard_paths(self):
+        """Test the layout: the default profile's main account is the original ledger."""
+        root = self.tmp_dir.name
+        self.assertEqual(profiles.shard_paths("default")["transactions"], os.path.join(root, "transactions.txt"))
+        self.assertEqual(
+            profiles.shard_paths("default", "savings")["transactions"],
+            os.path.join(root, "accounts", "savings", "transactions.txt"),
+        )
+        self.assertEqual(profiles.shard_paths("business", "card")["budgets"], os.path.join(root, "ledgers", "business", "budgets.txt"))
+        self.assertEqual(profiles.parse_shard("business/card"), ("business", "card"))
+        self.assertEqual(profiles.parse_shard("business"), ("business", "main"))
+        with self.assertRaises(ValueError):
+            profiles.parse_shard("../etc")
+
+    def test_shards_are_isolated(self):
+        """Test that each shard has its own ledger and caches and each profile its own budgets."""
+        self.assertEqual(load_transactions()[-1]["description"], "Groceries")
+        with profiles.using("default", "savings"):
+            append_transaction({"date": "2025-03-01", "type": "Expense", "category": "Bills", "amount": 100, "description": "Fee"})
+            self.assertEqual(len(load_transactions()), 3)
+            self.assertEqual(load_budgets(), {"Food": 25000})
+        self.assertEqual(profiles.current(), ("default", "main"))
+        self.assertEqual(len(load_transactions()), 2)
+        profiles.activate("business")
+        self.assertEqual(load_transactions()[0]["description"], "Invoice")
+        self.assertEqual(load_budgets(), {"Food": 10000})
+        self.assertEqual(finace_tracker.database.SQLITE_FILE, os.path.join(self.tmp_dir.name, "ledgers", "business", "finance.db"))
+
+    def test_listing(self):
+        """Test listing and selecting profiles and accounts."""
+        self.assertEqual(profiles.list_profiles(), ["default", "business"])
+        self.assertEqual(profiles.list_shards(), [("default", "main"), ("default", "savings"), ("business", "main")])
+        self.assertEqual(profiles.select_shards(["default", "business/main", "default/savings"]), profiles.list_shards())
+
+    def test_consolidated_report(self):
+        """Test that serial and parallel consolidated reports merge every shard's rollup."""
+        start, end = datetime.date(2025, 1, 1), datetime.date(2025, 2, 1)
+        serial = consolidated.consolidated_report(start, end, workers=1)
+        self.assertEqual(serial["total_income"], 150000)
+        self.assertEqual(serial["total_expenses"], 28000)
+        self.assertEqual(serial["expenses_by_category"], {"Food": 25000, "Bills": 3000})
+        self.assertEqual(serial["budgets"], [{"category": "Food", "budget": 35000, "spent": 25000, "remaining": 10000, "utilization": 25000 / 35000 * 100}])
+        self.assertEqual(
+            [(shard["profile"], shard["account"], shard["savings"]) for shard in serial["shards"]],
+            [("default", "main", 80000), ("default", "savings", -3000), ("business", "main", 45000)],
+        )
+        self.assertEqual(consolidated.consolidated_report(start, end, [("business", "main")])["total_income"], 50000)
+
+        minimum = consolidated.PARALLEL_MIN_SHARDS
+        consolidated.PARALLEL_MIN_SHARDS = 1
+        try:
+            parallel = consolidated.consolidated_report(start, end, workers=2)
+        finally:
+            consolidated.PARALLEL_MIN_SHARDS = minimum
+        self.assertEqual(parallel, serial)
+        self.assertEqual(profiles.current(), ("default", "main"))
+
+
+if __name__ == "__main__":
+    unittest.main()
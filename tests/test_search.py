@@ -0,0 +1,88 @@
+import unittest
+import os
+import datetime
+import tempfile
+import finace_tracker.database
+from finace_tracker.database import (
+    PartitionedBackend,
+    amend_transaction,
+    append_transaction,
+    compact_transactions,
+    load_transaction_store,
+    save_transactions,
+    set_backend,
+)
+from finace_tracker.features.search import search as search_module
+from finace_tracker.features.search.search import search, parse_query, load_search_index
+
+TODAY = datetime.date(2025, 6, 30)
+
+TRANSACTIONS = [
+    {"date": "2025-01-10", "type": "Expense", "category": "Transport", "amount": 90000, "description": "Uber to airport"},
+    {"date": "2025-05-02", "type": "Expense", "category": "Transport", "amount": 30000, "description": "Uber ride"},
+    {"date": "2025-05-20", "type": "Expense", "category": "Transport", "amount": 75000, "description": "UBER trip home"},
+    {"date": "2025-06-01", "type": "Expense", "category": "Food", "amount": 80000, "description": "Uber Eats dinner"},
+    {"date": "2025-06-15", "type": "Income", "category": "Salary", "amount": 5000000, "description": "Paycheck"},
+]
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        """Set up test files."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        finace_tracker.database.TRANSACTIONS_FILE = os.path.join(self.tmp_dir.name, "transactions.txt")
+        search_module._index = None
+        save_transactions(list(TRANSACTIONS))
+
+    def tearDown(self):
+        """Tear down test files."""
+        self.tmp_dir.cleanup()
+
+    def dates(self, results):
+        store = load_transaction_store()
+        return [store.row(index)["date"] for index in results]
+
+    def test_parse_query(self):
+        """Test parsing terms, facets and date windows."""
+        query = parse_query("uber in Transport over 500 last quarter", ["Transport"], TODAY)
+        self.assertEqual(query["terms"], ["uber"])
+        self.assertEqual(query["category"], "Transport")
+        self.assertEqual(query["min_amount"], 50000)
+        self.assertEqual(query["start"], datetime.date(2025, 3, 30))
+
+    def test_search(self):
+        """Test full-text and faceted queries."""
+        self.assertEqual(self.dates(search("uber in Transport over 500 last quarter", today=TODAY)), ["2025-05-20"])
+        self.assertEqual(self.dates(search("uber", today=TODAY)), ["2025-06-01", "2025-05-20", "2025-05-02", "2025-01-10"])
+        self.assertEqual(self.dates(search("income", today=TODAY)), ["2025-06-15"])
+        self.assertEqual(self.dates(search("under 500", today=TODAY)), ["2025-05-02"])
+        self.assertEqual(search("taxi", today=TODAY), [])
+
+    def test_index_is_extended_and_persisted(self):
+        """Test that appended rows are indexed without rebuilding."""
+        index = load_search_index()
+        self.assertEqual(index.rows, 5)
+        append_transaction({"date": "2025-06-20", "type": "Expense", "category": "Transport", "amount": 60000, "description": "uber again"})
+        search_module._index = None
+        index = load_search_index()
+        self.assertEqual(index.rows, 6)
+        self.assertEqual(list(index.tokens["uber"]), [0, 1, 2, 3, 5])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, "transactions.search")))
+
+    def test_index_is_rebuilt_after_other_changes(self):
+        """Test that an amended row is reindexed even after the ledger is rebuilt."""
+        scooter = dict(TRANSACTIONS[0], description="Scooter")
+        for backend in ("csv", PartitionedBackend(os.path.join(self.tmp_dir.name, "segments"))):
+            set_backend(backend)
+            save_transactions(list(TRANSACTIONS))
+            self.assertEqual(self.dates(search("airport", today=TODAY)), ["2025-01-10"])
+            amend_transaction(1, scooter)
+            compact_transactions()
+            search_module._index = None
+            self.assertEqual(search("airport", today=TODAY), [])
+            self.assertEqual(self.dates(search("scooter", today=TODAY)), ["2025-01-10"])
+        set_backend("csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
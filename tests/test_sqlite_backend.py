@@ -0,0 +1,68 @@
+import unittest
+import os
+import tempfile
+from finace_tracker.database import (
+    SqliteBackend,
+    set_backend,
+    load_transactions,
+    save_transactions,
+    append_transactions,
+    load_transaction_store,
+    load_budgets,
+    save_budgets,
+    monthly_totals,
+    has_transactions,
+)
+
+TRANSACTIONS = [
+    {"date": "2025-01-05", "type": "Income", "category": "Salary", "amount": 100000, "description": "Paycheck"},
+    {"date": "2025-01-06", "type": "Expense", "category": "Food", "amount": 20000, "description": "Groceries"},
+    {"date": "2025-01-31", "type": "Expense", "category": "Food", "amount": 500, "description": "Tea"},
+    {"date": "2025-02-01", "type": "Expense", "category": "Bills", "amount": 7000, "description": "Water"},
+]
+
+
+class TestSqliteBackend(unittest.TestCase):
+    def setUp(self):
+        """Set up a SQLite database."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.backend = SqliteBackend(os.path.join(self.tmp_dir.name, "finance.db"))
+        set_backend(self.backend)
+
+    def tearDown(self):
+        """Restore the default backend and remove the database."""
+        set_backend(None)
+        self.backend.close()
+        self.tmp_dir.cleanup()
+
+    def test_save_append_and_load_transactions(self):
+        """Test saving, appending and loading through the module functions."""
+        self.assertFalse(has_transactions())
+        save_transactions(TRANSACTIONS[:2])
+        append_transactions(TRANSACTIONS[2:])
+        self.assertTrue(has_transactions())
+        self.assertEqual(load_transactions(), TRANSACTIONS)
+        self.assertEqual(list(load_transaction_store()), TRANSACTIONS)
+
+    def test_wal_mode(self):
+        """Test that the database runs in WAL mode."""
+        save_transactions(TRANSACTIONS)
+        mode = self.backend._connect().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_monthly_aggregates(self):
+        """Test aggregates computed by the database."""
+        save_transactions(TRANSACTIONS)
+        self.assertEqual(monthly_totals(2025, 1, "Expense"), {"Food": 20500})
+        self.assertEqual(monthly_totals(2025, 2, "Expense"), {"Bills": 7000})
+        self.assertEqual(self.backend.load_monthly_index()[(2025, 1)][("Income", "Salary")], 100000)
+
+    def test_budgets(self):
+        """Test saving and loading budgets."""
+        save_budgets({"Food": 50000, "Transport": 20000})
+        save_budgets({"Food": 40000})
+        self.assertEqual(load_budgets(), {"Food": 40000})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import datetime
+import os
+import tempfile
+from unittest import mock
+import finace_tracker.database
+from finace_tracker.database import TransactionStore, save_fx_rates
+from finace_tracker.features.transactions import transactions as transactions_module
+from finace_tracker.features.transactions.transactions import matching_rows, page_rows, offset_for_date
+
+TRANSACTIONS = [
+    {"date": f"2025-01-{day:02d}", "type": "Expense" if day % 3 else "Income",
+     "category": "Food" if day % 2 else "Transport", "amount": day * 100, "description": f"Day {day}"}
+    for day in range(1, 31)
+]
+
+
+class TestTransactionViewer(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory store."""
+        self.store = TransactionStore.from_transactions(TRANSACTIONS)
+
+    def test_page_rows_newest_first(self):
+        """Test paging from the newest transaction backwards."""
+        rows = matching_rows(self.store)
+        self.assertEqual(page_rows(rows, 0, 5), [29, 28, 27, 26, 25])
+        self.assertEqual(page_rows(rows, 25, 10), [4, 3, 2, 1, 0])
+
+    def test_filters(self):
+        """Test type and category filters served by the posting index."""
+        self.assertEqual(list(matching_rows(self.store, category="Transport")), list(range(1, 30, 2)))
+        income_food = matching_rows(self.store, "Income", "Food")
+        self.assertEqual([self.store.row(i)["date"] for i in income_food], ["2025-01-03", "2025-01-09", "2025-01-15", "2025-01-21", "2025-01-27"])
+
+        # The posting index stays current as rows are appended
+        self.store.append({"date": "2025-01-31", "type": "Expense", "category": "Transport", "amount": 1, "description": "Bus"})
+        self.assertEqual(matching_rows(self.store, category="Transport")[-1], 30)
+
+    def test_unsorted_rows_are_ordered_by_date(self):
+        """Test that rows added out of date order are shown in date order."""
+        self.store.append({"date": "2024-12-31", "type": "Expense", "category": "Food", "amount": 1, "description": "Late"})
+        rows = matching_rows(self.store)
+        self.assertEqual(rows[0], 30)
+        self.assertEqual(page_rows(rows, 0, 1), [29])
+
+    def test_jump_to_date(self):
+        """Test finding the page offset for a date."""
+        rows = matching_rows(self.store)
+        offset = offset_for_date(self.store, rows, datetime.date(2025, 1, 10))
+        self.assertEqual(self.store.row(page_rows(rows, offset, 1)[0])["date"], "2025-01-10")
+
+
+class TestPromptTransaction(unittest.TestCase):
+    def setUp(self):
+        """Set up an FX rate table with dollar rates only."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.original_fx_rates_file = finace_tracker.database.FX_RATES_FILE
+        finace_tracker.database.FX_RATES_FILE = os.path.join(self.tmp_dir.name, "fx_rates.txt")
+        save_fx_rates([("USD", datetime.date(2025, 1, 1).toordinal(), 80.0)])
+
+    def tearDown(self):
+        """Restore the FX rates file."""
+        finace_tracker.database.FX_RATES_FILE = self.original_fx_rates_file
+        self.tmp_dir.cleanup()
+
+    def prompt(self, answers, current=None):
+        """Runs the transaction prompt, answering its questions with `answers` in order."""
+        replies = iter(answers)
+        question = mock.Mock()
+        question.ask.side_effect = lambda: next(replies)
+        with mock.patch.object(transactions_module.questionary, "select", return_value=question), \
+                mock.patch.object(transactions_module.questionary, "text", return_value=question):
+            return transactions_module._prompt_transaction(current)
+
+    def test_amounts(self):
+        """Test that amounts are parsed exactly and non-finite or oversized ones are rejected."""
+        transaction = self.prompt(["Expense", "Food", "12.10", "", "Lunch"])
+        self.assertEqual(transaction["amount"], 1210)
+        for amount in ("ten", "inf", "nan", "1e20", "1e999999"):
+            self.assertIsNone(self.prompt(["Expense", "Food", amount, "", "Lunch"]))
+
+    def test_edit_checks_the_rate_for_the_entered_date(self):
+        """Test that an edit is checked against the rates for the date entered."""
+        current = {"date": "2025-02-01", "type": "Expense", "category": "Food", "amount": 1000, "description": "Lunch"}
+        answers = ["Expense", "Food", "10.00", "usd", "Lunch", "2025-03-01"]
+        self.assertEqual(self.prompt(answers, current), dict(current, date="2025-03-01", currency="USD"))
+        with mock.patch.object(transactions_module, "load_fx_rates") as load_fx_rates:
+            self.prompt(answers, current)
+        load_fx_rates.return_value.rate_on.assert_called_once_with("USD", datetime.date(2025, 3, 1))
+        self.assertIsNone(self.prompt(["Expense", "Food", "10.00", "EUR", "Lunch", "2025-03-01"], current))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,13 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from finace_tracker.currency import BASE_CURRENCY, symbol
+from finace_tracker.database import load_transaction_store, load_budgets
+from finace_tracker.features.analytics.engine import LedgerSummary
+from finace_tracker.features.analytics.trends import category_trend, monthly_trend, rolling_average
+
+# Totals are in the base currency; recent transactions keep their own
+SYMBOL = symbol(BASE_CURRENCY)
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -47,28 +54,16 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Data Loading ---
-@st.cache_data
-def load_transactions():
-    try:
-        df = pd.read_csv("database/transactions.txt")
-        df['amount'] = df['amount'] / 100  # Convert from paisa/cents
-        df['date'] = pd.to_datetime(df['date'])
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame(columns=['date', 'type', 'category', 'amount', 'description'])
-
-@st.cache_data
-def load_budgets():
-    try:
-        df = pd.read_csv("database/budgets.txt", header=None, names=['category', 'budget'])
-        df['budget'] = df['budget'] / 100  # Convert from paisa/cents
-        return df
-    except (FileNotFoundError, pd.errors.EmptyDataError):
-        return pd.DataFrame(columns=['category', 'budget'])
-
-
-transactions_df = load_transactions()
-budgets_df = load_budgets()
+# The summary lives as long as the server. On each rerun the database module
+# parses only rows appended since the last one (it tracks the file's offset
+# and mtime), and the summary folds just those rows into its running totals
+# and bounded list of recent transactions.
+@st.cache_resource
+def ledger_summary():
+    return LedgerSummary(recent_count=10)
+
+summary = ledger_summary().refresh(load_transaction_store())
+report = summary.report(load_budgets())
 
 # --- Main Dashboard ---
 st.title("📊 Personal Finance Dashboard")
@@ -77,22 +72,22 @@ st.title("📊 Personal Finance Dashboard")
 st.markdown('<div class="card">', unsafe_allow_html=True)
 st.header("Financial Overview")
 
-total_income = transactions_df[transactions_df['type'] == 'Income']['amount'].sum()
-total_expenses = transactions_df[transactions_df['type'] == 'Expense']['amount'].sum()
-current_balance = total_income - total_expenses
+total_income = report['total_income'] / 100  # Convert from paisa/cents
+total_expenses = report['total_expenses'] / 100
+current_balance = report['savings'] / 100
 
 col1, col2, col3 = st.columns(3)
 with col1:
     st.markdown('<div class="metric">', unsafe_allow_html=True)
-    st.markdown(f'<p class="metric-label">Current Balance</p><p class="metric-value" style="color: {"#2E8B57" if current_balance >= 0 else "#DC143C"};">₹{current_balance:,.2f}</p>', unsafe_allow_html=True)
+    st.markdown(f'<p class="metric-label">Current Balance</p><p class="metric-value" style="color: {"#2E8B57" if current_balance >= 0 else "#DC143C"};">{SYMBOL}{current_balance:,.2f}</p>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 with col2:
     st.markdown('<div class="metric">', unsafe_allow_html=True)
-    st.markdown(f'<p class="metric-label">Total Income</p><p class="metric-value" style="color: #2E8B57;">₹{total_income:,.2f}</p>', unsafe_allow_html=True)
+    st.markdown(f'<p class="metric-label">Total Income</p><p class="metric-value" style="color: #2E8B57;">{SYMBOL}{total_income:,.2f}</p>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 with col3:
     st.markdown('<div class="metric">', unsafe_allow_html=True)
-    st.markdown(f'<p class="metric-label">Total Expenses</p><p class="metric-value" style="color: #DC143C;">₹{total_expenses:,.2f}</p>', unsafe_allow_html=True)
+    st.markdown(f'<p class="metric-label">Total Expenses</p><p class="metric-value" style="color: #DC143C;">{SYMBOL}{total_expenses:,.2f}</p>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -101,14 +96,8 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown('<div class="card">', unsafe_allow_html=True)
 st.header("Budget Status")
 
-if not budgets_df.empty:
-    expense_summary = transactions_df[transactions_df['type'] == 'Expense'].groupby('category')['amount'].sum().reset_index()
-    budget_summary = pd.merge(budgets_df, expense_summary, on='category', how='left').fillna(0)
-    budget_summary.rename(columns={'amount': 'spent'}, inplace=True)
-    budget_summary['remaining'] = budget_summary['budget'] - budget_summary['spent']
-    budget_summary['utilization'] = (budget_summary['spent'] / budget_summary['budget']) * 100
-
-    for index, row in budget_summary.iterrows():
+if report['budgets']:
+    for row in report['budgets']:
         st.subheader(row['category'])
         col1, col2 = st.columns([3,1])
         with col1:
@@ -123,9 +112,9 @@ if not budgets_df.empty:
             st.markdown(f'<p style="color:{utilization_color}; text-align:right;">{row["utilization"]:.2f}%</p>', unsafe_allow_html=True)
 
         col1, col2, col3 = st.columns(3)
-        col1.metric("Budget", f"₹{row['budget']:,.2f}")
-        col2.metric("Spent", f"₹{row['spent']:,.2f}")
-        col3.metric("Remaining", f"₹{row['remaining']:,.2f}")
+        col1.metric("Budget", f"{SYMBOL}{row['budget'] / 100:,.2f}")
+        col2.metric("Spent", f"{SYMBOL}{row['spent'] / 100:,.2f}")
+        col3.metric("Remaining", f"{SYMBOL}{row['remaining'] / 100:,.2f}")
         st.markdown("---")
 else:
     st.info("No budgets set. You can set budgets in the CLI application.")
@@ -133,11 +122,43 @@ else:
 st.markdown('</div>', unsafe_allow_html=True)
 
 
+# --- Trends Section ---
+# Served from the monthly rollup, so the charts cost the same however many
+# transactions the ledger holds.
+st.markdown('<div class="card">', unsafe_allow_html=True)
+st.header("Trends")
+
+trend_months = st.radio("Period", [12, 24, 60], format_func=lambda months: f"Last {months} months", horizontal=True)
+periods = monthly_trend(trend_months)
+trend_df = pd.DataFrame({
+    "Income": [period['income'] / 100 for period in periods],
+    "Expenses": [period['expenses'] / 100 for period in periods],
+    "3-Month Avg Expenses": [average / 100 for average in rolling_average([period['expenses'] for period in periods])],
+}, index=[period['period'] for period in periods])
+st.line_chart(trend_df)
+
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("Savings Rate (%)")
+    st.bar_chart(pd.Series([period['savings_rate'] for period in periods], index=trend_df.index))
+with col2:
+    st.subheader("Spending by Category")
+    categories = category_trend(periods)
+    if categories:
+        st.area_chart(pd.DataFrame({category: [amount / 100 for amount in amounts] for category, amounts in categories.items()}, index=trend_df.index))
+    else:
+        st.info("No expenses in this period.")
+
+st.markdown('</div>', unsafe_allow_html=True)
+
+
 # --- Recent Transactions Table ---
 st.markdown('<div class="card">', unsafe_allow_html=True)
 st.header("Recent Transactions")
 
-recent_transactions = transactions_df.sort_values(by='date', ascending=False).head(10)
+recent_df = pd.DataFrame(summary.recent(), columns=['date', 'type', 'category', 'amount', 'description', 'currency'])
+recent_df['amount'] = recent_df['amount'] / 100  # Convert from paisa/cents
+recent_df['currency'] = recent_df['currency'].fillna(BASE_CURRENCY)
 
 def style_df(df):
     def highlight_type(row):
@@ -145,8 +166,8 @@ def style_df(df):
         return [f'color: {color}'] * len(row)
     return df.style.apply(highlight_type, axis=1)
 
-if not recent_transactions.empty:
-    st.dataframe(style_df(recent_transactions[['date', 'type', 'category', 'description', 'amount']]), use_container_width=True)
+if not recent_df.empty:
+    st.dataframe(style_df(recent_df[['date', 'type', 'category', 'description', 'amount', 'currency']]), use_container_width=True)
 else:
     st.info("No transactions found.")
 